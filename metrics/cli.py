@@ -1,13 +1,20 @@
 import argparse
+import json
 import os
+import re
 import shutil
 
 from .collector import Collector
 from .config import load_config, get_config_value
 from .exporter import export_json
-from .storage import init_db, store_snapshot, purge_old
+from .http_cache import DEFAULT_CACHE_PATH, DEFAULT_MAX_BYTES, open_cache
+from .storage import init_db, store_snapshot, purge_old, vacuum
 from .utils import ensure_dir
 
+# One <sha256>.json file per key, as GitHubClient cached before the SQLite cache
+LEGACY_CACHE_DIR = os.path.dirname(DEFAULT_CACHE_PATH)
+LEGACY_CACHE_FILE = re.compile(r"[0-9a-f]{64}\.json")
+
 
 def build_parser():
     parser = argparse.ArgumentParser(prog="metrics")
@@ -19,6 +26,16 @@ def build_parser():
         sub_parser = sub.add_parser(name)
         sub_parser.add_argument("--config", default="config.yml")
 
+    vacuum_parser = sub.add_parser("vacuum")
+    vacuum_parser.add_argument("--config", default="config.yml")
+    vacuum_parser.add_argument("--full", action="store_true", help="Rebuild the whole database file")
+
+    cache_parser = sub.add_parser("cache", help="Inspect or shrink the GitHub response cache")
+    cache_parser.add_argument("action", choices=["stats", "prune"])
+    cache_parser.add_argument("--path", default=DEFAULT_CACHE_PATH)
+    cache_parser.add_argument("--older-than-days", type=float, help="Drop entries unused for this many days")
+    cache_parser.add_argument("--max-mb", type=float, help="Size budget to evict down to (default 256)")
+
     return parser
 
 
@@ -42,7 +59,8 @@ def cmd_collect(cfg):
 def cmd_export(cfg):
     db_path = get_config_value(cfg, "storage", "db_path", default="data/metrics.db")
     output_dir = get_config_value(cfg, "export", "output_dir", default="output")
-    export_json(db_path, output_dir)
+    history_deltas = bool(get_config_value(cfg, "export", "history_deltas", default=False))
+    export_json(db_path, output_dir, history_deltas=history_deltas)
 
 
 def cmd_build_dashboard(cfg):
@@ -62,10 +80,37 @@ def cmd_build_dashboard(cfg):
     output_dir = get_config_value(cfg, "export", "output_dir", default="output")
     data_dir = os.path.join(public_dir, "data")
     ensure_dir(data_dir)
-    for name in ["latest.json", "history.json"]:
+    for name in ["latest.json", "history.json", "history.delta.json"]:
         src = os.path.join(output_dir, name)
+        dst = os.path.join(data_dir, name)
         if os.path.exists(src):
-            shutil.copy2(src, os.path.join(data_dir, name))
+            shutil.copy2(src, dst)
+        elif name == "history.delta.json" and os.path.exists(dst):
+            # Stale deltas would shadow history.json in the dashboard
+            os.remove(dst)
+
+
+def cmd_vacuum(cfg, full=False):
+    db_path = get_config_value(cfg, "storage", "db_path", default="data/metrics.db")
+    schema_path = get_config_value(cfg, "storage", "schema_path", default="sql/schema.sql")
+    init_db(db_path, schema_path)
+    vacuum(db_path, full=full)
+
+
+def cmd_cache(action, path=DEFAULT_CACHE_PATH, older_than_days=None, max_mb=None):
+    max_bytes = int(max_mb * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+    with open_cache(path, max_bytes) as cache:
+        if action == "prune":
+            removed = cache.prune(older_than_days * 86400 if older_than_days is not None else None)
+            legacy = [
+                os.path.join(LEGACY_CACHE_DIR, name)
+                for name in (os.listdir(LEGACY_CACHE_DIR) if os.path.isdir(LEGACY_CACHE_DIR) else [])
+                if LEGACY_CACHE_FILE.fullmatch(name)
+            ]
+            for name in legacy:
+                os.remove(name)
+            print(f"Pruned {removed} entries and {len(legacy)} legacy cache files")
+        print(json.dumps(cache.stats(), indent=2))
 
 
 def cmd_run(cfg):
@@ -77,6 +122,10 @@ def cmd_run(cfg):
 def main():
     parser = build_parser()
     args = parser.parse_args()
+    if args.command == "cache":
+        # Needs no config file
+        cmd_cache(args.action, args.path, args.older_than_days, args.max_mb)
+        return
     cfg = load_config(args.config)
 
     if args.command == "init":
@@ -87,6 +136,8 @@ def main():
         cmd_export(cfg)
     elif args.command == "build-dashboard":
         cmd_build_dashboard(cfg)
+    elif args.command == "vacuum":
+        cmd_vacuum(cfg, full=args.full)
     elif args.command == "run":
         cmd_run(cfg)
 
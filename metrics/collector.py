@@ -1,13 +1,20 @@
 import datetime as dt
 import os
+import shutil
 import subprocess
 from collections import Counter
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 
+from .epics import EpicMatcher
+from .git_history import read_history, read_lines_added
 from .gitlab import GitLabClient
 from .metrics_calc import calculate_repo_metrics, parse_lcov
 from .utils import ensure_dir
 
+# git's error when --shallow-since leaves nothing to fetch
+NO_SHALLOW_COMMITS = "no commits selected for shallow requests"
+GIT_TIMEOUT = 900
+
 
 class Collector:
     def __init__(self, config: Dict[str, Any]):
@@ -19,16 +26,127 @@ class Collector:
         token = os.getenv(token_env)
         if not token:
             raise RuntimeError(f"Missing GitLab token in env var: {token_env}")
-        return GitLabClient(project_cfg.get("gitlab_url"), token)
+        return GitLabClient(project_cfg.get("gitlab_url"), token, int(project_cfg.get("api_concurrency", 4)))
+
+    def _clone_url(self, project_cfg: Dict[str, Any], project: Dict[str, Any]):
+        clone_url = project_cfg.get("repo_url") or project.get("http_url_to_repo")
+        token_env = project_cfg.get("token_env", "GITLAB_TOKEN")
+        token = os.getenv(token_env)
+        if token and clone_url and clone_url.startswith("http"):
+            parts = clone_url.split("//", 1)
+            clone_url = f"{parts[0]}//oauth2:{token}@{parts[1]}"
+        return clone_url
+
+    def _git(self, repo_path: str, *args: str) -> str:
+        return subprocess.run(
+            ["git", "-C", repo_path, *args], check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            timeout=GIT_TIMEOUT,
+        ).stdout.strip()
+
+    def _clone_repo(self, clone_url: str, repo_path: str, shallow: bool, depth: int,
+                    shallow_since: Optional[dt.date] = None, partial: bool = False):
+        """Clone repo_path, or fetch the remote's HEAD into an existing clone.
+
+        Shallow history is cut at shallow_since when given (enough for the
+        collection window), otherwise at depth; updates fetch the same window.
+        Partial clones (blob:none) download no file contents and skip the
+        checkout: commit metrics never need blobs, and _checkout_repo fetches
+        only the ones at HEAD when files are scanned. Updates move HEAD without
+        touching the worktree for the same reason.
+
+        An update that times out keeps the existing clone as it was; a clone
+        that times out is removed and raises RuntimeError.
+        """
+        history = []
+        if shallow and shallow_since:
+            history = [f"--shallow-since={shallow_since.isoformat()}"]
+        elif shallow:
+            history = ["--depth", str(depth)]
 
-    def _clone_repo(self, clone_url: str, repo_path: str, shallow: bool, depth: int):
         if os.path.exists(os.path.join(repo_path, ".git")):
+            try:
+                if self._git(repo_path, "rev-parse", "--is-shallow-repository") != "true":
+                    history = []  # never truncate a full clone
+                # Through origin, so a partial clone's blob filter applies to the fetch too
+                self._git(repo_path, "remote", "set-url", "origin", clone_url)
+                self._with_shallow_fallback(
+                    history, lambda h: self._git(repo_path, "fetch", "--quiet", *h, "origin", "HEAD"),
+                )
+                self._git(repo_path, "reset", "--soft", "--quiet", "FETCH_HEAD")
+            except subprocess.TimeoutExpired as e:
+                print(f"⚠️  git {e.cmd[3]} timed out after {GIT_TIMEOUT}s; using the existing clone of {repo_path}")
             return
         ensure_dir(os.path.dirname(repo_path))
-        cmd = ["git", "clone", clone_url, repo_path]
-        if shallow:
-            cmd.extend(["--depth", str(depth)])
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        filters = ["--filter=blob:none", "--no-checkout"] if partial else []
+        try:
+            self._with_shallow_fallback(history, lambda h: subprocess.run(
+                ["git", "clone", "--quiet", *h, *filters, clone_url, repo_path],
+                check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, timeout=GIT_TIMEOUT,
+            ))
+        except subprocess.TimeoutExpired as e:
+            # A killed clone leaves a half-written repo that later updates would trip over
+            shutil.rmtree(repo_path, ignore_errors=True)
+            raise RuntimeError(f"git clone timed out after {GIT_TIMEOUT}s: {repo_path}") from e
+
+    def _with_shallow_fallback(self, history: List[str], run: Callable[[List[str]], Any]):
+        """run(history), retrying with --depth 1 when --shallow-since finds no commits.
+
+        A repo quiet for the whole window has nothing after shallow_since, which
+        git reports as an error; its latest commit is still needed for the scan.
+        """
+        try:
+            run(history)
+        except subprocess.CalledProcessError as e:
+            if not history or not history[0].startswith("--shallow-since") or NO_SHALLOW_COMMITS not in (e.stderr or ""):
+                raise
+            run(["--depth", "1"])
+
+    def _checkout_repo(self, repo_path: str):
+        """Make the worktree match HEAD (hydrating a partial clone's blobs at HEAD)."""
+        try:
+            self._git(repo_path, "reset", "--hard", "--quiet", "HEAD")
+        except subprocess.TimeoutExpired as e:
+            raise RuntimeError(f"git checkout timed out after {GIT_TIMEOUT}s: {repo_path}") from e
+
+    def _local_project(self, project_cfg: Dict[str, Any], repo_path: str) -> Dict[str, Any]:
+        """Project info for commit_source: local, taken from config instead of the API."""
+        repo_url = project_cfg.get("repo_url") or ""
+        return {
+            "name": project_cfg.get("name") or os.path.basename(os.path.abspath(repo_path)),
+            "web_url": project_cfg.get("web_url") or (repo_url[:-4] if repo_url.endswith(".git") else repo_url) or None,
+            "default_branch": project_cfg.get("default_branch"),
+        }
+
+    def _local_commits(self, repo_path: str, since: dt.date) -> List[Dict[str, Any]]:
+        """Commits since a date from one streamed git log, shaped like the API's.
+
+        Like the API, the window starts at midnight UTC and commits are dated
+        by committer (git would otherwise start a bare date at the current
+        time of day).
+        """
+        history = read_history(repo_path, f"{since.isoformat()}T00:00:00Z", "now", stats=False, committer_dates=True)
+        return [
+            {"id": commit.sha, "created_at": commit.date, "title": commit.message.split("\n", 1)[0],
+             "message": commit.message}
+            for commit in history.commits
+        ]
+
+    def _epic_loc(self, repo_path: str, since: dt.date, epic_shas: Dict[str, List[str]]) -> Dict[str, int]:
+        """Lines added by each epic's matching commits, from the clone's numstat.
+
+        Epics with a commit whose diff the clone lacks (outside a shallow
+        clone, or on its boundary) are left out rather than undercounted.
+        """
+        added = read_lines_added(repo_path, f"{since.isoformat()}T00:00:00Z", "now")
+        epic_loc: Counter[str] = Counter()
+        incomplete = set()
+        for sha, keys in epic_shas.items():
+            for key in keys:
+                if sha in added:
+                    epic_loc[key] += added[sha]
+                else:
+                    incomplete.add(key)
+        return {key: loc for key, loc in epic_loc.items() if key not in incomplete}
 
     def collect(self) -> Dict[str, Any]:
         project_cfg = self.config.get("project", {})
@@ -36,53 +154,80 @@ class Collector:
         retention_cfg = self.config.get("retention", {})
         epics_cfg = self.config.get("epics", {})
 
-        client = self._gitlab_client()
         project_id = project_cfg.get("project_id")
         since_days = int(collection_cfg.get("since_days", 365))
         since = dt.date.today() - dt.timedelta(days=since_days)
-
-        project = client.get_project(project_id)
-        commits = client.list_commits(project_id, since)
+        repo_path = collection_cfg.get("repo_path")
+        shallow = bool(collection_cfg.get("shallow_clone", True))
+        depth = int(collection_cfg.get("clone_depth", 50))
+        partial = bool(collection_cfg.get("partial_clone", False))
+        commit_source = collection_cfg.get("commit_source", "api")
+        clone_url = None
+
+        if commit_source == "local":
+            # Everything comes from the clone: no GitLab API requests at all
+            if not repo_path:
+                raise RuntimeError("commit_source: local requires collection.repo_path")
+            project = self._local_project(project_cfg, repo_path)
+            clone_url = self._clone_url(project_cfg, project)
+            if clone_url:
+                self._clone_repo(clone_url, repo_path, shallow, depth, shallow_since=since, partial=partial)
+            commits = self._local_commits(repo_path, since)
+        elif commit_source == "api":
+            client = self._gitlab_client()
+            project = client.get_project(project_id)
+            commits = client.list_commits(project_id, since)
+        else:
+            raise RuntimeError(f"Unknown collection.commit_source: {commit_source} (expected api or local)")
 
         daily_commits: Counter[str] = Counter()
         epic_commits: Counter[str] = Counter()
-        epic_rules = epics_cfg.get("rules", [])
+        epic_shas: Dict[str, List[str]] = {}
+        epic_matcher = EpicMatcher(epics_cfg.get("rules", []))
 
         for commit in commits:
             date = commit.get("created_at", "")[:10]
             if date:
                 daily_commits[date] += 1
-            message = commit.get("title", "") + " " + commit.get("message", "")
-            for rule in epic_rules:
-                key = rule.get("key")
-                pattern = rule.get("pattern")
-                if not key or not pattern:
-                    continue
-                if re_search(pattern, message):
-                    epic_commits[key] += 1
+            if epic_matcher:
+                message = commit.get("title", "") + " " + commit.get("message", "")
+                keys = epic_matcher.match(message)
+                epic_commits.update(keys)
+                if keys and commit.get("id"):
+                    epic_shas[commit["id"]] = keys
 
-        repo_path = collection_cfg.get("repo_path")
         include_paths = collection_cfg.get("include_paths", ["."])
         exclude_paths = collection_cfg.get("exclude_paths", [".git"])
         exclude_extensions = collection_cfg.get("exclude_extensions", [])
-        shallow = bool(collection_cfg.get("shallow_clone", True))
-        depth = int(collection_cfg.get("clone_depth", 50))
+        loc_cache_path = collection_cfg.get("loc_cache_path")
+        loc_workers = int(collection_cfg.get("loc_workers") or os.cpu_count() or 1)
+        file_source = collection_cfg.get("file_source", "walk")
 
         repo_metrics = None
         coverage = None
+        epic_loc: Dict[str, int] = {}
 
         if repo_path:
-            clone_url = project_cfg.get("repo_url") or project.get("http_url_to_repo")
-            token_env = project_cfg.get("token_env", "GITLAB_TOKEN")
-            token = os.getenv(token_env)
-            if token and clone_url and clone_url.startswith("http"):
-                parts = clone_url.split("//", 1)
-                clone_url = f"{parts[0]}//oauth2:{token}@{parts[1]}"
+            if commit_source != "local":
+                clone_url = self._clone_url(project_cfg, project)
+            scan = bool(clone_url) or commit_source == "local"
             if clone_url:
-                self._clone_repo(clone_url, repo_path, shallow, depth)
+                try:
+                    if commit_source != "local":
+                        self._clone_repo(clone_url, repo_path, shallow, depth, partial=partial)
+                    # Only clones managed here are reset; a user's own checkout is scanned as is
+                    self._checkout_repo(repo_path)
+                except RuntimeError as e:
+                    # Commit metrics are already in hand; only the file scan is lost
+                    print(f"⚠️  Skipping repo metrics: {e}")
+                    scan = False
+            if scan:
                 repo_metrics = calculate_repo_metrics(
-                    repo_path, include_paths, exclude_paths, exclude_extensions
+                    repo_path, include_paths, exclude_paths, exclude_extensions, loc_cache_path, loc_workers, file_source,
                 )
+                # A partial clone would have to download every changed blob for the diffs
+                if epic_shas and not partial:
+                    epic_loc = self._epic_loc(repo_path, since, epic_shas)
                 coverage_path = os.path.join(repo_path, "coverage", "lcov.info")
                 fallback_path = os.path.join(repo_path, "lcov.info")
                 coverage = parse_lcov(coverage_path) or parse_lcov(fallback_path)
@@ -96,16 +241,8 @@ class Collector:
             "snapshot_date": dt.date.today().isoformat(),
             "daily_commits": dict(daily_commits),
             "epic_commits": dict(epic_commits),
+            "epic_loc": epic_loc,
             "repo_metrics": repo_metrics,
             "coverage": coverage,
             "retention_days": int(retention_cfg.get("days", 365)),
         }
-
-
-def re_search(pattern: str, text: str) -> bool:
-    try:
-        import re
-
-        return re.search(pattern, text, re.IGNORECASE) is not None
-    except re.error:
-        return False
@@ -0,0 +1,101 @@
+"""Compact columnar store for per-commit rows (hash, date, author, week).
+
+Layout: a magic line, a JSON header line (row count, byte order, hash width,
+interned author/week tables), then fixed-width binary columns:
+
+    hashes   raw digest bytes, ``hash_bytes`` per row
+    epochs   int64 seconds since epoch (array 'q')
+    offsets  int16 UTC offset in minutes (array 'h')
+    authors  uint32 index into header "authors" (array 'I')
+    weeks    uint32 index into header "weeks" (array 'I')
+
+Dates round-trip exactly to git's ``%ai`` form.
+"""
+
+import json
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List
+
+from .utils import file_sha256
+
+MAGIC = b"RDMCOLS1\n"
+FORMAT = "rdm-commit-columns-v1"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S %z"
+
+
+def _codes(values: Iterable[str], table: Dict[str, int]) -> array:
+    codes = array("I")
+    for value in values:
+        if value not in table:
+            table[value] = len(table)
+        codes.append(table[value])
+    return codes
+
+
+def write_columns(path: Path, rows: List[Dict[str, Any]]) -> str:
+    """Write commit rows as columns; return the file's SHA-256."""
+    hash_bytes = len(rows[0]["hash"]) // 2 if rows else 20
+    epochs = array("q")
+    offsets = array("h")
+    for row in rows:
+        dt = datetime.fromisoformat(row["date"])
+        epochs.append(int(dt.timestamp()))
+        offsets.append(int(dt.utcoffset().total_seconds() // 60))
+
+    authors: Dict[str, int] = {}
+    weeks: Dict[str, int] = {}
+    author_codes = _codes((row["author"] for row in rows), authors)
+    week_codes = _codes((row["week"] for row in rows), weeks)
+
+    header = {
+        "format": FORMAT,
+        "count": len(rows),
+        "byteorder": sys.byteorder,
+        "hash_bytes": hash_bytes,
+        "authors": list(authors),
+        "weeks": list(weeks),
+    }
+
+    with open(path, "wb") as f:
+        f.write(MAGIC)
+        f.write(json.dumps(header).encode("utf-8") + b"\n")
+        f.write(b"".join(bytes.fromhex(row["hash"]) for row in rows))
+        for column in (epochs, offsets, author_codes, week_codes):
+            column.tofile(f)
+
+    return file_sha256(path)
+
+
+def read_columns(path: Path) -> List[Dict[str, Any]]:
+    """Read a columnar file back into commit row dicts."""
+    with open(path, "rb") as f:
+        if f.readline() != MAGIC:
+            raise ValueError(f"Not a commit columns file: {path}")
+        header = json.loads(f.readline())
+        count = header["count"]
+        hash_bytes = header["hash_bytes"]
+        raw_hashes = f.read(count * hash_bytes)
+
+        columns = []
+        for typecode in ("q", "h", "I", "I"):
+            column = array(typecode)
+            column.fromfile(f, count)
+            if header["byteorder"] != sys.byteorder:
+                column.byteswap()
+            columns.append(column)
+
+    epochs, offsets, author_codes, week_codes = columns
+    authors, weeks = header["authors"], header["weeks"]
+    rows = []
+    for i in range(count):
+        tz = timezone(timedelta(minutes=offsets[i]))
+        rows.append({
+            "hash": raw_hashes[i * hash_bytes:(i + 1) * hash_bytes].hex(),
+            "date": datetime.fromtimestamp(epochs[i], tz).strftime(DATE_FORMAT),
+            "author": authors[author_codes[i]],
+            "week": weeks[week_codes[i]],
+        })
+    return rows
@@ -1,10 +1,14 @@
 import yaml
 from typing import Any, Dict
 
+from .epics import EpicMatcher
+
 
 def load_config(path: str) -> Dict[str, Any]:
     with open(path, "r", encoding="utf-8") as f:
         data = yaml.safe_load(f) or {}
+    # Fail on invalid epic patterns now rather than silently mid-collect
+    EpicMatcher(get_config_value(data, "epics", "rules", default=[]))
     return data
 
 
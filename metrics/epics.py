@@ -0,0 +1,134 @@
+"""Epic rules compiled once into a combined matcher.
+
+Most rules are keyword alternations ("auth|login|oauth") or literal keys
+("PROJ-123"). Their keywords go into a single case-insensitive trie regex
+scanned once per text, which costs roughly the same for ten rules or a
+thousand. Rules using real regex syntax are compiled individually and only
+tried after a combined prefilter says one of them can match; those with
+groups or global inline flags are always tried, since joining would change
+them.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Set
+
+REGEX_CHARS = set("\\.^$*+?{}[]()|")
+# Inline global flags such as (?i) are only valid at the start of a pattern
+GLOBAL_FLAGS = re.compile(r"\(\?[aiLmsux]+\)")
+
+
+class EpicMatcher:
+    """Match texts against epic rules ({"key": ..., "pattern": ...}).
+
+    Rules without a key or pattern are skipped; invalid patterns raise
+    ValueError listing every offending rule. Matching is case-insensitive,
+    like re.search(pattern, text, re.IGNORECASE) per rule.
+    """
+
+    def __init__(self, rules: Optional[List[Dict[str, Any]]]):
+        self.keys: List[str] = []
+        regexes = []
+        literal_rules: Dict[str, Set[int]] = {}
+        errors = []
+        for rule in rules or []:
+            key, pattern = rule.get("key"), rule.get("pattern")
+            if not key or not pattern:
+                continue
+            try:
+                compiled = re.compile(pattern, re.IGNORECASE)
+            except re.error as e:
+                errors.append(f"{key}: {pattern!r} ({e})")
+                continue
+            index = len(self.keys)
+            self.keys.append(key)
+            words = _literal_alternatives(pattern)
+            if words is None:
+                regexes.append((index, compiled))
+            else:
+                for word in words:
+                    literal_rules.setdefault(word.lower(), set()).add(index)
+        if errors:
+            raise ValueError("Invalid epic patterns: " + "; ".join(errors))
+
+        # Patterns with groups (and so backreferences) or global flags change
+        # meaning or fail to compile once joined; they are searched one by one
+        self._prefiltered = [(index, p) for index, p in regexes if _joinable(p)]
+        self._standalone = [(index, p) for index, p in regexes if not _joinable(p)]
+        self._any_regex = (
+            re.compile("|".join(f"(?:{p.pattern})" for _, p in self._prefiltered), re.IGNORECASE)
+            if self._prefiltered else None
+        )
+        self._literal_rules = literal_rules
+        # The scan reports the longest keyword starting at each position; the
+        # shorter keywords it begins with match there as well.
+        self._literal_hits = {
+            word: frozenset().union(*(literal_rules[word[:end]] for end in range(1, len(word) + 1)
+                                       if word[:end] in literal_rules))
+            for word in literal_rules
+        }
+        self._scan = re.compile(f"(?=({_trie_pattern(literal_rules)}))", re.IGNORECASE) if literal_rules else None
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
+
+    def matching_rules(self, text: str) -> Set[int]:
+        """Indexes into self.keys of every rule matching text."""
+        hits: Set[int] = set()
+        if self._scan is not None:
+            for match in self._scan.finditer(text):
+                found = match.group(1)
+                word_hits = self._literal_hits.get(found.lower())
+                if word_hits is None:
+                    # IGNORECASE folds more than lower() does (e.g. "ſ" matches "s")
+                    word_hits = self._recheck_literals(found)
+                hits.update(word_hits)
+        if self._any_regex is not None and self._any_regex.search(text):
+            hits.update(index for index, pattern in self._prefiltered if pattern.search(text))
+        hits.update(index for index, pattern in self._standalone if pattern.search(text))
+        return hits
+
+    def _recheck_literals(self, found: str) -> Set[int]:
+        """Rules with a keyword matching at the start of found, tried one by one."""
+        return set().union(*(
+            rules for word, rules in self._literal_rules.items()
+            if re.match(re.escape(word), found, re.IGNORECASE)
+        ))
+
+    def match(self, text: str) -> List[str]:
+        """Keys of the rules matching text, in rule order (once per matching rule)."""
+        return [self.keys[index] for index in sorted(self.matching_rules(text))]
+
+
+def _literal_alternatives(pattern: str) -> Optional[List[str]]:
+    """Split "a|b|c" into its keywords, or None if the pattern needs the regex engine."""
+    words = pattern.split("|")
+    if any(not word or REGEX_CHARS.intersection(word) for word in words):
+        return None
+    return words
+
+
+def _joinable(pattern: "re.Pattern[str]") -> bool:
+    """Whether a compiled rule keeps its meaning inside a combined alternation."""
+    return pattern.groups == 0 and not GLOBAL_FLAGS.search(pattern.pattern)
+
+
+def _trie_pattern(words) -> str:
+    """A regex matching any of words, longest first, shaped as a prefix trie."""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # Greedy: prefer the longer keyword, fall back to the one ending here
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
@@ -1,19 +1,28 @@
 import json
+import os
 import sqlite3
-from typing import Dict, Any
+from contextlib import closing
+from itertools import groupby
+from operator import itemgetter
+from typing import Dict, Any, Iterator
 
 from .utils import ensure_dir
 
 
-def export_json(db_path: str, output_dir: str):
+def export_json(db_path: str, output_dir: str, history_deltas: bool = False):
     ensure_dir(output_dir)
     latest = build_latest(db_path)
-    history = build_history(db_path)
 
     with open(f"{output_dir}/latest.json", "w", encoding="utf-8") as f:
         json.dump(latest, f, indent=2)
-    with open(f"{output_dir}/history.json", "w", encoding="utf-8") as f:
-        json.dump(history, f, indent=2)
+    write_history(db_path, f"{output_dir}/history.json")
+    # The delta form goes to its own file: only the ui/ dashboard expands it,
+    # other history.json readers expect full daily_commits maps
+    delta_path = f"{output_dir}/history.delta.json"
+    if history_deltas:
+        write_history(db_path, delta_path, deltas=True)
+    elif os.path.exists(delta_path):
+        os.remove(delta_path)
 
 
 def build_latest(db_path: str) -> Dict[str, Any]:
@@ -29,7 +38,7 @@ def build_latest(db_path: str) -> Dict[str, Any]:
         web_url = "https://gitlab.com/vic.ionascu/trailwaze"
 
         loc = conn.execute(
-            "SELECT total FROM loc_totals WHERE snapshot_id = ?",
+            "SELECT total, code, comment, blank FROM loc_totals WHERE snapshot_id = ?",
             (snapshot_id,),
         ).fetchone()
         tests = conn.execute(
@@ -38,12 +47,12 @@ def build_latest(db_path: str) -> Dict[str, Any]:
         ).fetchone()
 
         file_types = conn.execute(
-            "SELECT extension, files FROM file_types WHERE snapshot_id = ? ORDER BY files DESC LIMIT 12",
+            "SELECT extension, files, loc FROM file_types WHERE snapshot_id = ? ORDER BY files DESC LIMIT 12",
             (snapshot_id,),
         ).fetchall()
 
         epics = conn.execute(
-            "SELECT epic_key, commits FROM epic_stats WHERE snapshot_id = ? ORDER BY commits DESC",
+            "SELECT epic_key, commits, loc FROM epic_stats WHERE snapshot_id = ? ORDER BY commits DESC",
             (snapshot_id,),
         ).fetchall()
 
@@ -78,9 +87,10 @@ def build_latest(db_path: str) -> Dict[str, Any]:
             },
             "snapshot_date": snapshot_date,
             "loc_total": loc[0] if loc else None,
+            "loc_breakdown": {"code": loc[1], "comment": loc[2], "blank": loc[3]} if loc else None,
             "test_files": tests[0] if tests else None,
-            "file_types": [{"extension": ext, "files": files} for ext, files in file_types],
-            "epics": [{"key": key, "commits": commits} for key, commits in epics],
+            "file_types": [{"extension": ext, "files": files, "loc": ext_loc} for ext, files, ext_loc in file_types],
+            "epics": [{"key": key, "commits": commits, "loc": epic_loc} for key, commits, epic_loc in epics],
             "epic_commits": epic_commits_dict,
             "source_files": [
                 {"path": path, "loc": loc, "extension": ext}
@@ -96,7 +106,7 @@ def build_latest(db_path: str) -> Dict[str, Any]:
             "repo_metrics": {
                 "lines_of_code": loc[0] if loc else None,
                 "test_files": tests[0] if tests else None,
-                "file_types": [{"extension": ext, "files": files} for ext, files in file_types],
+                "file_types": [{"extension": ext, "files": files, "loc": ext_loc} for ext, files, ext_loc in file_types],
                 "source_files": [
                     {"path": path, "loc": loc, "extension": ext}
                     for path, loc, ext in source_files
@@ -105,45 +115,74 @@ def build_latest(db_path: str) -> Dict[str, Any]:
         }
 
 
-def build_history(db_path: str) -> Dict[str, Any]:
-    with sqlite3.connect(db_path) as conn:
-        snapshots = conn.execute(
-            "SELECT id, snapshot_date FROM snapshots ORDER BY snapshot_date ASC"
-        ).fetchall()
-
-        history_snapshots = []
-        for snapshot_id, snapshot_date in snapshots:
-            commit_sum = conn.execute(
-                "SELECT SUM(count) FROM commit_counts WHERE snapshot_id = ?",
-                (snapshot_id,),
-            ).fetchone()[0]
-
-            loc = conn.execute(
-                "SELECT total FROM loc_totals WHERE snapshot_id = ?",
-                (snapshot_id,),
-            ).fetchone()
-
-            tests = conn.execute(
-                "SELECT count FROM test_totals WHERE snapshot_id = ?",
-                (snapshot_id,),
-            ).fetchone()
-
-            daily_commits_rows = conn.execute(
-                "SELECT date, count FROM commit_counts WHERE snapshot_id = ? ORDER BY date",
-                (snapshot_id,),
-            ).fetchall()
-
-            daily_commits_dict = {date: count for date, count in daily_commits_rows}
-
-            history_snapshots.append({
-                "snapshot_date": snapshot_date,
-                "daily_commits": daily_commits_dict,
-                "repo_metrics": {
-                    "lines_of_code": loc[0] if loc and loc[0] is not None else 0,
-                    "test_files": tests[0] if tests and tests[0] is not None else 0,
-                },
-            })
-
-        return {
-            "snapshots": history_snapshots
+HISTORY_SNAPSHOTS_SQL = """
+SELECT s.id, s.snapshot_date, l.total, t.count
+FROM snapshots s
+LEFT JOIN loc_totals l ON l.snapshot_id = s.id
+LEFT JOIN test_totals t ON t.snapshot_id = s.id
+ORDER BY s.snapshot_date
+"""
+
+HISTORY_COMMITS_SQL = """
+SELECT c.snapshot_id, c.date, c.count
+FROM commit_counts c
+JOIN snapshots s ON s.id = c.snapshot_id
+ORDER BY s.snapshot_date, c.date
+"""
+
+
+def iter_history(conn: sqlite3.Connection, deltas: bool = False) -> Iterator[Dict[str, Any]]:
+    """Yield history snapshots in date order from two set-based queries.
+
+    With deltas, each snapshot carries only the daily commit counts that are
+    new or changed since the previous snapshot, plus the dates that dropped
+    out, instead of the full daily_commits map.
+    """
+    commit_rows = groupby(conn.execute(HISTORY_COMMITS_SQL), key=itemgetter(0))
+    pending = next(commit_rows, None)
+    previous: Dict[str, int] = {}
+
+    # Both queries are ordered by snapshot_date, so they can be merged in step
+    for snapshot_id, snapshot_date, loc, tests in conn.execute(HISTORY_SNAPSHOTS_SQL):
+        daily_commits_dict: Dict[str, int] = {}
+        if pending is not None and pending[0] == snapshot_id:
+            daily_commits_dict = {date: count for _, date, count in pending[1]}
+            pending = next(commit_rows, None)
+
+        snapshot = {
+            "snapshot_date": snapshot_date,
+            "daily_commits": daily_commits_dict,
+            "repo_metrics": {
+                "lines_of_code": loc if loc is not None else 0,
+                "test_files": tests if tests is not None else 0,
+            },
         }
+        if deltas:
+            del snapshot["daily_commits"]
+            snapshot["daily_commits_delta"] = {
+                date: count for date, count in daily_commits_dict.items()
+                if previous.get(date) != count
+            }
+            snapshot["daily_commits_removed"] = sorted(previous.keys() - daily_commits_dict.keys())
+            previous = daily_commits_dict
+        yield snapshot
+
+
+def build_history(db_path: str, deltas: bool = False) -> Dict[str, Any]:
+    with closing(sqlite3.connect(db_path)) as conn:
+        history: Dict[str, Any] = {"encoding": "delta"} if deltas else {}
+        history["snapshots"] = list(iter_history(conn, deltas))
+        return history
+
+
+def write_history(db_path: str, path: str, deltas: bool = False):
+    """Stream history.json snapshot by snapshot instead of building it in memory."""
+    with closing(sqlite3.connect(db_path)) as conn, open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        if deltas:
+            f.write('  "encoding": "delta",\n')
+        f.write('  "snapshots": [')
+        for i, snapshot in enumerate(iter_history(conn, deltas)):
+            f.write(",\n    " if i else "\n    ")
+            f.write(json.dumps(snapshot))
+        f.write("\n  ]\n}\n")
@@ -0,0 +1,312 @@
+"""Single-pass git history reader shared by the git-based collectors.
+
+One ``git log --raw --numstat`` walk per repo is parsed into a commit table
+(one lean row per commit) plus per-ISO-week diff aggregates. Commit counts,
+diff stats, churn and the message-based metrics are all computed from it.
+
+The table can be persisted with the HEAD it was built from as a watermark,
+so later runs over the same range start only parse ``<watermark>..HEAD``.
+"""
+
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional
+
+RECORD_SEP = "\x1e"
+FIELD_SEP = "\x1f"
+LOG_FORMAT = "%x1e%H%x1f%ai%x1f%an%x1f%B%x1f"
+# Same fields with the committer date, which is what GitLab reports as created_at
+COMMITTER_LOG_FORMAT = LOG_FORMAT.replace("%ai", "%ci")
+
+# Statuses counted as churn (same as --diff-filter=ACMR)
+CHURN_STATUSES = frozenset("ACMR")
+
+STATE_VERSION = 1
+
+
+class Commit(NamedTuple):
+    sha: str
+    date: str
+    author: str
+    message: str
+    week: Optional[str]
+
+
+def week_key(date_str: str) -> Optional[str]:
+    """Return the ISO week key (e.g. 2026-W05) for a git date, or None if unparseable."""
+    try:
+        iso_year, iso_week, _ = datetime.fromisoformat(date_str).isocalendar()
+    except ValueError:
+        return None
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def _empty_week() -> Dict[str, Any]:
+    return {"loc_added": 0, "loc_deleted": 0, "files_changed": 0, "churn": Counter()}
+
+
+class GitHistory:
+    """Commit table plus per-week diff aggregates for one repo and range."""
+
+    def __init__(self, commits: Optional[List[Commit]] = None,
+                 weeks: Optional[Dict[str, Dict[str, Any]]] = None,
+                 command: str = ""):
+        self.commits = commits if commits is not None else []
+        self.weeks = weeks if weeks is not None else {}
+        self.command = command
+
+    def _week(self, key: Optional[str]) -> Dict[str, Any]:
+        key = key or ""
+        if key not in self.weeks:
+            self.weeks[key] = _empty_week()
+        return self.weeks[key]
+
+    def total(self, field: str) -> int:
+        return sum(week[field] for week in self.weeks.values())
+
+    def churn(self) -> Counter:
+        """File change counts (added/copied/modified/renamed) across all weeks."""
+        total: Counter = Counter()
+        for week in self.weeks.values():
+            total.update(week["churn"])
+        return total
+
+    def extend(self, older: "GitHistory") -> None:
+        """Append an older history (e.g. loaded from state) after this one."""
+        self.commits.extend(older.commits)
+        for key, stats in older.weeks.items():
+            week = self._week(key)
+            for field in ("loc_added", "loc_deleted", "files_changed"):
+                week[field] += stats[field]
+            week["churn"].update(stats["churn"])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "commits": [list(c) for c in self.commits],
+            "weeks": {key: dict(week, churn=dict(week["churn"])) for key, week in self.weeks.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any], command: str = "") -> "GitHistory":
+        weeks = {key: dict(week, churn=Counter(week["churn"])) for key, week in data["weeks"].items()}
+        return cls([Commit(*row) for row in data["commits"]], weeks, command)
+
+    def grep(self, *patterns: str) -> List[Commit]:
+        """Commits whose message matches every pattern, like ``git log --grep ... --all-match``."""
+        compiled = [re.compile(p) for p in patterns]
+        return [c for c in self.commits if all(p.search(c.message) for p in compiled)]
+
+
+def parse_log(lines: Iterable[str], command: str = "") -> GitHistory:
+    """Parse ``git log --format=LOG_FORMAT --raw --numstat`` output lines."""
+    history = GitHistory(command=command)
+    header: Optional[List[str]] = None
+    week: Optional[Dict[str, Any]] = None
+
+    for line in lines:
+        line = line.rstrip("\n")
+        if header is not None:
+            # Still inside the (possibly multi-line) commit header
+            header.append(line)
+            if line.endswith(FIELD_SEP):
+                week = _add_commit(history, "\n".join(header))
+                header = None
+            continue
+
+        if line.startswith(RECORD_SEP):
+            header = [line[1:]]
+            if line.endswith(FIELD_SEP) and line.count(FIELD_SEP) >= 4:
+                week = _add_commit(history, header[0])
+                header = None
+        elif not line or week is None:
+            continue
+        elif line.startswith(":"):
+            # --raw: ":<mode> <mode> <sha> <sha> <status>\t<path>[\t<new path>]"
+            meta, _, paths = line.partition("\t")
+            if meta.rsplit(" ", 1)[-1][:1] in CHURN_STATUSES:
+                week["churn"][paths.rsplit("\t", 1)[-1]] += 1
+        else:
+            # --numstat: "<added>\t<deleted>\t<path>" ("-" for binary files)
+            parts = line.split("\t", 2)
+            if len(parts) != 3:
+                continue
+            week["files_changed"] += 1
+            if parts[0].isdigit():
+                week["loc_added"] += int(parts[0])
+            if parts[1].isdigit():
+                week["loc_deleted"] += int(parts[1])
+
+    return history
+
+
+def _add_commit(history: GitHistory, header: str) -> Dict[str, Any]:
+    sha, date, author, message = header.split(FIELD_SEP)[:4]
+    week = week_key(date)
+    # Authors and week keys repeat across commits; share one string each
+    commit = Commit(sha, date, sys.intern(author), message.strip(), week and sys.intern(week))
+    history.commits.append(commit)
+    return history._week(commit.week)
+
+
+def log_command(since: str, until: str, rev_range: Optional[str] = None, stats: bool = True,
+                committer_dates: bool = False) -> List[str]:
+    cmd = [
+        "git", "log",
+        f"--since={since}",
+        f"--until={until}",
+        f"--format={COMMITTER_LOG_FORMAT if committer_dates else LOG_FORMAT}",
+    ]
+    if stats:
+        cmd.extend(["--raw", "--numstat"])
+    if rev_range:
+        cmd.append(rev_range)
+    return cmd
+
+
+def read_history(repo_path, since: str, until: str, rev_range: Optional[str] = None,
+                 stats: bool = True, committer_dates: bool = False) -> GitHistory:
+    """Walk the history of ``repo_path`` once for the given range.
+
+    Output is parsed line by line straight off the pipe, so the raw log is
+    never held in memory; only the commit table and weekly aggregates are.
+    With stats=False no diffs are computed and only the commit table is
+    filled, which is much cheaper when only messages and dates are needed.
+    With committer_dates, commits carry the committer date instead of the
+    author date.
+    """
+    cmd = log_command(since, until, rev_range, stats, committer_dates)
+    with tempfile.TemporaryFile() as stderr:
+        proc = subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE, stderr=stderr)
+        try:
+            # newline="\n": split on LF only (\r and the \x1e separator are data)
+            lines = io.TextIOWrapper(proc.stdout, encoding="utf-8", errors="replace", newline="\n")
+            history = parse_log(lines, command=" ".join(cmd))
+        finally:
+            proc.stdout.close()
+            returncode = proc.wait()
+        if returncode != 0:
+            stderr.seek(0)
+            raise RuntimeError(f"git log failed: {stderr.read().decode('utf-8', 'replace')}")
+    return history
+
+
+def read_lines_added(repo_path, since: str, until: str) -> Dict[str, int]:
+    """Lines added per commit SHA, from one ``git log --numstat`` walk.
+
+    Shallow boundary commits are left out: with their parents missing git
+    diffs them against the empty tree, as if they added every file.
+    """
+    shallow_file = _git(repo_path, "rev-parse", "--git-path", "shallow").stdout.strip()
+    shallow_path = Path(repo_path, shallow_file)
+    boundary = set(shallow_path.read_text().split()) if shallow_path.is_file() else set()
+
+    cmd = ["git", "log", f"--since={since}", f"--until={until}", f"--format={RECORD_SEP}%H", "--numstat"]
+    added: Dict[str, int] = {}
+    sha = None
+    with subprocess.Popen(cmd, cwd=repo_path, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                          text=True, encoding="utf-8", errors="replace") as proc:
+        for line in proc.stdout:
+            if line.startswith(RECORD_SEP):
+                sha = line[1:].strip()
+                if sha not in boundary:
+                    added[sha] = 0
+            elif sha in added:
+                # "<added>\t<deleted>\t<path>" ("-" for binary files)
+                parts = line.split("\t", 2)
+                if len(parts) == 3 and parts[0].isdigit():
+                    added[sha] += int(parts[0])
+    if proc.returncode != 0:
+        raise RuntimeError(f"{' '.join(cmd)} failed in {repo_path}")
+    return added
+
+
+def _git(repo_path, *args: str) -> subprocess.CompletedProcess:
+    return subprocess.run(["git", *args], cwd=repo_path, capture_output=True, text=True)
+
+
+def _load_state(state_file: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(state_file, "r", encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+
+def _save_state(state_file: Path, history: GitHistory, head: str, since: str, until: str, built_at: str) -> None:
+    state_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = state_file.with_suffix(".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump({
+            "version": STATE_VERSION,
+            "head": head,
+            "since": since,
+            "until": until,
+            "built_at": built_at,
+            **history.to_dict(),
+        }, f)
+    os.replace(tmp_file, state_file)
+
+
+def _state_covers(state: Dict[str, Any], since: str, until: str) -> bool:
+    """A watermark is reusable only for the same range and the same effective end.
+
+    The stored table holds the commits reachable from the watermark that fell
+    before the saved end. A later end would add older commits the table left
+    out, unless the saved end was already past the time the state was built.
+    """
+    if state.get("since") != since:
+        return False
+    if state.get("until") == until:
+        return True
+    try:
+        saved_until = datetime.fromisoformat(state["until"])
+        return datetime.fromisoformat(state["built_at"]) <= saved_until <= datetime.fromisoformat(until)
+    except (KeyError, TypeError, ValueError):
+        return False
+
+
+def read_history_incremental(repo_path, since: str, until: str, state_file: Path,
+                             save_state: bool = True) -> GitHistory:
+    """Like read_history, but only parse commits added since the stored watermark.
+
+    Falls back to a full walk when there is no usable state, the range
+    changed (see _state_covers), or the watermark is no longer an ancestor of
+    HEAD (rewritten history). The merged table is saved back with HEAD as the
+    new watermark unless save_state is False.
+    """
+    built_at = datetime.now(timezone.utc).isoformat()
+    head_result = _git(repo_path, "rev-parse", "HEAD")
+    if head_result.returncode != 0:
+        return read_history(repo_path, since, until)
+    head = head_result.stdout.strip()
+
+    state = _load_state(state_file)
+    if state and not _state_covers(state, since, until):
+        state = None
+    watermark = state["head"] if state else None
+
+    if watermark == head:
+        history = GitHistory.from_dict(
+            state, command=f"git rev-parse HEAD (unchanged since watermark in {state_file.name})"
+        )
+    elif watermark and _git(repo_path, "merge-base", "--is-ancestor", watermark, head).returncode == 0:
+        history = read_history(repo_path, since, until, rev_range=f"{watermark}..{head}")
+        history.command += f" (merged with {state_file.name})"
+        history.extend(GitHistory.from_dict(state))
+    else:
+        history = read_history(repo_path, since, until)
+
+    if save_state:
+        _save_state(state_file, history, head, since, until, built_at)
+    return history
@@ -1,49 +1,112 @@
 """GitHub API client for collecting deployment and PR metrics."""
 
 import os
-import time
+import re
 import json
 import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, timedelta
-from typing import Dict, List, Any, Optional
+from typing import Dict, List, Any, Optional, Sequence, Tuple, Callable
+from urllib.parse import parse_qs, urlparse
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from .http_cache import DEFAULT_MAX_BYTES, ResponseCache
+from .rate_limit import RateLimiter
+
+# Per-endpoint cache TTLs in hours, first matching rule wins; anything else
+# uses cache_ttl_hours. Override with GITHUB_CACHE_TTLS="pulls=2,releases=12".
+CACHE_TTL_RULES = (
+    ("commit", re.compile(r"/commits/[0-9a-f]{7,40}$")),  # immutable
+    ("search", re.compile(r"^/search/")),
+    ("pulls", re.compile(r"/pulls$")),
+    ("releases", re.compile(r"/releases$")),
+    ("deployments", re.compile(r"/deployments(/\d+/statuses)?$")),
+)
+DEFAULT_CACHE_TTLS = {"commit": 24 * 30, "search": 0.25, "pulls": 1, "releases": 6, "deployments": 1}
+
+# Extra attempts after a 403/429 rate-limit rejection (the limiter sets the wait)
+RATE_LIMIT_RETRIES = 2
+
+# GraphQL batch mode: repos aliased into one query, and the connections fetched
+# per repo as name -> (field, arguments, node fields, newest-first cutoff field)
+GRAPHQL_REPO_BATCH = 10
+GRAPHQL_PAGE_SIZE = 100
+GRAPHQL_CONNECTIONS = {
+    "pull_requests": (
+        "pullRequests", "states: MERGED, orderBy: {field: UPDATED_AT, direction: DESC}",
+        "number createdAt mergedAt updatedAt", "updated_at",
+    ),
+    "releases": (
+        "releases", "orderBy: {field: CREATED_AT, direction: DESC}",
+        "tagName createdAt publishedAt", "published_at",
+    ),
+    "deployments": (
+        "deployments", "orderBy: {field: CREATED_AT, direction: DESC}",
+        "createdAt environment state", "created_at",
+    ),
+}
+# Connections get_delivery_data fetches unless asked for others (DORA uses these)
+DEFAULT_DELIVERY_CONNECTIONS = ("pull_requests", "releases")
+# GraphQL has its own budget, counted in query points rather than requests
+GRAPHQL_POINTS_PER_HOUR = 5000
+
 
 class GitHubClient:
     """GitHub API client with rate limiting, caching, and graceful degradation."""
 
-    def __init__(self, token: Optional[str] = None, base_url: str = "https://api.github.com"):
+    def __init__(self, token: Optional[str] = None, base_url: str = "https://api.github.com",
+                 max_concurrency: Optional[int] = None, rate_limiter: Optional[RateLimiter] = None):
         """Initialize GitHub API client.
 
         Args:
             token: GitHub personal access token (falls back to GITHUB_TOKEN env var)
             base_url: GitHub API base URL
+            max_concurrency: Pages fetched in parallel once the last page is known
+                (falls back to GITHUB_MAX_CONCURRENCY env var, default 4; 1 = sequential)
+            rate_limiter: Limiter to share with other clients (defaults to a new one
+                sized by GITHUB_MAX_REQUESTS_PER_HOUR)
         """
         self.token = token or os.getenv("GITHUB_TOKEN")
         self.base_url = base_url.rstrip("/")
+        # api.github.com/graphql, or <host>/api/graphql for Enterprise's <host>/api/v3
+        self.graphql_url = self.base_url[:-3] + "graphql" if self.base_url.endswith("/v3") else f"{self.base_url}/graphql"
 
-        # Setup caching
+        # Setup caching: one compressed, size-bounded SQLite file
         self.cache_dir = Path(".cache/github")
-        self.cache_dir.mkdir(exist_ok=True, parents=True)
         self.cache_enabled = os.getenv("GITHUB_ENABLE_CACHING", "true").lower() == "true"
         self.cache_ttl_hours = 1  # Default 1 hour TTL
-
-        # Rate limiting
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **_parse_ttls(os.getenv("GITHUB_CACHE_TTLS", ""))}
+        self.cache: Optional[ResponseCache] = None
+        if self.cache_enabled:
+            max_mb = os.getenv("GITHUB_CACHE_MAX_MB")
+            self.cache = ResponseCache(
+                str(self.cache_dir / "responses.db"),
+                int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES,
+            )
+
+        # Rate limiting: token bucket synced from X-RateLimit-* / Retry-After
         self.max_requests_per_hour = int(os.getenv("GITHUB_MAX_REQUESTS_PER_HOUR", "4500"))
-        self.request_times = []
+        self.rate_limiter = rate_limiter or RateLimiter(self.max_requests_per_hour)
+        self.graphql_rate_limiter = RateLimiter(GRAPHQL_POINTS_PER_HOUR)
+
+        # Concurrent pagination
+        self.max_concurrency = max(1, max_concurrency or int(os.getenv("GITHUB_MAX_CONCURRENCY", "4")))
 
         # Session setup with retry strategy
         self.session = requests.Session()
+        # 429s are left to the rate limiter, which honours Retry-After
         retry_strategy = Retry(
             total=3,
             backoff_factor=1,
-            status_forcelist=[429, 500, 502, 503, 504],
-            allowed_methods=["GET", "POST"]
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=["GET", "POST"],
+            respect_retry_after_header=False
         )
-        adapter = HTTPAdapter(max_retries=retry_strategy)
+        # One pooled connection per concurrent page fetch
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=max(10, self.max_concurrency))
         self.session.mount("http://", adapter)
         self.session.mount("https://", adapter)
 
@@ -60,104 +123,163 @@ class GitHubClient:
         key = f"{endpoint}_{json.dumps(params, sort_keys=True)}"
         return hashlib.sha256(key.encode()).hexdigest()
 
-    def _get_cached(self, cache_key: str, max_age_hours: int = 1) -> Optional[Any]:
-        """Retrieve cached response if available and not expired."""
-        if not self.cache_enabled:
-            return None
+    def _ttl_seconds(self, endpoint: str) -> float:
+        """Freshness lifetime for an endpoint's cached responses."""
+        for name, pattern in CACHE_TTL_RULES:
+            if pattern.search(endpoint):
+                return self.cache_ttls[name] * 3600
+        return self.cache_ttl_hours * 3600
 
-        cache_file = self.cache_dir / f"{cache_key}.json"
-        if not cache_file.exists():
+    def _read_cache(self, cache_key: str, max_age_seconds: float = 0) -> Optional[Tuple[Any, Dict[str, str], float]]:
+        """Return (data, validators, age in seconds) for a cache entry, expired or not."""
+        if self.cache is None:
             return None
-
-        age_seconds = time.time() - cache_file.stat().st_mtime
-        if age_seconds > max_age_hours * 3600:
-            return None  # Cache expired
-
         try:
-            with open(cache_file) as f:
-                return json.load(f)
+            return self.cache.get(cache_key, max_age_seconds)
         except Exception as e:
             print(f"⚠️  Error reading cache: {e}")
             return None
 
-    def _save_cache(self, cache_key: str, data: Any) -> None:
-        """Save data to cache."""
-        if not self.cache_enabled:
+    def _save_cache(self, cache_key: str, endpoint: str, data: Any,
+                    validators: Optional[Dict[str, str]] = None) -> None:
+        """Save data to cache, with the ETag/Last-Modified validators it was served with."""
+        if self.cache is None:
             return
-
         try:
-            cache_file = self.cache_dir / f"{cache_key}.json"
-            with open(cache_file, 'w') as f:
-                json.dump(data, f)
+            self.cache.put(cache_key, endpoint, data, validators)
         except Exception as e:
             print(f"⚠️  Error saving cache: {e}")
 
+    def _refresh_cache(self, cache_key: str) -> None:
+        """Restart an entry's TTL after the server confirmed it unchanged (304)."""
+        if self.cache is None:
+            return
+        try:
+            self.cache.touch(cache_key)
+        except Exception as e:
+            print(f"⚠️  Error refreshing cache: {e}")
+
     def _check_rate_limit(self) -> None:
-        """Check and enforce rate limiting."""
-        now = time.time()
-        # Remove requests older than 1 hour
-        self.request_times = [t for t in self.request_times if now - t < 3600]
-
-        if len(self.request_times) >= self.max_requests_per_hour:
-            # Calculate sleep time
-            oldest_request = self.request_times[0]
-            sleep_time = 3600 - (now - oldest_request)
-            if sleep_time > 0:
-                print(f"⚠️  Rate limit approaching ({len(self.request_times)}/{self.max_requests_per_hour}). Sleeping {sleep_time:.1f}s")
-                time.sleep(sleep_time)
-                self.request_times = []
-
-        self.request_times.append(now)
+        """Wait for a rate-limit token (shared by concurrent page fetches)."""
+        self.rate_limiter.acquire()
 
     def _get(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """Make GET request to GitHub API with caching."""
+        return self._get_with_headers(endpoint, params)[0]
+
+    def _get_with_headers(self, endpoint: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, str]]:
+        """Like _get, but also return the response headers (empty when served from cache)."""
         params = params or {}
 
         # Try cache first
         cache_key = self._get_cache_key(endpoint, params)
-        cached = self._get_cached(cache_key, max_age_hours=self.cache_ttl_hours)
-        if cached is not None:
-            return cached
+        ttl = self._ttl_seconds(endpoint)
+        cached = self._read_cache(cache_key, ttl)
+        if cached is not None and cached[2] <= ttl:
+            return cached[0], {}
 
-        # Check rate limit
-        self._check_rate_limit()
+        # Expired entries are revalidated instead of re-downloaded
+        headers = {}
+        if cached is not None:
+            validators = cached[1]
+            if validators.get("etag"):
+                headers["If-None-Match"] = validators["etag"]
+            if validators.get("last_modified"):
+                headers["If-Modified-Since"] = validators["last_modified"]
 
         # Make request
         url = f"{self.base_url}{endpoint}"
         try:
-            resp = self.session.get(url, params=params, timeout=30)
+            for attempt in range(RATE_LIMIT_RETRIES + 1):
+                self._check_rate_limit()
+                resp = self.session.get(url, params=params, headers=headers, timeout=30)
+                self.rate_limiter.update(resp.headers, resp.status_code)
+                if attempt == RATE_LIMIT_RETRIES or not self.rate_limiter.is_limited(resp.headers, resp.status_code):
+                    break
+
+            if resp.status_code == 304 and cached is not None:
+                # Unchanged: GitHub does not count 304s against the rate limit
+                self.rate_limiter.refund()
+                self._refresh_cache(cache_key)
+                return cached[0], resp.headers
+
             resp.raise_for_status()
             data = resp.json()
 
             # Cache successful response
-            self._save_cache(cache_key, data)
-            return data
+            self._save_cache(cache_key, endpoint, data, {
+                "etag": resp.headers.get("ETag"),
+                "last_modified": resp.headers.get("Last-Modified"),
+            })
+            return data, resp.headers
 
         except requests.exceptions.RequestException as e:
             print(f"❌ GitHub API error: {e}")
             # Return empty list/dict on error
-            return {} if "list" not in endpoint else []
-
-    def _paginate(self, endpoint: str, params: Optional[Dict[str, Any]] = None, per_page: int = 100) -> List[Dict[str, Any]]:
-        """Paginate through GitHub API results."""
-        params = params or {}
-        results = []
-        page = 1
+            return ({} if "list" not in endpoint else []), {}
+
+    @staticmethod
+    def _last_page(headers: Dict[str, str]) -> Optional[int]:
+        """Page number of the rel="last" entry in a Link header, if any."""
+        for link in requests.utils.parse_header_links(headers.get("Link", "")):
+            if link.get("rel") == "last":
+                page = parse_qs(urlparse(link.get("url", "")).query).get("page")
+                if page and page[0].isdigit():
+                    return int(page[0])
+        return None
+
+    def _fetch_pages(self, endpoint: str, params: Dict[str, Any], pages: range) -> List[Any]:
+        """Fetch the given pages concurrently (up to max_concurrency), in page order."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            return list(executor.map(lambda page: self._get(endpoint, dict(params, page=page)), pages))
+
+    def _paginate(self, endpoint: str, params: Optional[Dict[str, Any]] = None, per_page: int = 100,
+                  stop: Optional[Callable[[List[Dict[str, Any]]], bool]] = None) -> List[Dict[str, Any]]:
+        """Paginate through GitHub API results.
+
+        Page 1's Link header gives the last page; the rest are then fetched
+        concurrently (up to max_concurrency) and returned in page order. When
+        the page count is unknown (e.g. page 1 came from cache), pages are
+        walked one at a time until a short page.
 
+        Args:
+            stop: Optional cutoff check for newest-first listings; pagination
+                ends after the first page for which stop(page) is true. With
+                concurrency, pages are fetched in waves of max_concurrency so
+                at most one wave overshoots the cutoff.
+        """
+        params = dict(params or {}, per_page=per_page)
+        batch, headers = self._get_with_headers(endpoint, dict(params, page=1))
+
+        if not isinstance(batch, list):
+            # Single object returned, not paginated
+            return [batch] if batch else []
+
+        results = list(batch)
+        if len(batch) < per_page or (stop and stop(batch)):
+            return results
+
+        last_page = self._last_page(headers)
+        if last_page and self.max_concurrency > 1:
+            wave = last_page if stop is None else self.max_concurrency
+            for first in range(2, last_page + 1, wave):
+                for batch in self._fetch_pages(endpoint, params, range(first, min(first + wave, last_page + 1))):
+                    if not isinstance(batch, list):
+                        continue
+                    results.extend(batch)
+                    if stop and stop(batch):
+                        return results
+            return results
+
+        page = 2
         while True:
-            params.update({"per_page": per_page, "page": page})
-            batch = self._get(endpoint, params)
-
-            if not isinstance(batch, list):
-                # Single object returned, not paginated
-                return [batch] if batch else []
-
-            if not batch:
+            batch = self._get(endpoint, dict(params, page=page))
+            if not isinstance(batch, list) or not batch:
                 break
 
             results.extend(batch)
 
-            if len(batch) < per_page:
+            if len(batch) < per_page or (stop and stop(batch)):
                 break
 
             page += 1
@@ -176,14 +298,13 @@ class GitHubClient:
             List of release dictionaries
         """
         endpoint = f"/repos/{owner}/{repo}/releases"
-        releases = self._paginate(endpoint, params={"per_page": 100})
+        # Releases are listed newest first: stop once a page reaches past `since`
+        releases = self._paginate(endpoint, params={"per_page": 100},
+                                  stop=_older_than(since, "published_at") if since else None)
 
         # Filter by date if provided
         if since:
-            releases = [
-                r for r in releases
-                if r.get("published_at") and datetime.fromisoformat(r["published_at"].replace("Z", "+00:00")) >= since
-            ]
+            releases = _at_or_after(releases, "published_at", since)
 
         return releases
 
@@ -201,26 +322,97 @@ class GitHubClient:
             List of PR dictionaries with merged_at and created_at
         """
         endpoint = f"/repos/{owner}/{repo}/pulls"
+        # A PR merged after `since` was also updated after it, so the
+        # updated-desc listing can stop at the first page reaching past it
         prs = self._paginate(endpoint, params={
             "state": state,
             "sort": "updated",
             "direction": "desc",
             "per_page": 100
-        })
+        }, stop=_older_than(since, "updated_at") if since else None)
 
         # Filter only merged PRs and by date if provided
-        merged_prs = []
-        for pr in prs:
-            if not pr.get("merged_at"):
-                continue
+        return _at_or_after(prs, "merged_at", since)
+
+    def _graphql(self, query: str) -> Dict[str, Any]:
+        """POST a GraphQL query; raise RuntimeError on transport or query errors."""
+        # X-RateLimit-* on GraphQL responses describe the points budget, not the REST one
+        limiter = self.graphql_rate_limiter
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            limiter.acquire()
+            try:
+                resp = self.session.post(self.graphql_url, json={"query": query}, timeout=60)
+            except requests.exceptions.RequestException as e:
+                raise RuntimeError(f"GitHub GraphQL request failed: {e}") from e
+            limiter.update(resp.headers, resp.status_code)
+            if attempt == RATE_LIMIT_RETRIES or not limiter.is_limited(resp.headers, resp.status_code):
+                break
 
-            merged_at = datetime.fromisoformat(pr["merged_at"].replace("Z", "+00:00"))
-            if since and merged_at < since:
-                continue
+        if resp.status_code != 200:
+            raise RuntimeError(f"GitHub GraphQL HTTP {resp.status_code}: {resp.text[:200]}")
+        payload = resp.json()
+        if payload.get("errors"):
+            raise RuntimeError(f"GitHub GraphQL errors: {payload['errors']}")
+        return payload.get("data") or {}
+
+    def get_delivery_data(self, repos: List[Tuple[str, str]], since: Optional[datetime] = None,
+                          batch_size: int = GRAPHQL_REPO_BATCH,
+                          connections: Sequence[str] = DEFAULT_DELIVERY_CONNECTIONS,
+                          ) -> Dict[Tuple[str, str], Dict[str, List[Dict[str, Any]]]]:
+        """Get merged PRs and releases (optionally deployments) for many repos over GraphQL.
+
+        Only the fields the DORA metrics use are requested, and up to
+        batch_size repos share each query through aliases. Every connection
+        pages newest first and stops at the since cutoff, like the REST
+        getters. Items come back in REST shape (snake_case keys), filtered
+        the same way as get_pull_requests/get_releases.
 
-            merged_prs.append(pr)
+        Args:
+            repos: (owner, repo) pairs
+            since: Optional datetime to filter items after this time
+            batch_size: Repositories per GraphQL query
+            connections: GRAPHQL_CONNECTIONS names to fetch; add "deployments"
+                to page through deployments as well
+
+        Returns:
+            {(owner, repo): {name: [...] for each requested connection}}
 
-        return merged_prs
+        Raises:
+            RuntimeError: If a query fails (callers can fall back to REST)
+            ValueError: If connections names an unknown connection
+        """
+        unknown = set(connections) - set(GRAPHQL_CONNECTIONS)
+        if unknown:
+            raise ValueError(f"Unknown GraphQL connections: {sorted(unknown)}")
+        results = {repo: {name: [] for name in connections} for repo in repos}
+        for start in range(0, len(repos), batch_size):
+            # (repo, connection name) -> cursor of the next page (None = first)
+            pending = {(repo, name): None for repo in repos[start:start + batch_size] for name in connections}
+            while pending:
+                batch = list(dict.fromkeys(repo for repo, _ in pending))
+                data = self._graphql(_delivery_query(batch, pending))
+                next_pending = {}
+                for index, repo in enumerate(batch):
+                    node = data.get(f"r{index}") or {}
+                    for name, (field, _, _, cutoff_field) in GRAPHQL_CONNECTIONS.items():
+                        if (repo, name) not in pending:
+                            continue
+                        connection = node.get(field) or {}
+                        items = [_rest_shape(item) for item in connection.get("nodes") or []]
+                        results[repo][name].extend(items)
+                        page_info = connection.get("pageInfo") or {}
+                        if page_info.get("hasNextPage") and not (since and _older_than(since, cutoff_field)(items)):
+                            next_pending[(repo, name)] = page_info.get("endCursor")
+                pending = next_pending
+
+        for data in results.values():
+            if "pull_requests" in data:
+                data["pull_requests"] = _at_or_after(data["pull_requests"], "merged_at", since)
+            if since:
+                for name, field in (("releases", "published_at"), ("deployments", "created_at")):
+                    if name in data:
+                        data[name] = _at_or_after(data[name], field, since)
+        return results
 
     def search_commits(self, owner: str, repo: str, query: str, since: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """Search commits by message (for failure/revert detection).
@@ -295,6 +487,66 @@ class GitHubClient:
         return statuses[0] if statuses else {}
 
 
+def _parse_ttls(spec: str) -> Dict[str, float]:
+    """Parse "pulls=2,releases=12" into hours per CACHE_TTL_RULES name."""
+    ttls = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, hours = item.partition("=")
+        try:
+            ttls[name.strip()] = float(hours)
+        except ValueError:
+            print(f"⚠️  Ignoring invalid GITHUB_CACHE_TTLS entry: {item}")
+    return ttls
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a GitHub ISO 8601 timestamp ("...Z"); None if missing."""
+    if not value:
+        return None
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def _at_or_after(items: List[Dict[str, Any]], field: str, since: Optional[datetime]) -> List[Dict[str, Any]]:
+    """Items whose `field` is set and, if since is given, not before it."""
+    return [
+        item for item in items
+        if item.get(field) and (since is None or _parse_timestamp(item[field]) >= since)
+    ]
+
+
+def _rest_shape(node: Dict[str, Any]) -> Dict[str, Any]:
+    """GraphQL node -> REST-style dict (camelCase keys to snake_case)."""
+    return {re.sub(r"(?<!^)(?=[A-Z])", "_", key).lower(): value for key, value in node.items()}
+
+
+def _delivery_query(repos: List[Tuple[str, str]], pending: Dict[Tuple[Tuple[str, str], str], Optional[str]]) -> str:
+    """One aliased query (r0, r1, ...) covering the pending connections of each repo."""
+    parts = ["query {"]
+    for index, repo in enumerate(repos):
+        owner, name = repo
+        parts.append(f"  r{index}: repository(owner: {json.dumps(owner)}, name: {json.dumps(name)}) {{")
+        for conn_name, (field, args, fields, _) in GRAPHQL_CONNECTIONS.items():
+            if (repo, conn_name) not in pending:
+                continue
+            cursor = pending[(repo, conn_name)]
+            after = f", after: {json.dumps(cursor)}" if cursor else ""
+            parts.append(
+                f"    {field}(first: {GRAPHQL_PAGE_SIZE}{after}, {args}) "
+                f"{{ pageInfo {{ hasNextPage endCursor }} nodes {{ {fields} }} }}"
+            )
+        parts.append("  }")
+    parts.append("}")
+    return "\n".join(parts)
+
+
+def _older_than(since: datetime, field: str) -> Callable[[List[Dict[str, Any]]], bool]:
+    """Pagination stop check: true once a page's oldest `field` falls before since."""
+    def stop(batch: List[Dict[str, Any]]) -> bool:
+        stamps = [ts for ts in (_parse_timestamp(item.get(field)) for item in batch) if ts]
+        return bool(stamps) and min(stamps) < since
+    return stop
+
+
 def get_github_client() -> Optional[GitHubClient]:
     """Factory function to get authenticated GitHub client."""
     token = os.getenv("GITHUB_TOKEN")
@@ -311,7 +563,9 @@ if __name__ == "__main__":
     print("Testing GitHub API client...")
     print(f"Token available: {bool(client.token)}")
     print(f"Cache enabled: {client.cache_enabled}")
-    print(f"Rate limit: {client.max_requests_per_hour} requests/hour")
+    if client.cache is not None:
+        print(f"Cache: {client.cache.stats()}")
+    print(f"Rate limit: {client.rate_limiter.stats()}")
 
     # Test with public repo
     try:
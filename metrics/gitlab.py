@@ -1,40 +1,113 @@
 import datetime as dt
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlparse
+
 import requests
-from typing import Dict, List, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .utils import int_header
+
+PER_PAGE = 100
+# Commit fields Collector.collect reads; the rest is dropped as pages arrive
+COMMIT_FIELDS = ("id", "created_at", "title", "message")
 
 
 class GitLabClient:
-    def __init__(self, base_url: str, token: str):
+    def __init__(self, base_url: str, token: str, max_concurrency: int = 4, retries: int = 5,
+                 backoff_factor: float = 1.0):
         self.base_url = base_url.rstrip("/")
+        # Pages fetched in parallel when the server uses offset pagination
+        self.max_concurrency = max(1, max_concurrency)
         self.session = requests.Session()
         self.session.headers.update({"PRIVATE-TOKEN": token})
+        # 429s wait for Retry-After (GitLab sends it with RateLimit-*), 5xx back off exponentially
+        retry_strategy = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=["GET"],
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=max(10, self.max_concurrency))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
-    def _get(self, path: str, params: Optional[Dict[str, Any]] = None):
-        url = f"{self.base_url}/api/v4{path}"
+    def _request(self, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[Any, Dict[str, str]]:
         resp = self.session.get(url, params=params, timeout=30)
         resp.raise_for_status()
-        return resp.json()
+        return resp.json(), resp.headers
+
+    def _get(self, path: str, params: Optional[Dict[str, Any]] = None):
+        return self._request(f"{self.base_url}/api/v4{path}", params)[0]
+
+    def _pages(self, path: str, params: Dict[str, Any], per_page: int = PER_PAGE) -> Iterator[List[Any]]:
+        """Yield every page of a list endpoint, in order.
+
+        Keyset pagination is requested first: where GitLab supports it the
+        next-page link carries a cursor and is followed one page at a time
+        without the server re-skipping earlier rows. Endpoints that answer
+        with offset pages (including repository commits on most versions)
+        are prefetched max_concurrency pages at a time, up to X-Total-Pages
+        when the server sends it and otherwise until the first short page.
+        """
+        url = f"{self.base_url}/api/v4{path}"
+        params = {**params, "per_page": per_page}
+        try:
+            batch, headers = self._request(url, {**params, "pagination": "keyset"})
+        except requests.HTTPError as e:
+            # Endpoints or orderings without keyset support may refuse it outright
+            if e.response is None or e.response.status_code not in (400, 405):
+                raise
+            batch, headers = self._request(url, params)
+        yield batch
+
+        next_url = _next_link(headers)
+        if next_url and "page" not in parse_qs(urlparse(next_url).query):
+            while next_url:
+                batch, headers = self._request(next_url)
+                yield batch
+                next_url = _next_link(headers)
+            return
+
+        if len(batch) < per_page:
+            return
+        total_pages = int_header(headers, "X-Total-Pages")
+
+        def fetch(page: int) -> List[Any]:
+            return self._request(url, {**params, "page": page})[0]
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            if total_pages:
+                yield from pool.map(fetch, range(2, total_pages + 1))
+                return
+            page = 2
+            while True:
+                for batch in pool.map(fetch, range(page, page + self.max_concurrency)):
+                    yield batch
+                    if len(batch) < per_page:
+                        return
+                page += self.max_concurrency
 
     def get_project(self, project_id: str) -> Dict[str, Any]:
         return self._get(f"/projects/{project_id}")
 
-    def list_commits(self, project_id: str, since: dt.date) -> List[Dict[str, Any]]:
+    def list_commits(self, project_id: str, since: dt.date,
+                     fields: Optional[Sequence[str]] = COMMIT_FIELDS) -> List[Dict[str, Any]]:
+        """Commits since a date, trimmed to fields (None keeps whole objects)."""
         commits = []
-        page = 1
-        per_page = 100
-        while True:
-            batch = self._get(
-                f"/projects/{project_id}/repository/commits",
-                params={
-                    "since": since.isoformat(),
-                    "per_page": per_page,
-                    "page": page,
-                },
-            )
-            if not batch:
-                break
+        params = {"since": since.isoformat(), "with_stats": "false", "trailers": "false"}
+        for batch in self._pages(f"/projects/{project_id}/repository/commits", params):
+            if fields:
+                batch = [{field: commit.get(field) for field in fields} for commit in batch]
             commits.extend(batch)
-            if len(batch) < per_page:
-                break
-            page += 1
         return commits
+
+
+def _next_link(headers: Dict[str, str]) -> Optional[str]:
+    for part in headers.get("Link", "").split(","):
+        if 'rel="next"' in part:
+            return part.split(";", 1)[0].strip().strip("<>")
+    return None
@@ -0,0 +1,175 @@
+"""Size-bounded, compressed HTTP response cache in a single SQLite file.
+
+Bodies are stored as zlib-compressed JSON with the ETag/Last-Modified
+validators they were served with. Entries outlive their TTL so they can be
+revalidated with a conditional request; when the file grows past its size
+budget the least recently used entries are evicted. Hit/miss counters are
+kept per process and accumulated in the database for ``metrics cache stats``.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from typing import Any, Dict, NamedTuple, Optional
+
+DEFAULT_CACHE_PATH = ".cache/github/responses.db"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Evict down to this share of max_bytes so eviction does not run on every put
+EVICT_TO = 0.9
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+  key TEXT PRIMARY KEY,
+  endpoint TEXT NOT NULL,
+  body BLOB NOT NULL,
+  etag TEXT,
+  last_modified TEXT,
+  stored_at REAL NOT NULL,
+  accessed_at REAL NOT NULL,
+  size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_accessed ON entries(accessed_at);
+CREATE TABLE IF NOT EXISTS counters (
+  name TEXT PRIMARY KEY,
+  value INTEGER NOT NULL
+);
+"""
+
+COUNTERS = ("hits", "misses", "stale", "revalidated", "stores", "evictions")
+
+
+class CacheEntry(NamedTuple):
+    data: Any
+    validators: Dict[str, Optional[str]]
+    age_seconds: float
+
+
+class ResponseCache:
+    """Thread-safe response cache; share one instance across a client's threads."""
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        # Parallel collectors in other processes may share the file; wait on their writes
+        self._conn = sqlite3.connect(path, timeout=30, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self.counters = dict.fromkeys(COUNTERS, 0)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _count(self, name: str, n: int = 1) -> None:
+        self.counters[name] += n
+        self._conn.execute(
+            "INSERT INTO counters(name, value) VALUES (?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, n),
+        )
+
+    def get(self, key: str, max_age_seconds: float) -> Optional[CacheEntry]:
+        """Return the entry for key, fresh or stale; counts a hit only when fresh."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, etag, last_modified, stored_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            now = time.time()
+            if row is None:
+                self._count("misses")
+                return None
+            body, etag, last_modified, stored_at = row
+            age = now - stored_at
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self._count("hits" if age <= max_age_seconds else "stale")
+        data = json.loads(zlib.decompress(body))
+        return CacheEntry(data, {"etag": etag, "last_modified": last_modified}, age)
+
+    def put(self, key: str, endpoint: str, data: Any, validators: Optional[Dict[str, Optional[str]]] = None) -> None:
+        validators = validators or {}
+        body = zlib.compress(json.dumps(data, separators=(",", ":")).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries(key, endpoint, body, etag, last_modified, stored_at, accessed_at, size) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, endpoint, body, validators.get("etag"), validators.get("last_modified"), now, now, len(body)),
+            )
+            self._count("stores")
+            self._evict_locked()
+
+    def touch(self, key: str) -> None:
+        """Restart an entry's TTL after the server confirmed it unchanged (304)."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("UPDATE entries SET stored_at = ?, accessed_at = ? WHERE key = ?", (now, now, key))
+            self._count("revalidated")
+
+    def _evict_locked(self) -> int:
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return 0
+        target = total - int(self.max_bytes * EVICT_TO)
+        # Least recently used first, until enough bytes are freed
+        keys = []
+        freed = 0
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            keys.append((key,))
+            freed += size
+            if freed >= target:
+                break
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", keys)
+        self._count("evictions", len(keys))
+        return len(keys)
+
+    def prune(self, older_than_seconds: Optional[float] = None) -> int:
+        """Drop entries unused for older_than_seconds, then enforce the size budget."""
+        with self._lock:
+            removed = 0
+            if older_than_seconds is not None:
+                removed = self._conn.execute(
+                    "DELETE FROM entries WHERE accessed_at < ?", (time.time() - older_than_seconds,)
+                ).rowcount
+                self._count("evictions", removed)
+            removed += self._evict_locked()
+            # Hand the freed pages back to the filesystem
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Entry count, stored bytes, this process's counters and the lifetime totals."""
+        with self._lock:
+            entries, stored_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+            totals = dict(self._conn.execute("SELECT name, value FROM counters"))
+            endpoints = self._conn.execute(
+                "SELECT endpoint, COUNT(*), SUM(size) FROM entries GROUP BY endpoint ORDER BY SUM(size) DESC LIMIT 10"
+            ).fetchall()
+        lookups = totals.get("hits", 0) + totals.get("stale", 0) + totals.get("misses", 0)
+        return {
+            "path": self.path,
+            "entries": entries,
+            "bytes": stored_bytes,
+            "max_bytes": self.max_bytes,
+            "session": dict(self.counters),
+            "lifetime": {name: totals.get(name, 0) for name in COUNTERS},
+            "hit_rate": round(totals.get("hits", 0) / lookups, 3) if lookups else None,
+            "top_endpoints": [
+                {"endpoint": endpoint, "entries": count, "bytes": size} for endpoint, count, size in endpoints
+            ],
+        }
+
+
+def open_cache(path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES) -> "closing[ResponseCache]":
+    return closing(ResponseCache(path, max_bytes))
@@ -1,7 +1,20 @@
+import fnmatch
+import json
 import os
 import re
+import subprocess
 from collections import Counter
-from typing import Dict, List, Tuple, Optional
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Tuple, Optional
+
+
+READ_CHUNK = 1 << 20
+# Larger files are only line-counted (chunked), all lines treated as code
+CLASSIFY_LIMIT = 8 << 20
+# Files per task handed to a line-counting worker
+COUNT_BATCH = 256
+GLOB_CHARS = frozenset("*?[")
 
 
 TEST_PATTERNS = [
@@ -25,60 +38,363 @@ def file_extension(path: str) -> str:
     return base.split(".")[-1].lower()
 
 
+class CommentSyntax(NamedTuple):
+    line: Tuple[bytes, ...] = ()
+    block: Tuple[Tuple[bytes, bytes], ...] = ()
+
+
+C_STYLE = CommentSyntax((b"//",), ((b"/*", b"*/"),))
+HASH_STYLE = CommentSyntax((b"#",))
+MARKUP_STYLE = CommentSyntax(block=((b"<!--", b"-->"),))
+
+# Extension -> comment syntax; unknown extensions only get blank-line detection
+COMMENT_SYNTAX: Dict[str, CommentSyntax] = {
+    **dict.fromkeys(
+        ["c", "h", "cc", "cpp", "cxx", "hpp", "cs", "java", "js", "jsx", "mjs", "cjs", "ts",
+         "tsx", "go", "rs", "swift", "kt", "kts", "scala", "dart", "groovy", "gradle", "scss",
+         "less", "proto"],
+        C_STYLE,
+    ),
+    **dict.fromkeys(
+        ["py", "sh", "bash", "zsh", "rb", "pl", "r", "yaml", "yml", "toml", "cfg", "conf",
+         "mk", "cmake", "dockerfile", "ps1", "tf"],
+        HASH_STYLE,
+    ),
+    **dict.fromkeys(["html", "htm", "xml", "vue", "svelte", "svg", "md"], MARKUP_STYLE),
+    "css": CommentSyntax(block=((b"/*", b"*/"),)),
+    "php": CommentSyntax((b"//", b"#"), ((b"/*", b"*/"),)),
+    "sql": CommentSyntax((b"--",), ((b"/*", b"*/"),)),
+    "lua": CommentSyntax((b"--",), ((b"--[[", b"]]"),)),
+    "hs": CommentSyntax((b"--",), ((b"{-", b"-}"),)),
+    "ini": CommentSyntax((b";", b"#")),
+    "clj": CommentSyntax((b";",)),
+    "tex": CommentSyntax((b"%",)),
+    "erl": CommentSyntax((b"%",)),
+}
+
+# Stands in for each line of a block comment once it has been cut out
+BLOCK_MARK = b"\x00"
+# Patterns run over "\n" + data (+ "\n"), so every line sits between two
+# newlines; the literal "\n" prefix lets re skip straight to line starts.
+BLANK_LINE = re.compile(rb"\n[ \t\f\v\r]*(?=\n)")
+
+
+class LineCounts(NamedTuple):
+    total: int
+    code: int
+    comment: int
+    blank: int
+
+
+@lru_cache(maxsize=None)
+def _comment_patterns(syntax: CommentSyntax):
+    block = None
+    if syntax.block:
+        block = re.compile(
+            b"|".join(re.escape(start) + b".*?(?:" + re.escape(end) + rb"|\Z)" for start, end in syntax.block),
+            re.S,
+        )
+    # Block-comment markers and whitespace only, or ending in a line comment
+    tails = [re.escape(prefix) for prefix in syntax.line]
+    if block:
+        tails.append(BLOCK_MARK + rb"[ \t\r]*(?=\n)")
+    comment_line = re.compile(rb"\n[ \t]*(?:" + BLOCK_MARK + rb"[ \t]*)*(?:" + b"|".join(tails) + b")")
+    return block, comment_line
+
+
+def _mark_block(match) -> bytes:
+    return BLOCK_MARK + (b"\n" + BLOCK_MARK) * match.group().count(b"\n")
+
+
+def classify_lines(data: bytes, ext: str) -> LineCounts:
+    """Split a file's lines into code, comment and blank by its extension.
+
+    Lines that only hold comments (and whitespace) count as comment; a line
+    with any code counts as code. Comment markers inside string literals are
+    not recognised, which is the usual trade-off for a regex-only pass.
+    """
+    if not data:
+        return LineCounts(0, 0, 0, 0)
+    total = data.count(b"\n") + data.count(b"\r") - data.count(b"\r\n")
+    if data[-1:] not in b"\r\n":
+        total += 1
+    syntax = COMMENT_SYNTAX.get(ext)
+    if syntax:
+        block, comment_line = _comment_patterns(syntax)
+        if block:
+            data = block.sub(_mark_block, data)
+    data = b"\n" + data if data.endswith(b"\n") else b"\n" + data + b"\n"
+    comment = len(comment_line.findall(data)) if syntax else 0
+    blank = len(BLANK_LINE.findall(data))
+    code = max(total - comment - blank, 0)
+    return LineCounts(total, code, comment, blank)
+
+
+def classify_file(path: str) -> LineCounts:
+    """Read a file once and classify its lines; oversized files are only counted."""
+    try:
+        with open(path, "rb") as f:
+            data = f.read(CLASSIFY_LIMIT + 1)
+    except OSError:
+        return LineCounts(0, 0, 0, 0)
+    if len(data) > CLASSIFY_LIMIT:
+        total = count_lines(path)
+        return LineCounts(total, total, 0, 0)
+    return classify_lines(data, file_extension(path))
+
+
 def count_lines(path: str) -> int:
+    """Count lines like iterating the file in text mode, but on raw bytes.
+
+    Universal newlines apply: \n, \r\n and a lone \r each end a line, and a
+    trailing line without a terminator still counts.
+    """
+    lines = 0
+    last = b""
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
-            return sum(1 for _ in f)
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(READ_CHUNK), b""):
+                lines += chunk.count(b"\n") + chunk.count(b"\r") - chunk.count(b"\r\n")
+                if last == b"\r" and chunk[:1] == b"\n":
+                    # \r\n split across chunks was counted twice
+                    lines -= 1
+                last = chunk[-1:]
     except OSError:
         return 0
+    if last and last not in b"\r\n":
+        lines += 1
+    return lines
+
+
+def _classify_batch(paths: List[str]) -> List[LineCounts]:
+    return [classify_file(path) for path in paths]
+
+
+def classify_files(paths: List[str], workers: int = 1) -> List[LineCounts]:
+    """classify_file over many files, in order, spread across a thread pool.
+
+    File reads release the GIL, so threads keep several reads in flight;
+    paths go out in batches to keep per-task overhead low.
+    """
+    if workers <= 1 or len(paths) <= COUNT_BATCH:
+        return _classify_batch(paths)
+    batches = [paths[i:i + COUNT_BATCH] for i in range(0, len(paths), COUNT_BATCH)]
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return [counts for batch in executor.map(_classify_batch, batches) for counts in batch]
+
+
+def _git_ls_files(root: str, *args: str) -> Optional[List[bytes]]:
+    """NUL-separated ``git ls-files`` entries, or None outside a git checkout."""
+    try:
+        result = subprocess.run(["git", "ls-files", "-z", *args], cwd=root, capture_output=True)
+    except OSError:
+        return None
+    if result.returncode != 0:
+        return None
+    return [entry for entry in result.stdout.split(b"\0") if entry]
 
 
-def scan_repo(root: str, include_paths: List[str], exclude_paths: List[str]):
+def exclusion_matcher(exclude_paths: List[str]) -> Callable[[str, str], bool]:
+    """Build ``excluded(name, rel_path)`` from exclude_paths.
+
+    Plain entries match a path component by name (set lookup); entries with
+    glob characters are compiled into one regex tried against the name and
+    the "/"-separated relative path, e.g. ``*.min.js`` or ``docs/generated/*``.
+    """
+    names = {p for p in exclude_paths if not GLOB_CHARS.intersection(p)}
+    globs = [p for p in exclude_paths if GLOB_CHARS.intersection(p)]
+    if not globs:
+        return lambda name, rel_path: name in names
+    pattern = re.compile("|".join(f"(?:{fnmatch.translate(g)})" for g in globs))
+
+    def excluded(name: str, rel_path: str) -> bool:
+        if name in names or pattern.match(name):
+            return True
+        return bool(pattern.match(rel_path.replace(os.sep, "/")))
+
+    return excluded
+
+
+def _walk(root: str, start: str, excluded: Callable[[str, str], bool], files: List[str]):
+    # Depth-first with os.scandir: file types come from the directory entries
+    # and relative paths are built by concatenation, no per-entry relpath().
+    stack = [start]
+    while stack:
+        rel_dir = stack.pop()
+        try:
+            it = os.scandir(os.path.join(root, rel_dir) if rel_dir else root)
+        except OSError:
+            continue
+        subdirs = []
+        with it:
+            for entry in it:
+                rel_path = rel_dir + os.sep + entry.name if rel_dir else entry.name
+                if excluded(entry.name, rel_path):
+                    continue
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if not is_dir:
+                    files.append(rel_path)
+                elif not entry.is_symlink():
+                    subdirs.append(rel_path)
+        # Reversed so subdirectories are visited in listing order, like os.walk
+        stack.extend(reversed(subdirs))
+
+
+def _git_files(root: str, start: str, excluded: Callable[[str, str], bool]) -> Optional[List[str]]:
+    entries = _git_ls_files(root)
+    if entries is None:
+        return None
+    prefix = start + os.sep if start else ""
+    files = []
+    for entry in entries:
+        rel_path = os.path.normpath(os.fsdecode(entry))
+        if not rel_path.startswith(prefix):
+            continue
+        parts = rel_path.split(os.sep)
+        if any(excluded(part, os.sep.join(parts[:i + 1])) for i, part in enumerate(parts)):
+            continue
+        files.append(rel_path)
+    return files
+
+
+def scan_repo(root: str, include_paths: List[str], exclude_paths: List[str], file_source: str = "walk"):
+    """List files under include_paths, relative to root, minus excluded paths.
+
+    file_source "git" takes the tracked files from one ``git ls-files -z``
+    (falling back to the walk outside a git checkout); "walk" scans the disk.
+    """
+    excluded = exclusion_matcher(exclude_paths)
     files: List[str] = []
     for inc in include_paths:
-        base = os.path.join(root, inc)
-        for dirpath, dirnames, filenames in os.walk(base):
-            rel = os.path.relpath(dirpath, root)
-            if any(part in exclude_paths for part in rel.split(os.sep)):
-                dirnames[:] = []
-                continue
-            for name in filenames:
-                rel_file = os.path.relpath(os.path.join(dirpath, name), root)
-                if any(part in exclude_paths for part in rel_file.split(os.sep)):
-                    continue
-                files.append(rel_file)
+        start = os.path.normpath(inc)
+        start = "" if start == os.curdir else start
+        parts = start.split(os.sep) if start else []
+        if any(excluded(part, os.sep.join(parts[:i + 1])) for i, part in enumerate(parts)):
+            continue
+        tracked = _git_files(root, start, excluded) if file_source == "git" else None
+        if tracked is not None:
+            files.extend(tracked)
+        else:
+            _walk(root, start, excluded, files)
     return files
 
 
+def git_blob_index(root: str) -> Dict[str, str]:
+    """Map tracked, unmodified regular files (relative path) to their blob SHA."""
+    blobs: Dict[str, str] = {}
+    for entry in _git_ls_files(root, "-s") or []:
+        # "<mode> <sha> <stage>\t<path>"
+        meta, _, path = entry.partition(b"\t")
+        mode, sha, stage = meta.split(b" ")
+        # Skip merge conflicts, symlinks and submodules
+        if stage != b"0" or mode not in (b"100644", b"100755"):
+            continue
+        blobs[os.path.normpath(os.fsdecode(path))] = sha.decode("ascii")
+    # Working-tree edits no longer match the index blob
+    for path in _git_ls_files(root, "-m") or []:
+        blobs.pop(os.path.normpath(os.fsdecode(path)), None)
+    return blobs
+
+
+def load_loc_cache(path: str) -> Dict[str, List[int]]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_loc_cache(path: str, cache: Dict[str, List[int]]):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f)
+    os.replace(tmp_path, path)
+
+
+def _cached_counts(loc_cache: Dict[str, List[int]], key: Optional[str]) -> Optional[LineCounts]:
+    entry = loc_cache.get(key) if key else None
+    if not isinstance(entry, list) or len(entry) != len(LineCounts._fields):
+        return None
+    return LineCounts(*entry)
+
+
 def calculate_repo_metrics(
     root: str,
     include_paths: List[str],
     exclude_paths: List[str],
     exclude_extensions: Optional[List[str]] = None,
+    loc_cache_path: Optional[str] = None,
+    workers: int = 1,
+    file_source: str = "walk",
 ):
-    files = scan_repo(root, include_paths, exclude_paths)
+    """Scan the tree for LOC, test files and file types.
+
+    Each file is read once and its lines split into code, comment and blank
+    (classify_lines).
+
+    With loc_cache_path, line counts are cached by git blob SHA, so only files
+    whose content is new since the last scan are opened. The cache is
+    rewritten with just the current tree's blobs. Files that do need reading
+    are counted across workers threads.
+    """
+    files = scan_repo(root, include_paths, exclude_paths, file_source)
     file_types = Counter()
+    file_type_loc = Counter()
+    breakdown = Counter()
     source_files: List[Tuple[str, int, str]] = []
     total_loc = 0
     test_count = 0
     excluded = {ext.lower().lstrip(".") for ext in (exclude_extensions or [])}
 
+    blobs = git_blob_index(root) if loc_cache_path else {}
+    loc_cache = load_loc_cache(loc_cache_path) if loc_cache_path else {}
+    current_cache: Dict[str, List[int]] = {}
+
+    entries = []
+    to_count: List[str] = []
     for rel_path in files:
-        abs_path = os.path.join(root, rel_path)
         ext = file_extension(rel_path)
         if ext in excluded:
             continue
-        loc = count_lines(abs_path)
+        # Classification depends on the extension as well as the content
+        key = f"{blobs[rel_path]}.{ext}" if rel_path in blobs else None
+        counts = _cached_counts(loc_cache, key)
+        if counts is None:
+            to_count.append(os.path.join(root, rel_path))
+        entries.append((rel_path, ext, key, counts))
+
+    counted = iter(classify_files(to_count, workers))
+    for rel_path, ext, key, counts in entries:
+        if counts is None:
+            counts = next(counted)
+        if key:
+            current_cache[key] = list(counts)
+        loc = counts.total
         file_types[(ext or "(none)")] += 1
+        file_type_loc[(ext or "(none)")] += loc
+        breakdown.update(code=counts.code, comment=counts.comment, blank=counts.blank)
         source_files.append((rel_path, loc, ext))
         total_loc += loc
         if is_test_file(rel_path):
             test_count += 1
 
+    if loc_cache_path:
+        save_loc_cache(loc_cache_path, current_cache)
+
     return {
         "total_loc": total_loc,
+        "code_loc": breakdown["code"],
+        "comment_loc": breakdown["comment"],
+        "blank_loc": breakdown["blank"],
         "test_count": test_count,
         "file_types": file_types,
+        "file_type_loc": file_type_loc,
         "source_files": source_files,
     }
 
@@ -0,0 +1,104 @@
+"""Shared cache of bare ``git clone --mirror`` repos.
+
+Every configured repo is mirrored once under one cache directory and
+refreshed with a single parallel fetch. Git collectors read a mirror
+directly as their git dir; a linked worktree is checked out from it only
+for steps that scan files, so no repo needs a full clone of its own.
+"""
+
+import os
+import shutil
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+DEFAULT_CACHE_DIR = ".cache/repos"
+DEFAULT_WORKERS = 8
+GIT_TIMEOUT = 900
+
+
+def mirror_name(url: str) -> str:
+    """Cache directory name for a remote, e.g. owner_repo.git."""
+    path = urlparse(url).path if "://" in url else url.split(":", 1)[-1]
+    parts = [part for part in path.rstrip("/").split("/") if part]
+    name = "_".join(parts[-2:]) if len(parts) > 1 else parts[-1]
+    return name if name.endswith(".git") else f"{name}.git"
+
+
+def is_mirror(path: Path) -> bool:
+    return (path / "HEAD").is_file() and (path / "objects").is_dir()
+
+
+def _git(*args: str, git_dir: Optional[Path] = None, cwd: Optional[Path] = None) -> str:
+    cmd = ["git", f"--git-dir={git_dir}", *args] if git_dir else ["git", *args]
+    try:
+        result = subprocess.run(cmd, cwd=cwd, capture_output=True, text=True, timeout=GIT_TIMEOUT)
+    except subprocess.TimeoutExpired as e:
+        raise RuntimeError(f"git {' '.join(args[:2])} timed out after {GIT_TIMEOUT}s") from e
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args[:2])} failed: {result.stderr.strip()}")
+    return result.stdout.strip()
+
+
+class MirrorCache:
+    """Bare mirrors of remote repos under cache_dir, one per URL."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_workers: int = DEFAULT_WORKERS):
+        self.cache_dir = Path(cache_dir)
+        self.max_workers = max(1, max_workers)
+
+    def path(self, url: str) -> Path:
+        return self.cache_dir / mirror_name(url)
+
+    def sync_one(self, url: str) -> Path:
+        """Fetch into an existing mirror, or create it."""
+        mirror = self.path(url)
+        if is_mirror(mirror):
+            _git("fetch", "--prune", "--quiet", "origin", git_dir=mirror)
+            return mirror
+        # Clone next to the final path so an interrupted clone is never mistaken for a mirror
+        tmp = mirror.with_name(mirror.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        try:
+            _git("clone", "--mirror", "--quiet", url, str(tmp))
+        except RuntimeError:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        os.replace(tmp, mirror)
+        return mirror
+
+    def sync(self, urls: Iterable[str]) -> Dict[str, Optional[str]]:
+        """Create or refresh every mirror in parallel; map each URL to its error, or None."""
+        unique: List[str] = list(dict.fromkeys(urls))
+
+        def attempt(url: str) -> Optional[str]:
+            try:
+                self.sync_one(url)
+                return None
+            except (RuntimeError, OSError) as e:
+                return str(e)
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(unique)))) as pool:
+            return dict(zip(unique, pool.map(attempt, unique)))
+
+
+def checkout_worktree(mirror: Path, dest: Path) -> Path:
+    """Check out the mirror's HEAD at dest as a linked worktree (created on first use).
+
+    The worktree shares the mirror's object store, so it costs only the
+    checked-out files. An existing worktree is moved to the current HEAD.
+    """
+    mirror = Path(mirror).resolve()
+    dest = Path(dest)
+    head = _git("rev-parse", "HEAD", git_dir=mirror)
+    if (dest / ".git").is_file():
+        _git("checkout", "--quiet", "--detach", "--force", head, cwd=dest)
+        return dest
+    # Forget worktrees whose directories were deleted, so dest can be reused
+    _git("worktree", "prune", git_dir=mirror)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    _git("worktree", "add", "--quiet", "--detach", "--force", str(dest.resolve()), head, git_dir=mirror)
+    return dest
@@ -0,0 +1,119 @@
+"""Thread-safe token-bucket rate limiter kept in sync with API rate-limit headers."""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from .utils import int_header
+
+
+class RateLimiter:
+    """Token bucket refilled at ``requests_per_hour``, corrected by the server.
+
+    Every request calls acquire() first and update() with the response
+    headers after. X-RateLimit-Remaining/Reset (GitHub and GitLab both send
+    them) override the local estimate, an exhausted budget blocks until the
+    reset time, and Retry-After (secondary/abuse limits, 429s) blocks for the
+    given number of seconds. One instance can be shared by any number of
+    threads or clients.
+    """
+
+    def __init__(self, requests_per_hour: int = 4500, clock: Callable[[], float] = time.time,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.capacity = max(1, requests_per_hour)
+        self.refill_per_second = self.capacity / 3600
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._tokens = float(self.capacity)
+        self._refilled_at = clock()
+        self._blocked_until = 0.0
+
+        # Instrumentation
+        self.server_limit: Optional[int] = None
+        self.server_remaining: Optional[int] = None
+        self.server_reset: Optional[float] = None
+        self.requests = 0
+        self.throttled = 0
+        self.waited_seconds = 0.0
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.refill_per_second)
+        self._refilled_at = now
+
+    def acquire(self) -> None:
+        """Take one token, sleeping while the bucket is empty or the server said to wait."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._refill(now)
+                wait = max(self._blocked_until - now, 0.0)
+                if not wait:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        self.requests += 1
+                        return
+                    wait = (1 - self._tokens) / self.refill_per_second
+                self.throttled += 1
+                self.waited_seconds += wait
+            print(f"⚠️  Rate limit: waiting {wait:.1f}s ({self.describe()})")
+            self._sleep(wait)
+
+    def refund(self) -> None:
+        """Return a token for a request the server did not charge (e.g. a 304)."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + 1)
+
+    def update(self, headers: Mapping[str, str], status: Optional[int] = None) -> None:
+        """Sync from a response's rate-limit headers."""
+        with self._lock:
+            now = self._clock()
+            limit = int_header(headers, "X-RateLimit-Limit")
+            remaining = int_header(headers, "X-RateLimit-Remaining")
+            reset = int_header(headers, "X-RateLimit-Reset")
+            if limit is not None:
+                self.server_limit = limit
+            if reset is not None:
+                self.server_reset = float(reset)
+            if remaining is not None:
+                self.server_remaining = remaining
+                # The server's count wins; never assume more than it allows
+                self._refill(now)
+                self._tokens = min(self._tokens, float(remaining))
+                if remaining == 0 and self.server_reset:
+                    self._blocked_until = max(self._blocked_until, self.server_reset)
+
+            retry_after = int_header(headers, "Retry-After")
+            if retry_after is not None:
+                self._blocked_until = max(self._blocked_until, now + retry_after)
+            elif status in (403, 429) and remaining is None:
+                # Secondary limit without guidance: back off a minute
+                self._blocked_until = max(self._blocked_until, now + 60)
+
+    def is_limited(self, headers: Mapping[str, str], status: int) -> bool:
+        """Whether a response is a rate-limit rejection worth retrying after acquire()."""
+        if status == 429:
+            return True
+        return status == 403 and (
+            "Retry-After" in headers or int_header(headers, "X-RateLimit-Remaining") == 0
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Current budget and throttling counters."""
+        with self._lock:
+            self._refill(self._clock())
+            return {
+                "tokens": int(self._tokens),
+                "capacity": self.capacity,
+                "server_limit": self.server_limit,
+                "server_remaining": self.server_remaining,
+                "server_reset": self.server_reset,
+                "requests": self.requests,
+                "throttled": self.throttled,
+                "waited_seconds": round(self.waited_seconds, 3),
+            }
+
+    def describe(self) -> str:
+        if self.server_remaining is not None and self.server_limit:
+            return f"{self.server_remaining}/{self.server_limit} remaining on server"
+        return f"{int(self._tokens)}/{self.capacity} local tokens"
@@ -1,20 +1,90 @@
+import os
 import sqlite3
-from typing import Dict, Any
+from contextlib import closing
+from typing import Dict, Any, Optional
 
 from .utils import ensure_dir, utc_now_iso
 
+# Bump together with sql/schema.sql and a new sql/migrations/NNN_*.sql script
+SCHEMA_VERSION = 1
+
+# WAL lets exports read while a collect is writing; NORMAL sync is durable
+# enough under WAL and avoids an fsync per transaction. auto_vacuum only
+# applies to a brand-new file, so it has to come before journal_mode.
+PRAGMAS = (
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-65536",
+    "PRAGMA foreign_keys=ON",
+)
+
+INSERT_COMMIT_COUNT = "INSERT OR REPLACE INTO commit_counts(snapshot_id, date, count) VALUES (?, ?, ?)"
+INSERT_LOC_TOTALS = "INSERT OR REPLACE INTO loc_totals(snapshot_id, total, code, comment, blank) VALUES (?, ?, ?, ?, ?)"
+INSERT_TEST_TOTALS = "INSERT OR REPLACE INTO test_totals(snapshot_id, count) VALUES (?, ?)"
+INSERT_FILE_TYPE = "INSERT OR REPLACE INTO file_types(snapshot_id, extension, files, loc) VALUES (?, ?, ?, ?)"
+INSERT_SOURCE_FILE = "INSERT OR REPLACE INTO source_files(snapshot_id, path, loc, extension) VALUES (?, ?, ?, ?)"
+INSERT_EPIC_STATS = "INSERT OR REPLACE INTO epic_stats(snapshot_id, epic_key, commits, loc) VALUES (?, ?, ?, ?)"
+INSERT_COVERAGE = "INSERT OR REPLACE INTO coverage_totals(snapshot_id, line_rate, branch_rate) VALUES (?, ?, ?)"
+
+
+def connect(db_path: str) -> sqlite3.Connection:
+    # Autocommit mode: transactions are opened explicitly with BEGIN
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
 
 def init_db(db_path: str, schema_path: str):
+    """Create a new database from schema_path, or migrate an existing one."""
     ensure_dir(db_path.rsplit("/", 1)[0])
-    with open(schema_path, "r", encoding="utf-8") as f:
-        schema = f.read()
-    with sqlite3.connect(db_path) as conn:
-        conn.executescript(schema)
+    with closing(connect(db_path)) as conn:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        existing = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'snapshots'"
+        ).fetchone()
+        if existing and version < SCHEMA_VERSION:
+            migrate(conn, version, os.path.join(os.path.dirname(schema_path), "migrations"))
+        elif not existing:
+            with open(schema_path, "r", encoding="utf-8") as f:
+                conn.executescript(f.read())
 
 
-def store_snapshot(db_path: str, data: Dict[str, Any]):
+def migrate(conn: sqlite3.Connection, from_version: int, migrations_dir: str):
+    """Apply sql/migrations/NNN_*.sql scripts above from_version, one transaction each."""
+    scripts = sorted(
+        (int(name.split("_", 1)[0]), name)
+        for name in os.listdir(migrations_dir)
+        if name.endswith(".sql") and name.split("_", 1)[0].isdigit()
+    )
+    # Table rebuilds must not trigger cascades or FK checks mid-migration
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for version, name in scripts:
+            if version <= from_version:
+                continue
+            with open(os.path.join(migrations_dir, name), "r", encoding="utf-8") as f:
+                script = f.read()
+            conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+    finally:
+        conn.execute("PRAGMA foreign_keys=ON")
+
+
+def store_snapshot(db_path: str, data: Dict[str, Any], conn: Optional[sqlite3.Connection] = None):
+    """Write one snapshot in a single transaction.
+
+    Row sets go through executemany. Pass a connection from connect() to
+    store several snapshots and reuse its compiled statements.
+    """
+    if conn is None:
+        with closing(connect(db_path)) as own_conn:
+            return store_snapshot(db_path, data, own_conn)
+
     snapshot_date = data["snapshot_date"]
-    with sqlite3.connect(db_path) as conn:
+    conn.execute("BEGIN")
+    try:
         conn.execute(
             "INSERT OR IGNORE INTO snapshots(snapshot_date, created_at) VALUES (?, ?)",
             (snapshot_date, utc_now_iso()),
@@ -24,50 +94,77 @@ def store_snapshot(db_path: str, data: Dict[str, Any]):
             (snapshot_date,),
         ).fetchone()[0]
 
-        for date, count in data["daily_commits"].items():
-            conn.execute(
-                "INSERT OR REPLACE INTO commit_counts(snapshot_id, date, count) VALUES (?, ?, ?)",
-                (snapshot_id, date, count),
-            )
+        conn.executemany(
+            INSERT_COMMIT_COUNT,
+            ((snapshot_id, date, count) for date, count in data["daily_commits"].items()),
+        )
 
         repo_metrics = data.get("repo_metrics")
         if repo_metrics:
             conn.execute(
-                "INSERT OR REPLACE INTO loc_totals(snapshot_id, total, code, comment, blank) VALUES (?, ?, ?, ?, ?)",
-                (snapshot_id, repo_metrics["total_loc"], None, None, None),
+                INSERT_LOC_TOTALS,
+                (
+                    snapshot_id,
+                    repo_metrics["total_loc"],
+                    repo_metrics.get("code_loc"),
+                    repo_metrics.get("comment_loc"),
+                    repo_metrics.get("blank_loc"),
+                ),
             )
-            conn.execute(
-                "INSERT OR REPLACE INTO test_totals(snapshot_id, count) VALUES (?, ?)",
-                (snapshot_id, repo_metrics["test_count"]),
+            conn.execute(INSERT_TEST_TOTALS, (snapshot_id, repo_metrics["test_count"]))
+            file_type_loc = repo_metrics.get("file_type_loc", {})
+            conn.executemany(
+                INSERT_FILE_TYPE,
+                (
+                    (snapshot_id, ext, count, file_type_loc.get(ext))
+                    for ext, count in repo_metrics["file_types"].items()
+                ),
             )
-            for (ext, count) in repo_metrics["file_types"].items():
-                conn.execute(
-                    "INSERT OR REPLACE INTO file_types(snapshot_id, extension, files, loc) VALUES (?, ?, ?, ?)",
-                    (snapshot_id, ext, count, None),
-                )
-            for path, loc, ext in repo_metrics["source_files"]:
-                conn.execute(
-                    "INSERT OR REPLACE INTO source_files(snapshot_id, path, loc, extension) VALUES (?, ?, ?, ?)",
-                    (snapshot_id, path, loc, ext),
-                )
-
-        for key, count in data.get("epic_commits", {}).items():
-            conn.execute(
-                "INSERT OR REPLACE INTO epic_stats(snapshot_id, epic_key, commits, loc) VALUES (?, ?, ?, ?)",
-                (snapshot_id, key, count, None),
+            conn.executemany(
+                INSERT_SOURCE_FILE,
+                ((snapshot_id, path, loc, ext) for path, loc, ext in repo_metrics["source_files"]),
             )
 
+        # LOC is what the epic's matching commits added (NULL when unknown)
+        epic_loc = data.get("epic_loc", {})
+        conn.executemany(
+            INSERT_EPIC_STATS,
+            ((snapshot_id, key, count, epic_loc.get(key)) for key, count in data.get("epic_commits", {}).items()),
+        )
+
         coverage = data.get("coverage")
         if coverage:
             conn.execute(
-                "INSERT OR REPLACE INTO coverage_totals(snapshot_id, line_rate, branch_rate) VALUES (?, ?, ?)",
+                INSERT_COVERAGE,
                 (snapshot_id, coverage.get("line_rate"), coverage.get("branch_rate")),
             )
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
 
 
 def purge_old(db_path: str, retention_days: int):
-    with sqlite3.connect(db_path) as conn:
+    # Child rows go with their snapshot via ON DELETE CASCADE
+    with closing(connect(db_path)) as conn:
         conn.execute(
             "DELETE FROM snapshots WHERE snapshot_date < date('now', ?) ",
             (f"-{retention_days} days",),
         )
+
+
+def vacuum(db_path: str, full: bool = False):
+    """Return free pages to the OS and refresh query planner statistics.
+
+    Incremental-vacuum databases just release their free list. Otherwise (or
+    with full) the file is rebuilt with VACUUM, which also switches it to
+    incremental auto-vacuum for next time.
+    """
+    with closing(connect(db_path)) as conn:
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+        if full or auto_vacuum != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute("PRAGMA incremental_vacuum")
+        conn.execute("PRAGMA optimize")
@@ -1,6 +1,8 @@
 import datetime as dt
+import hashlib
 import os
 from pathlib import Path
+from typing import Mapping, Optional
 
 
 def utc_now_iso():
@@ -28,3 +30,19 @@ def env_required(name: str) -> str:
 
 def normalize_path(path: str) -> str:
     return str(Path(path).resolve())
+
+
+def file_sha256(path) -> str:
+    sha256_hash = hashlib.sha256()
+    with open(path, "rb") as f:
+        for byte_block in iter(lambda: f.read(65536), b""):
+            sha256_hash.update(byte_block)
+    return sha256_hash.hexdigest()
+
+
+def int_header(headers: Mapping[str, str], name: str) -> Optional[int]:
+    value = headers.get(name)
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
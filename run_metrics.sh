@@ -7,6 +7,7 @@ set -e
 #   ./run_metrics.sh --range all_2024
 #   ./run_metrics.sh --range custom --from 2026-01-01 --to 2026-01-31
 #   ./run_metrics.sh --range custom --from 2026-01-01 --to 2026-01-31 --open
+#   ./run_metrics.sh --range ytd --jobs 8
 
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 cd "$SCRIPT_DIR"
@@ -20,6 +21,7 @@ echo ""
 RANGE="last_30_days"
 FROM_DATE=""
 TO_DATE=""
+JOBS=1
 OPEN_REPORT=0
 
 # Parse arguments
@@ -37,6 +39,10 @@ while [[ $# -gt 0 ]]; do
       TO_DATE="$2"
       shift 2
       ;;
+    --jobs)
+      JOBS="$2"
+      shift 2
+      ;;
     --open)
       OPEN_REPORT=1
       shift
@@ -101,6 +107,7 @@ python3 scripts/collect_metrics.py \
   --range "$RANGE" \
   --from "$FROM_DATE" \
   --to "$TO_DATE" \
+  --jobs "$JOBS" \
   --config config/repos.yaml
 
 if [ $? -ne 0 ]; then
@@ -6,10 +6,14 @@ Collects git-based, test-based, and documentation metrics with full traceability
 No guessing. No hallucination. Every number traced to source.
 """
 
+import io
 import json
 import os
+import platform
 import subprocess
 import sys
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stdout
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
@@ -21,15 +25,26 @@ import re
 # Add parent to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from metrics import commit_columns
+from metrics.git_history import GitHistory, log_command, read_history, read_history_incremental
+from metrics.mirror_cache import checkout_worktree, is_mirror
+from metrics.utils import file_sha256
+
 class MetricsCollector:
     """Main collector orchestrating all metric sources."""
 
-    def __init__(self, config_path: str, time_range: str, custom_from: Optional[str] = None, custom_to: Optional[str] = None):
+    def __init__(self, config_path: str, time_range: str, custom_from: Optional[str] = None, custom_to: Optional[str] = None,
+                 jobs: int = 1, incremental: bool = False, columnar_commits: bool = False,
+                 github_graphql: bool = False):
         """Initialize with config and time range."""
         self.config_path = config_path
         self.time_range = time_range
         self.custom_from = custom_from
         self.custom_to = custom_to
+        self.jobs = max(1, jobs)
+        self.incremental = incremental
+        self.columnar_commits = columnar_commits
+        self.github_graphql = github_graphql
         self.config = self._load_config()
         self.start_time = datetime.now(timezone.utc)
         self.root = Path(__file__).parent.parent
@@ -37,24 +52,54 @@ class MetricsCollector:
         self.raw_dir = self.artifacts_dir / "raw"
         self.derived_dir = self.artifacts_dir / "derived"
         self.logs_dir = self.artifacts_dir / "logs"
+        self.state_dir = self.artifacts_dir / "state"
 
         # Create directories
-        for d in [self.raw_dir, self.derived_dir, self.logs_dir]:
+        for d in [self.raw_dir, self.derived_dir, self.logs_dir, self.state_dir]:
             d.mkdir(parents=True, exist_ok=True)
 
         # Compute date range
         self.date_from, self.date_to = self._compute_date_range()
         self.tz = timezone.utc
 
+        # Run-scoped provenance, resolved once and stamped on every evidence entry
+        self.provenance = self._resolve_provenance()
+
         # Collected metrics
         self.metrics = {}
         self.evidence_map = {}  # metric_id -> evidence metadata
 
+        # One git history walk per repo, shared by all git collectors
+        self._git_histories: Dict[str, GitHistory] = {}
+
+        # One GitHub client per run (created on first use) and one merged-PR
+        # download per repo, shared by every PR-derived metric
+        self._github_client = None
+        self._pull_requests: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._releases: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        # Keys of the datasets above that came from the batched GraphQL query
+        self._graphql_keys = set()
+
     def _load_config(self) -> Dict[str, Any]:
         """Load and validate configuration."""
         with open(self.config_path, 'r') as f:
             return yaml.safe_load(f)
 
+    def _resolve_provenance(self) -> Dict[str, str]:
+        """Resolve collector version, Python version and config hash for this run."""
+        try:
+            result = subprocess.run(["git", "rev-parse", "HEAD"],
+                                    capture_output=True, text=True, cwd=self.root)
+            collector_version = result.stdout.strip()[:8] if result.returncode == 0 else "unknown"
+        except OSError:
+            collector_version = "unknown"
+
+        return {
+            "collector_version": collector_version,
+            "python_version": platform.python_version(),
+            "config_hash": self._compute_file_hash(Path(self.config_path)),
+        }
+
     def _compute_date_range(self) -> Tuple[str, str]:
         """Compute ISO8601 date range based on time_range parameter."""
         now = datetime.now(timezone.utc)
@@ -94,20 +139,11 @@ class MetricsCollector:
         # Step 1: Preflight - what metrics can we compute?
         capabilities = self._run_preflight()
 
-        # Step 2: Collect git metrics (always available)
-        self._collect_git_metrics()
-
-        # Step 3: Collect test metrics (if artifacts exist)
-        self._collect_test_metrics()
-
-        # Step 4: Collect coverage metrics (if artifacts exist)
-        self._collect_coverage_metrics()
-
-        # Step 5: Collect documentation metrics
-        self._collect_docs_metrics()
-
-        # Step 6: Collect DORA metrics (deployment, lead time, failures)
-        self._collect_dora_metrics()
+        # Steps 2-6: git, test, coverage, docs and DORA metrics
+        if self.jobs > 1:
+            self._collect_parallel()
+        else:
+            self._collect_serial()
 
         # Step 7: Validate completeness
         self._validate_evidence_completeness()
@@ -118,6 +154,89 @@ class MetricsCollector:
         print(f"\n✅ Collection complete. Artifacts in: {self.artifacts_dir}")
         return True
 
+    def _collection_steps(self):
+        """Per-repo collection steps, in pipeline order."""
+        return [
+            # Step 2: Collect git metrics (always available)
+            self._collect_git_metrics,
+            # Step 3: Collect test metrics (if artifacts exist)
+            self._collect_test_metrics,
+            # Step 4: Collect coverage metrics (if artifacts exist)
+            self._collect_coverage_metrics,
+            # Step 5: Collect documentation metrics
+            self._collect_docs_metrics,
+            # Step 6: Collect DORA metrics (deployment, lead time, failures)
+            self._collect_dora_metrics,
+        ]
+
+    def __getstate__(self):
+        """Pickle for worker processes without the HTTP session; each worker opens its own."""
+        state = self.__dict__.copy()
+        state["_github_client"] = None
+        return state
+
+    def _repos(self, repos: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Repos a step should cover: the given subset, or all configured repos."""
+        return self.config["repos"] if repos is None else repos
+
+    def _git_path(self, repo_config: Dict[str, Any]) -> Optional[Path]:
+        """Where git collectors read history: the repo's shared mirror, else its checkout."""
+        if repo_config.get("mirror"):
+            mirror = self.root / repo_config["mirror"]
+            return mirror if is_mirror(mirror) else None
+        repo_path = self.root / repo_config["path"]
+        return repo_path if (repo_path / ".git").exists() else None
+
+    def _files_path(self, repo_config: Dict[str, Any]) -> Path:
+        """Working tree for file scans; mirrored repos get a worktree on first use."""
+        repo_path = self.root / repo_config["path"]
+        if repo_config.get("mirror"):
+            mirror = self._git_path(repo_config)
+            if mirror is not None:
+                checkout_worktree(mirror, repo_path)
+        return repo_path
+
+    def _collect_serial(self):
+        """Run every collection step across all repos in this process."""
+        for step in self._collection_steps():
+            step()
+
+    def _collect_parallel(self):
+        """Run each repo's full pipeline in a worker process.
+
+        Workers return their evidence per step; it is merged back step by
+        step in config order so the evidence map (and manifest) matches a
+        serial run. Worker logs are replayed in the same order.
+        """
+        repos = self.config["repos"]
+        print(f"[METRICS] Collecting {len(repos)} repos with {self.jobs} workers")
+
+        if self.github_graphql:
+            # One batched query for every repo; workers receive the datasets
+            from metrics.github_client import GitHubClient
+            from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+            self._prefetch_github_graphql(self._github(GitHubClient), repos, from_dt)
+
+        with ProcessPoolExecutor(max_workers=self.jobs) as pool:
+            results = list(pool.map(_collect_repo_worker, [(self, repo) for repo in repos]))
+
+        for repo_config, (log, _) in zip(repos, results):
+            print(f"[{repo_config['name']}]")
+            print(log, end="")
+
+        for step_index in range(len(self._collection_steps())):
+            for _, evidence_by_step in results:
+                self.evidence_map.update(evidence_by_step[step_index])
+
+    def _collect_repo(self, repo_config: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Run every collection step for one repo; return the evidence added by each step."""
+        evidence_by_step = []
+        for step in self._collection_steps():
+            self.evidence_map = {}
+            step([repo_config])
+            evidence_by_step.append(self.evidence_map)
+        return evidence_by_step
+
     def _run_preflight(self) -> Dict[str, Any]:
         """Identify what metrics can be computed."""
         capabilities = {
@@ -130,27 +249,27 @@ class MetricsCollector:
         for repo_config in self.config["repos"]:
             repo_name = repo_config["name"]
             repo_path = self.root / repo_config["path"]
+            git_path = self._git_path(repo_config)
 
             print(f"[PREFLIGHT] {repo_name}...")
 
-            if not repo_path.exists():
+            if git_path is None and not repo_path.exists():
                 print(f"  ❌ Repo path not found: {repo_path}")
                 capabilities["repos"][repo_name] = {"status": "missing"}
                 continue
 
             repo_info = {
                 "status": "available",
-                "path": str(repo_path),
+                "path": str(git_path or repo_path),
                 "language": repo_config.get("language", "unknown")
             }
 
             # Check git
-            git_dir = repo_path / ".git"
-            if git_dir.exists():
+            if git_path is not None:
                 try:
                     result = subprocess.run(
                         ["git", "rev-parse", "HEAD"],
-                        cwd=repo_path,
+                        cwd=git_path,
                         capture_output=True,
                         text=True,
                         timeout=5
@@ -206,26 +325,27 @@ class MetricsCollector:
         print()
         return capabilities
 
-    def _collect_git_metrics(self):
+    def _collect_git_metrics(self, repos: Optional[List[Dict[str, Any]]] = None):
         """Collect git-based metrics for all repos."""
         print("[GIT METRICS] Collecting...")
 
-        for repo_config in self.config["repos"]:
+        for repo_config in self._repos(repos):
             repo_name = repo_config["name"]
-            repo_path = self.root / repo_config["path"]
+            repo_path = self._git_path(repo_config)
 
-            if not repo_path.exists() or not (repo_path / ".git").exists():
+            if repo_path is None:
                 print(f"  ⚠️  {repo_name}: no git repo found, skipping")
                 continue
 
             print(f"  📊 {repo_name}...")
 
-            # commits.count
+            # commits.count (per-commit rows optionally go to a columnar sidecar)
+            columns_file = self.raw_dir / f"{repo_name}_commits.count.columns" if self.columnar_commits else None
             self._collect_metric(
                 metric_id=f"{repo_name}/commits.count",
                 repo_name=repo_name,
                 repo_path=repo_path,
-                collector_fn=self._count_commits
+                collector_fn=lambda p: self._count_commits(p, columns_file)
             )
 
             # diffs stats
@@ -256,9 +376,7 @@ class MetricsCollector:
                     "timezone": "UTC"
                 },
                 "collected_at": datetime.now(timezone.utc).isoformat(),
-                "collector_version": subprocess.run(["git", "rev-parse", "HEAD"],
-                                                   capture_output=True, text=True,
-                                                   cwd=self.root).stdout.strip()[:8],
+                **self.provenance,
                 "source": {"type": "git", "details": str(repo_path)},
                 "commands": commands,
                 "raw_file": str(raw_file),
@@ -271,56 +389,62 @@ class MetricsCollector:
         except Exception as e:
             print(f"    ❌ {metric_id}: {e}")
 
-    def _count_commits(self, repo_path: Path) -> Tuple[Dict, List[str]]:
-        """Count commits in date range and group by week."""
-        cmd = [
-            "git", "log",
-            f"--since={self.date_from}",
-            f"--until={self.date_to}",
-            "--format=%H%n%ai%n%an",
-            "--date=iso-strict"
-        ]
-        result = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True)
+    def _history_state_file(self, repo_path: Path) -> Path:
+        """Watermark + partial aggregates file for a repo under artifacts/state/.
+
+        Keyed by a hash of the resolved path, so repos sharing a directory name
+        never share (or, under --jobs, race on) one state file.
+        """
+        resolved = Path(repo_path).resolve()
+        digest = hashlib.sha256(str(resolved).encode()).hexdigest()[:12]
+        return self.state_dir / f"{resolved.name}-{digest}_git_history.json"
+
+    def _git_history(self, repo_path: Path) -> GitHistory:
+        """Return the commit table for repo_path, walking its history at most once."""
+        key = str(repo_path)
+        if key not in self._git_histories:
+            if self.incremental:
+                state_file = self._history_state_file(repo_path)
+                # Windows ending now move every run, so their state could never be reused
+                rolling = self.time_range in ("last_30_days", "last_90_days", "ytd")
+                history = read_history_incremental(
+                    repo_path, self.date_from, self.date_to, state_file, save_state=not rolling,
+                )
+            else:
+                history = read_history(repo_path, self.date_from, self.date_to)
+            self._git_histories[key] = history
+        return self._git_histories[key]
 
-        if result.returncode != 0:
-            raise RuntimeError(f"git log failed: {result.stderr}")
+    def _count_commits(self, repo_path: Path, columns_file: Optional[Path] = None) -> Tuple[Dict, List[str]]:
+        """Count commits in date range and group by week.
 
-        lines = [line for line in result.stdout.strip().split('\n') if line]
+        With columns_file, the per-commit list is written there in columnar
+        form and the JSON keeps only a hash pointer to it.
+        """
+        history = self._git_history(repo_path)
 
-        # Parse commits: every 3 lines = hash, date, author
         commits_by_week = {}
         commit_list = []
 
-        for i in range(0, len(lines), 3):
-            if i + 2 < len(lines):
-                commit_hash = lines[i]
-                commit_date_str = lines[i + 1]
-                commit_author = lines[i + 2]
+        for commit in history.commits:
+            # Skip malformed dates
+            if commit.week is None:
+                continue
 
-                # Parse date and extract week number
-                try:
-                    commit_date = datetime.fromisoformat(commit_date_str)
-                    # Get ISO calendar (year, week, weekday)
-                    iso_year, iso_week, _ = commit_date.isocalendar()
-                    week_key = f"{iso_year}-W{iso_week:02d}"
-
-                    if week_key not in commits_by_week:
-                        commits_by_week[week_key] = 0
-                    commits_by_week[week_key] += 1
-
-                    commit_list.append({
-                        "hash": commit_hash,
-                        "date": commit_date_str,
-                        "author": commit_author,
-                        "week": week_key
-                    })
-                except ValueError:
-                    # Skip malformed dates
-                    pass
+            if commit.week not in commits_by_week:
+                commits_by_week[commit.week] = 0
+            commits_by_week[commit.week] += 1
+
+            commit_list.append({
+                "hash": commit.sha,
+                "date": commit.date,
+                "author": commit.author,
+                "week": commit.week
+            })
 
         total_count = len(commit_list)
 
-        return {
+        raw_data = {
             "count": total_count,
             "range": {
                 "from": self.date_from,
@@ -328,66 +452,47 @@ class MetricsCollector:
             },
             "commits_by_week": commits_by_week,
             "commits_list": commit_list,
-            "command": " ".join(cmd)
-        }, [" ".join(cmd)]
+            "command": history.command
+        }
+
+        if columns_file is not None:
+            del raw_data["commits_list"]
+            raw_data["commits_columns"] = {
+                "format": commit_columns.FORMAT,
+                "file": columns_file.name,
+                "sha256": commit_columns.write_columns(columns_file, commit_list)
+            }
+
+        return raw_data, [history.command]
 
     def _collect_diff_stats(self, repo_path: Path) -> Tuple[Dict, List[str]]:
         """Collect LOC added/deleted stats."""
-        # Use git log with commit ranges to calculate diffs
-        cmd = [
-            "git", "log",
-            f"--since={self.date_from}",
-            f"--until={self.date_to}",
-            "--shortstat",
-            "--format="
-        ]
-        result = subprocess.run(cmd, cwd=repo_path, capture_output=True, text=True)
-
-        if result.returncode != 0:
+        try:
+            history = self._git_history(repo_path)
+        except RuntimeError:
             # No commits in range
             return {
                 "loc_added": 0,
                 "loc_deleted": 0,
                 "files_changed": 0,
                 "range": {"from": self.date_from, "to": self.date_to}
-            }, [" ".join(cmd)]
-
-        # Parse shortstat output from git log
-        output = result.stdout.strip()
-        loc_added = loc_deleted = files_changed = 0
-
-        # git log --shortstat shows stats for each commit, need to aggregate
-        for line in output.split('\n'):
-            line = line.strip()
-            if not line or "files changed" not in line:
-                continue
-
-            # Parse each stat line (one per commit)
-            parts = line.split(",")
-            for part in parts:
-                part = part.strip()
-                if "files changed" in part:
-                    files_changed += int(part.split()[0])
-                elif "insertions" in part:
-                    loc_added += int(part.split()[0])
-                elif "deletions" in part:
-                    loc_deleted += int(part.split()[0])
+            }, [" ".join(log_command(self.date_from, self.date_to))]
 
+        # Aggregated from per-commit --numstat lines
         return {
-            "loc_added": loc_added,
-            "loc_deleted": loc_deleted,
-            "files_changed": files_changed,
-            "range": {"from": self.date_from, "to": self.date_to},
-            "raw_output": output
-        }, [" ".join(cmd)]
-
-    def _collect_test_metrics(self):
+            "loc_added": history.total("loc_added"),
+            "loc_deleted": history.total("loc_deleted"),
+            "files_changed": history.total("files_changed"),
+            "range": {"from": self.date_from, "to": self.date_to}
+        }, [history.command]
+
+    def _collect_test_metrics(self, repos: Optional[List[Dict[str, Any]]] = None):
         """Collect test metrics (if CI artifacts exist)."""
         print("[TEST METRICS] Checking for test artifacts...")
 
         ci_artifacts_base = self.root / "ci_artifacts"
 
-        for repo_config in self.config["repos"]:
+        for repo_config in self._repos(repos):
             repo_name = repo_config["name"]
 
             # Build expected ci_artifacts path
@@ -495,11 +600,11 @@ class MetricsCollector:
                 "error": str(e)
             }, commands
 
-    def _collect_coverage_metrics(self):
+    def _collect_coverage_metrics(self, repos: Optional[List[Dict[str, Any]]] = None):
         """Collect coverage metrics (if artifacts exist)."""
         print("[COVERAGE METRICS] Checking for coverage reports...")
 
-        for repo_config in self.config["repos"]:
+        for repo_config in self._repos(repos):
             repo_name = repo_config["name"]
             ci_path = repo_config.get("ci_artifacts_path")
 
@@ -601,14 +706,18 @@ class MetricsCollector:
                 "error": str(e)
             }, commands
 
-    def _collect_docs_metrics(self):
+    def _collect_docs_metrics(self, repos: Optional[List[Dict[str, Any]]] = None):
         """Collect documentation coverage metrics."""
         print("[DOCS METRICS] Collecting by language...")
 
-        for repo_config in self.config["repos"]:
+        for repo_config in self._repos(repos):
             repo_name = repo_config["name"]
-            repo_path = self.root / repo_config["path"]
             language = repo_config.get("language", "unknown")
+            try:
+                repo_path = self._files_path(repo_config)
+            except RuntimeError as e:
+                print(f"  ⚠️  {repo_name}: could not check out worktree: {e}")
+                continue
 
             if not repo_path.exists():
                 continue
@@ -768,6 +877,7 @@ class MetricsCollector:
             "date_from": self.date_from,
             "date_to": self.date_to,
             "timezone": "UTC",
+            "provenance": self.provenance,
             "preflight": capabilities,
             "metrics_collected": list(self.evidence_map.keys()),
             "evidence_map": self.evidence_map,
@@ -785,13 +895,9 @@ class MetricsCollector:
 
     def _compute_file_hash(self, file_path: Path) -> str:
         """Compute SHA256 hash of a file."""
-        sha256_hash = hashlib.sha256()
-        with open(file_path, "rb") as f:
-            for byte_block in iter(lambda: f.read(4096), b""):
-                sha256_hash.update(byte_block)
-        return sha256_hash.hexdigest()
+        return file_sha256(file_path)
 
-    def _collect_dora_metrics(self):
+    def _collect_dora_metrics(self, repos: Optional[List[Dict[str, Any]]] = None):
         """Collect DORA metrics (Deployment Frequency, Lead Time, CFR, MTTR)."""
         print("[DORA METRICS] Collecting...")
 
@@ -808,11 +914,15 @@ class MetricsCollector:
             print(f"  ⚠️  GitHub client not available ({e}), skipping DORA metrics")
             return
 
-        for repo_config in self.config["repos"]:
+        if self.github_graphql:
+            from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+            self._prefetch_github_graphql(self._github(GitHubClient), self._repos(repos), from_dt)
+
+        for repo_config in self._repos(repos):
             repo_name = repo_config["name"]
-            repo_path = self.root / repo_config["path"]
+            repo_path = self._git_path(repo_config)
 
-            if not repo_path.exists() or not (repo_path / ".git").exists():
+            if repo_path is None:
                 print(f"  ⚠️  {repo_name}: no git repo found, skipping DORA metrics")
                 continue
 
@@ -826,10 +936,11 @@ class MetricsCollector:
 
             print(f"  📊 {repo_name}...")
 
+            from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+
             # Collect deployment frequency
             try:
-                client = GitHubClient()
-                from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+                client = self._github(GitHubClient)
                 self._collect_metric(
                     metric_id=f"{repo_name}/deployments.metrics",
                     repo_name=repo_name,
@@ -839,10 +950,9 @@ class MetricsCollector:
             except Exception as e:
                 print(f"    ⚠️  Deployment metrics failed: {e}")
 
-            # Collect lead time and PR cycle time
+            # Collect lead time and PR cycle time from one PR download
             try:
-                client = GitHubClient()
-                from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+                client = self._github(GitHubClient)
                 self._collect_metric(
                     metric_id=f"{repo_name}/lead_time.metrics",
                     repo_name=repo_name,
@@ -854,8 +964,7 @@ class MetricsCollector:
 
             # Collect PR cycle time (same as lead time for now)
             try:
-                client = GitHubClient()
-                from_dt = datetime.fromisoformat(self.date_from.replace('Z', '+00:00'))
+                client = self._github(GitHubClient)
                 self._collect_metric(
                     metric_id=f"{repo_name}/pr_cycle_time.metrics",
                     repo_name=repo_name,
@@ -909,12 +1018,65 @@ class MetricsCollector:
             except Exception as e:
                 print(f"    ⚠️  Refactor metrics failed: {e}")
 
+        if self._github_client is not None:
+            print(f"  GitHub API budget: {self._github_client.rate_limiter.stats()}")
+
+    def _github(self, client_cls):
+        """Return the run's GitHub client, creating it on first use."""
+        if self._github_client is None:
+            self._github_client = client_cls()
+        return self._github_client
+
+    def _merged_pull_requests(self, client, owner: str, repo: str, since: datetime) -> List[Dict[str, Any]]:
+        """Merged PRs for owner/repo since `since`, downloaded at most once per run."""
+        key = (owner, repo, since.isoformat())
+        if key not in self._pull_requests:
+            self._pull_requests[key] = client.get_pull_requests(owner, repo, since=since)
+        return self._pull_requests[key]
+
+    def _releases_since(self, client, owner: str, repo: str, since: datetime) -> List[Dict[str, Any]]:
+        """Releases for owner/repo since `since`, downloaded at most once per run."""
+        key = (owner, repo, since.isoformat())
+        if key not in self._releases:
+            self._releases[key] = client.get_releases(owner, repo, since=since)
+        return self._releases[key]
+
+    def _prefetch_github_graphql(self, client, repos: List[Dict[str, Any]], since: datetime) -> None:
+        """Fill the PR and release datasets for all repos from batched GraphQL queries.
+
+        On failure the datasets stay empty and each metric falls back to REST.
+        """
+        targets = [
+            (rc["github_owner"], rc["github_repo"])
+            for rc in repos if rc.get("github_owner") and rc.get("github_repo")
+            and (rc["github_owner"], rc["github_repo"], since.isoformat()) not in self._graphql_keys
+        ]
+        if not targets:
+            return
+        try:
+            delivery = client.get_delivery_data(targets, since=since)
+        except Exception as e:
+            print(f"  ⚠️  GitHub GraphQL batch failed ({e}), falling back to REST")
+            return
+        for (owner, repo), data in delivery.items():
+            key = (owner, repo, since.isoformat())
+            self._pull_requests[key] = data["pull_requests"]
+            self._releases[key] = data["releases"]
+            self._graphql_keys.add(key)
+
+    def _github_command(self, owner: str, repo: str, since: datetime, rest_path: str, connection: str) -> str:
+        """Evidence command for a GitHub dataset, naming the API it actually came from."""
+        if (owner, repo, since.isoformat()) in self._graphql_keys:
+            return f"POST /graphql repository(owner: {owner}, name: {repo}) {{ {connection} }} since={since.isoformat()}"
+        return f"GET /repos/{owner}/{repo}/{rest_path} since={since.isoformat()}"
+
     def _collect_deployment_metrics(self, client, owner: str, repo: str, since: datetime) -> Tuple[Dict, List[str]]:
         """Collect deployment frequency from GitHub releases."""
         commands = [f"GET /repos/{owner}/{repo}/releases since={since.isoformat()}"]
 
         try:
-            releases = client.get_releases(owner, repo, since=since)
+            releases = self._releases_since(client, owner, repo, since)
+            commands = [self._github_command(owner, repo, since, "releases", "releases")]
 
             # Calculate frequency
             from_dt = since
@@ -950,11 +1112,12 @@ class MetricsCollector:
             }, commands
 
     def _collect_lead_time_metrics(self, client, owner: str, repo: str, since: datetime) -> Tuple[Dict, List[str]]:
-        """Collect lead time from GitHub PRs."""
+        """Collect lead time from GitHub PRs (the shared per-run PR dataset)."""
         commands = [f"GET /repos/{owner}/{repo}/pulls since={since.isoformat()}"]
 
         try:
-            prs = client.get_pull_requests(owner, repo, since=since)
+            prs = self._merged_pull_requests(client, owner, repo, since)
+            commands = [self._github_command(owner, repo, since, "pulls", "pullRequests")]
 
             # Calculate lead times
             lead_times_hours = []
@@ -1003,30 +1166,20 @@ class MetricsCollector:
 
         try:
             # Search for revert/rollback/hotfix commits
-            result = subprocess.run(
-                ["git", "log", f"--since={self.date_from}", f"--until={self.date_to}",
-                 "--grep=revert", "--grep=rollback", "--grep=hotfix",
-                 "--all-match", "--format=%H|%ai|%s"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            if result.returncode != 0:
+            try:
+                history = self._git_history(repo_path)
+            except RuntimeError:
                 return {"failures": [], "count": 0, "rate_percent": 0}, commands
+            commands = [f"{history.command} | grep revert+rollback+hotfix (all-match)"]
 
-            failures = []
-            for line in result.stdout.strip().split('\n'):
-                if not line:
-                    continue
-                parts = line.split('|')
-                if len(parts) >= 3:
-                    failures.append({
-                        "sha": parts[0],
-                        "timestamp": parts[1],
-                        "message": parts[2]
-                    })
+            failures = [
+                {
+                    "sha": commit.sha,
+                    "timestamp": commit.date,
+                    "message": commit.message.split('\n', 1)[0]
+                }
+                for commit in history.grep("revert", "rollback", "hotfix")
+            ]
 
             # For CFR, we need deployment count (use tag count as approximation)
             tags_result = subprocess.run(
@@ -1067,33 +1220,28 @@ class MetricsCollector:
 
         try:
             # Find revert/hotfix commits
-            result = subprocess.run(
-                ["git", "log", f"--since={self.date_from}", f"--until={self.date_to}",
-                 "--grep=revert", "--grep=hotfix", "--all-match",
-                 "--format=%H|%ai"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            try:
+                history = self._git_history(repo_path)
+            except RuntimeError:
+                history = GitHistory()
+            recoveries = history.grep("revert", "hotfix")
 
-            if result.returncode != 0 or not result.stdout.strip():
+            if not recoveries:
                 return {
                     "incidents": [],
                     "average_hours": 0,
                     "median_hours": 0,
                     "range": {"from": self.date_from, "to": self.date_to}
                 }, commands
+            commands = [f"{history.command} | grep revert+hotfix (all-match)"]
 
             # Parse recovery times (simplified: use time between commits)
             recovery_times = []
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    try:
-                        sha, timestamp = line.split('|')
-                        recovery_times.append(float(timestamp))
-                    except:
-                        pass
+            for commit in recoveries:
+                try:
+                    recovery_times.append(datetime.fromisoformat(commit.date).timestamp())
+                except ValueError:
+                    pass
 
             if not recovery_times:
                 avg_hours = 0
@@ -1131,28 +1279,20 @@ class MetricsCollector:
         commands = ["git log --name-only --pretty=format: --diff-filter=ACMR"]
 
         try:
-            # Get file change frequency
-            result = subprocess.run(
-                ["git", "log", f"--since={self.date_from}", f"--until={self.date_to}",
-                 "--name-only", "--pretty=format:", "--diff-filter=ACMR"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            # Get file change frequency (--raw statuses A/C/M/R)
+            try:
+                history = self._git_history(repo_path)
+                file_counts = history.churn()
+            except RuntimeError:
+                file_counts = {}
 
-            if result.returncode != 0 or not result.stdout.strip():
+            if not file_counts:
                 return {
                     "total_files_changed": 0,
                     "top_files": [],
                     "range": {"from": self.date_from, "to": self.date_to}
                 }, commands
-
-            # Count file changes
-            file_counts = {}
-            for line in result.stdout.strip().split('\n'):
-                if line:
-                    file_counts[line] = file_counts.get(line, 0) + 1
+            commands = [f"{history.command} (status A/C/M/R)"]
 
             # Get top 10 most changed files
             sorted_files = sorted(file_counts.items(), key=lambda x: x[1], reverse=True)[:10]
@@ -1180,36 +1320,22 @@ class MetricsCollector:
 
         try:
             # Find refactor commits
-            result = subprocess.run(
-                ["git", "log", f"--since={self.date_from}", f"--until={self.date_to}",
-                 "--grep=refactor", "--grep=cleanup", "--grep=restructure", "--all-match",
-                 "--format=%H|%s"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
+            try:
+                history = self._git_history(repo_path)
+            except RuntimeError:
+                history = GitHistory()
+            refactor_commits = len(history.grep("refactor", "cleanup", "restructure"))
 
-            if result.returncode != 0 or not result.stdout.strip():
+            if not refactor_commits:
                 return {
                     "refactor_commits": 0,
                     "refactor_ratio": 0,
                     "range": {"from": self.date_from, "to": self.date_to}
                 }, commands
+            commands = [f"{history.command} | grep refactor+cleanup+restructure (all-match)"]
 
-            refactor_commits = len([l for l in result.stdout.strip().split('\n') if l])
-
-            # Get total commits for ratio
-            total_result = subprocess.run(
-                ["git", "log", f"--since={self.date_from}", f"--until={self.date_to}",
-                 "--format=%H"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-                timeout=30
-            )
-
-            total_commits = len([l for l in total_result.stdout.strip().split('\n') if l]) if total_result.returncode == 0 else 1
+            # Total commits for ratio come from the same history walk
+            total_commits = len(history.commits)
             refactor_ratio = (refactor_commits / max(1, total_commits)) * 100
 
             return {
@@ -1230,6 +1356,15 @@ class MetricsCollector:
             }, commands
 
 
+def _collect_repo_worker(args: Tuple[MetricsCollector, Dict[str, Any]]) -> Tuple[str, List[Dict[str, Any]]]:
+    """Process-pool entry point: run one repo's pipeline, capturing its log."""
+    collector, repo_config = args
+    log = io.StringIO()
+    with redirect_stdout(log):
+        evidence_by_step = collector._collect_repo(repo_config)
+    return log.getvalue(), evidence_by_step
+
+
 def main():
     """Main entry point."""
     import argparse
@@ -1240,6 +1375,14 @@ def main():
     parser.add_argument("--from", dest="from_date", help="Custom range start (ISO8601)")
     parser.add_argument("--to", dest="to_date", help="Custom range end (ISO8601)")
     parser.add_argument("--config", default="config/repos.yaml")
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Collect up to N repos in parallel worker processes")
+    parser.add_argument("--full-history", action="store_true",
+                        help="Ignore stored git watermarks and re-walk the whole range")
+    parser.add_argument("--columnar-commits", action="store_true",
+                        help="Store per-commit rows in a compact columnar sidecar instead of raw JSON")
+    parser.add_argument("--github-graphql", action="store_true",
+                        help="Fetch PRs and releases for all repos in batched GitHub GraphQL queries")
 
     args = parser.parse_args()
 
@@ -1247,7 +1390,11 @@ def main():
         args.config,
         args.range,
         custom_from=args.from_date,
-        custom_to=args.to_date
+        custom_to=args.to_date,
+        jobs=args.jobs,
+        incremental=not args.full_history,
+        columnar_commits=args.columnar_commits,
+        github_graphql=args.github_graphql
     )
 
     try:
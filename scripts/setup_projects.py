@@ -1,21 +1,30 @@
 #!/usr/bin/env python3
 """
-Setup script that reads projects.json and clones/configures projects for analysis.
+Setup script that reads projects.json and mirrors/configures projects for analysis.
 Creates config/repos.yaml from the projects specified in projects.json.
+
+Each project is kept as a bare mirror under .cache/repos, created or
+refreshed with one parallel fetch. Git metrics read the mirrors directly;
+worktrees under .cache/repos/worktrees are checked out by the collector
+only for file scans.
 """
 
 import json
-import subprocess
+import os
 import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics.mirror_cache import DEFAULT_CACHE_DIR, DEFAULT_WORKERS, MirrorCache
+
 def setup_projects():
     """Read projects.json and setup repositories."""
 
     root = Path(__file__).parent.parent
     projects_file = root / "projects.json"
     config_file = root / "config" / "repos.yaml"
-    projects_dir = root / ".."  # Parent directory where projects are cloned
+    cache = MirrorCache(root / DEFAULT_CACHE_DIR, int(os.getenv("METRICS_MIRROR_JOBS", DEFAULT_WORKERS)))
 
     # Load projects
     if not projects_file.exists():
@@ -42,6 +51,7 @@ def setup_projects():
     repos_yaml += "# Auto-generated from projects.json\n"
     repos_yaml += "# DO NOT EDIT - modify projects.json instead\n\n"
     repos_yaml += "repos:\n"
+    urls = []
 
     for i, project in enumerate(projects, 1):
         url = project.get("url", "").strip()
@@ -57,33 +67,21 @@ def setup_projects():
 
         # Use custom local_dir if provided, otherwise use repo_name from URL
         local_dir = project.get("local_dir", repo_name)
+        mirror = cache.path(url).relative_to(root).as_posix()
+        worktree = f"{DEFAULT_CACHE_DIR}/worktrees/{local_dir}"
 
         print(f"{i}. {project_name}")
         print(f"   URL: {url}")
-
-        # Check if repo exists locally
-        repo_path = projects_dir / local_dir
-        if not repo_path.exists():
-            print(f"   Cloning...")
-            try:
-                subprocess.run(
-                    ["git", "clone", url, str(repo_path)],
-                    capture_output=True,
-                    timeout=60
-                )
-                print(f"   ✅ Cloned to {repo_path}")
-            except Exception as e:
-                print(f"   ❌ Clone failed: {e}")
-                return False
-        else:
-            print(f"   ✅ Already exists at {repo_path}")
+        print(f"   Mirror: {mirror}")
+        urls.append(url)
 
         # Add to repos.yaml
         language = project.get("language", "mixed")
         description = project.get("description", repo_name)
 
         repos_yaml += f"  - name: {project_name}\n"
-        repos_yaml += f"    path: ../{local_dir}\n"
+        repos_yaml += f"    mirror: {mirror}\n"
+        repos_yaml += f"    path: {worktree}\n"
         repos_yaml += f"    github_url: \"{url}\"\n"
         repos_yaml += f"    default_branch: main\n"
         repos_yaml += f"    language: {language}\n"
@@ -92,6 +90,16 @@ def setup_projects():
 
         print()
 
+    # One parallel fetch for every mirror instead of a clone per repo
+    print(f"🔄 Syncing {len(urls)} mirror(s) in {cache.cache_dir} ({cache.max_workers} parallel)...")
+    errors = {url: error for url, error in cache.sync(urls).items() if error}
+    for url, error in errors.items():
+        print(f"   ❌ {url}: {error}")
+    if errors:
+        return False
+    print("   ✅ Mirrors up to date")
+    print()
+
     # Add default sections to repos.yaml
     repos_yaml += """# Time zone for all timestamps
 timezone: UTC
@@ -0,0 +1,84 @@
+-- 0 -> 1: rebuild child tables with ON DELETE CASCADE foreign keys (dropping
+-- rows orphaned by earlier purges) and add the time-range indexes.
+-- SQLite cannot add a foreign key in place, hence the copy-and-rename.
+
+CREATE TABLE commit_counts_v1 (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+  date TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (snapshot_id, date)
+);
+INSERT INTO commit_counts_v1 SELECT snapshot_id, date, count FROM commit_counts
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE commit_counts;
+ALTER TABLE commit_counts_v1 RENAME TO commit_counts;
+
+CREATE TABLE loc_totals_v1 (
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
+  total INTEGER,
+  code INTEGER,
+  comment INTEGER,
+  blank INTEGER
+);
+INSERT INTO loc_totals_v1 SELECT snapshot_id, total, code, comment, blank FROM loc_totals
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE loc_totals;
+ALTER TABLE loc_totals_v1 RENAME TO loc_totals;
+
+CREATE TABLE test_totals_v1 (
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
+  count INTEGER
+);
+INSERT INTO test_totals_v1 SELECT snapshot_id, count FROM test_totals
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE test_totals;
+ALTER TABLE test_totals_v1 RENAME TO test_totals;
+
+CREATE TABLE file_types_v1 (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+  extension TEXT NOT NULL,
+  files INTEGER,
+  loc INTEGER,
+  PRIMARY KEY (snapshot_id, extension)
+);
+INSERT INTO file_types_v1 SELECT snapshot_id, extension, files, loc FROM file_types
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE file_types;
+ALTER TABLE file_types_v1 RENAME TO file_types;
+
+CREATE TABLE epic_stats_v1 (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+  epic_key TEXT NOT NULL,
+  commits INTEGER,
+  loc INTEGER,
+  PRIMARY KEY (snapshot_id, epic_key)
+);
+INSERT INTO epic_stats_v1 SELECT snapshot_id, epic_key, commits, loc FROM epic_stats
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE epic_stats;
+ALTER TABLE epic_stats_v1 RENAME TO epic_stats;
+
+CREATE TABLE source_files_v1 (
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
+  path TEXT NOT NULL,
+  loc INTEGER,
+  extension TEXT,
+  PRIMARY KEY (snapshot_id, path)
+);
+INSERT INTO source_files_v1 SELECT snapshot_id, path, loc, extension FROM source_files
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE source_files;
+ALTER TABLE source_files_v1 RENAME TO source_files;
+
+CREATE TABLE coverage_totals_v1 (
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
+  line_rate REAL,
+  branch_rate REAL
+);
+INSERT INTO coverage_totals_v1 SELECT snapshot_id, line_rate, branch_rate FROM coverage_totals
+  WHERE snapshot_id IN (SELECT id FROM snapshots);
+DROP TABLE coverage_totals;
+ALTER TABLE coverage_totals_v1 RENAME TO coverage_totals;
+
+CREATE INDEX IF NOT EXISTS idx_commit_counts_date ON commit_counts(date);
+CREATE INDEX IF NOT EXISTS idx_source_files_snapshot_loc ON source_files(snapshot_id, loc DESC);
@@ -1,3 +1,10 @@
+-- Schema version 1 (see PRAGMA user_version at the end). Existing databases
+-- are upgraded by the scripts in sql/migrations/ instead of this file.
+
+-- New databases are created with incremental auto-vacuum (see
+-- metrics.storage.connect) so `metrics vacuum` can release pages cheaply.
+
+-- snapshot_date is UNIQUE, which already gives it an index
 CREATE TABLE IF NOT EXISTS snapshots (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   snapshot_date TEXT UNIQUE NOT NULL,
@@ -5,14 +12,14 @@ CREATE TABLE IF NOT EXISTS snapshots (
 );
 
 CREATE TABLE IF NOT EXISTS commit_counts (
-  snapshot_id INTEGER NOT NULL,
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
   date TEXT NOT NULL,
   count INTEGER NOT NULL,
   PRIMARY KEY (snapshot_id, date)
 );
 
 CREATE TABLE IF NOT EXISTS loc_totals (
-  snapshot_id INTEGER PRIMARY KEY,
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
   total INTEGER,
   code INTEGER,
   comment INTEGER,
@@ -20,12 +27,12 @@ CREATE TABLE IF NOT EXISTS loc_totals (
 );
 
 CREATE TABLE IF NOT EXISTS test_totals (
-  snapshot_id INTEGER PRIMARY KEY,
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
   count INTEGER
 );
 
 CREATE TABLE IF NOT EXISTS file_types (
-  snapshot_id INTEGER NOT NULL,
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
   extension TEXT NOT NULL,
   files INTEGER,
   loc INTEGER,
@@ -33,7 +40,7 @@ CREATE TABLE IF NOT EXISTS file_types (
 );
 
 CREATE TABLE IF NOT EXISTS epic_stats (
-  snapshot_id INTEGER NOT NULL,
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
   epic_key TEXT NOT NULL,
   commits INTEGER,
   loc INTEGER,
@@ -41,7 +48,7 @@ CREATE TABLE IF NOT EXISTS epic_stats (
 );
 
 CREATE TABLE IF NOT EXISTS source_files (
-  snapshot_id INTEGER NOT NULL,
+  snapshot_id INTEGER NOT NULL REFERENCES snapshots(id) ON DELETE CASCADE,
   path TEXT NOT NULL,
   loc INTEGER,
   extension TEXT,
@@ -49,7 +56,12 @@ CREATE TABLE IF NOT EXISTS source_files (
 );
 
 CREATE TABLE IF NOT EXISTS coverage_totals (
-  snapshot_id INTEGER PRIMARY KEY,
+  snapshot_id INTEGER PRIMARY KEY REFERENCES snapshots(id) ON DELETE CASCADE,
   line_rate REAL,
   branch_rate REAL
 );
+
+CREATE INDEX IF NOT EXISTS idx_commit_counts_date ON commit_counts(date);
+CREATE INDEX IF NOT EXISTS idx_source_files_snapshot_loc ON source_files(snapshot_id, loc DESC);
+
+PRAGMA user_version = 1;
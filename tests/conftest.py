@@ -1,6 +1,48 @@
+import os
+import subprocess
 import sys
 from pathlib import Path
 
+import pytest
+
 # Add the project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "benchmark: timing and scale benchmarks, run with RUN_BENCHMARKS=1")
+
+
+def pytest_collection_modifyitems(config, items):
+    if os.getenv("RUN_BENCHMARKS") == "1":
+        return
+    skip = pytest.mark.skip(reason="benchmark: set RUN_BENCHMARKS=1 to run")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip)
+
+
+def run_git(repo, *args, env=None):
+    """Run git in repo under a fixed test identity and return its stdout."""
+    return subprocess.run(
+        ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+        cwd=repo, check=True, capture_output=True, text=True, env=env,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def git():
+    return run_git
+
+
+@pytest.fixture
+def commit():
+    """Write one file and commit it; date sets both author and committer dates."""
+    def commit(repo, name, message, content=None, date=None):
+        (repo / name).write_text(f"{message}\n" if content is None else content)
+        run_git(repo, "add", ".")
+        env = dict(os.environ, GIT_AUTHOR_DATE=date, GIT_COMMITTER_DATE=date) if date else None
+        run_git(repo, "commit", "-q", "-m", message, env=env)
+
+    return commit
@@ -4,7 +4,9 @@ Unit tests for metrics collection engine.
 Tests that metrics are collected correctly from git and CI artifacts.
 """
 
+import io
 import json
+import subprocess
 import tempfile
 import unittest
 from datetime import datetime, timedelta, timezone
@@ -15,6 +17,15 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 
 from collect_metrics import MetricsCollector
+from metrics.commit_columns import read_columns
+
+
+def fake_git_log(stdout, returncode=0):
+    """Stand-in for a streaming git log Popen process."""
+    proc = MagicMock(returncode=returncode)
+    proc.stdout = io.BytesIO(stdout.encode("utf-8"))
+    proc.wait.return_value = returncode
+    return proc
 
 
 class TestDateRangeComputation(unittest.TestCase):
@@ -117,10 +128,9 @@ repos:
         collector = MetricsCollector(str(self.config_file), "last_30_days")
 
         # Mock subprocess to return test data
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(
-                returncode=0,
-                stdout="hash1\n2026-01-31T00:00:00+00:00\nauthor1\n"
+        with patch('subprocess.Popen') as mock_popen:
+            mock_popen.return_value = fake_git_log(
+                "\x1ehash1\x1f2026-01-31 00:00:00 +0000\x1fauthor1\x1fInitial commit\n\x1f\n"
             )
 
             result, commands = collector._count_commits(Path("."))
@@ -130,15 +140,32 @@ repos:
             self.assertIn("count", result)
             self.assertGreater(len(commands), 0)
 
+    def test_commit_count_columnar_sidecar(self):
+        """With a columns file, commits_list is replaced by a hash pointer."""
+        collector = MetricsCollector(str(self.config_file), "last_30_days")
+        columns_file = Path(self.temp_dir.name) / "TestRepo_commits.count.columns"
+
+        with patch('subprocess.Popen') as mock_popen:
+            mock_popen.return_value = fake_git_log(
+                "\x1e" + "ab" * 20 + "\x1f2026-01-31 00:00:00 +0000\x1fauthor1\x1fInitial commit\n\x1f\n"
+            )
+            result, _ = collector._count_commits(Path("."), columns_file)
+
+        self.assertNotIn("commits_list", result)
+        pointer = result["commits_columns"]
+        self.assertEqual(pointer["file"], columns_file.name)
+        self.assertEqual(pointer["sha256"], collector._compute_file_hash(columns_file))
+        self.assertEqual(read_columns(columns_file)[0]["author"], "author1")
+
     def test_diff_stats_parsing(self):
         """Test git diff stats parsing."""
         collector = MetricsCollector(str(self.config_file), "last_30_days")
 
         # Mock subprocess
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(
-                returncode=0,
-                stdout="10 files changed, 250 insertions(+), 100 deletions(-)\n"
+        with patch('subprocess.Popen') as mock_popen:
+            numstat = "".join(f"25\t10\tsrc/file{i}.py\n" for i in range(10))
+            mock_popen.return_value = fake_git_log(
+                "\x1ehash1\x1f2026-01-31 00:00:00 +0000\x1fauthor1\x1fChange files\n\x1f\n\n" + numstat
             )
 
             result, commands = collector._collect_diff_stats(Path("."))
@@ -152,8 +179,8 @@ repos:
         collector = MetricsCollector(str(self.config_file), "last_30_days")
 
         # Mock subprocess to fail (no commits)
-        with patch('subprocess.run') as mock_run:
-            mock_run.return_value = MagicMock(returncode=1, stderr="")
+        with patch('subprocess.Popen') as mock_popen:
+            mock_popen.return_value = fake_git_log("", returncode=1)
 
             result, commands = collector._collect_diff_stats(Path("."))
 
@@ -162,6 +189,217 @@ repos:
             self.assertEqual(result["files_changed"], 0)
 
 
+class TestSharedGitHistory(unittest.TestCase):
+    """Test that all git collectors share a single history walk."""
+
+    LOG_OUTPUT = (
+        "\x1eaaa111\x1f2026-01-30 10:00:00 +0000\x1falice\x1fhotfix: revert and rollback release\n\x1f\n"
+        "\n"
+        ":100644 100644 1111111 2222222 M\tsrc/app.py\n"
+        ":100644 000000 3333333 0000000 D\tsrc/old.py\n"
+        "5\t2\tsrc/app.py\n"
+        "0\t40\tsrc/old.py\n"
+        "\x1ebbb222\x1f2026-01-29 09:00:00 +0000\x1fbob\x1frefactor: cleanup and restructure\n\nLonger body.\n\x1f\n"
+        "\n"
+        ":000000 100644 0000000 4444444 A\tsrc/app.py\n"
+        "12\t0\tsrc/app.py\n"
+    )
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_file = Path(self.temp_dir.name) / "config.yaml"
+        with open(self.config_file, 'w') as f:
+            f.write("""
+repos:
+  - name: TestRepo
+    path: .
+    language: python
+""")
+
+    def tearDown(self):
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def test_single_git_log_for_all_collectors(self):
+        """Six git collectors spawn exactly one git log."""
+        collector = MetricsCollector(str(self.config_file), "last_30_days")
+
+        with patch('subprocess.Popen') as mock_popen, patch('subprocess.run') as mock_run:
+            mock_popen.side_effect = lambda cmd, **kwargs: fake_git_log(self.LOG_OUTPUT)
+            mock_run.return_value = MagicMock(returncode=0, stdout="v1\nv2\n", stderr="")
+            count, _ = collector._count_commits(Path("."))
+            diffs, _ = collector._collect_diff_stats(Path("."))
+            failures, _ = collector._collect_failure_metrics(Path("."))
+            mttr, _ = collector._collect_mttr_metrics(Path("."))
+            churn, _ = collector._collect_file_churn(Path("."))
+            refactor, _ = collector._collect_refactor_metrics(Path("."))
+
+            git_logs = [c for c in mock_popen.call_args_list if c.args[0][:2] == ["git", "log"]]
+            self.assertEqual(len(git_logs), 1)
+            self.assertFalse([c for c in mock_run.call_args_list if c.args[0][:2] == ["git", "log"]])
+
+        self.assertEqual(count["count"], 2)
+        self.assertEqual(count["commits_by_week"], {"2026-W05": 2})
+        self.assertEqual(diffs["loc_added"], 17)
+        self.assertEqual(diffs["loc_deleted"], 42)
+        self.assertEqual(diffs["files_changed"], 3)
+        self.assertEqual(failures["count"], 1)
+        self.assertEqual(failures["failures"][0]["sha"], "aaa111")
+        self.assertEqual(mttr["incidents"], 1)
+        # Deleted files are not churn
+        self.assertEqual(churn["top_files"], [{"file": "src/app.py", "changes": 2}])
+        self.assertEqual(refactor["refactor_commits"], 1)
+        self.assertEqual(refactor["total_commits"], 2)
+
+    def test_state_files_differ_for_repos_with_same_name(self):
+        """Same-named repos in different directories keep separate watermarks."""
+        collector = MetricsCollector(str(self.config_file), "last_30_days")
+        root = Path(self.temp_dir.name)
+
+        first = collector._history_state_file(root / "a" / "app")
+        second = collector._history_state_file(root / "b" / "app")
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(first, collector._history_state_file(root / "a" / ".." / "a" / "app"))
+        self.assertTrue(first.name.startswith("app-"))
+
+
+class TestParallelCollection(unittest.TestCase):
+    """Test that --jobs N produces the same evidence as a serial run."""
+
+    def setUp(self):
+        """Create two small git repos and a config pointing at them."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        repos_yaml = "repos:\n"
+        for name, commits in [("RepoA", 3), ("RepoB", 2)]:
+            repo = base / name
+            repo.mkdir()
+            self._git(repo, "init", "-q")
+            for i in range(commits):
+                (repo / f"mod{i}.py").write_text(f'def f{i}():\n    """Doc."""\n')
+                self._git(repo, "add", ".")
+                self._git(repo, "commit", "-q", "-m", f"commit {i}")
+            repos_yaml += f"  - name: {name}\n    path: {repo}\n    language: python\n"
+
+        self.config_file = base / "config.yaml"
+        self.config_file.write_text(repos_yaml)
+
+    def tearDown(self):
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def _git(self, repo, *args):
+        subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+            cwd=repo, check=True, capture_output=True
+        )
+
+    def _collect(self, jobs):
+        collector = MetricsCollector(str(self.config_file), "last_30_days", jobs=jobs)
+        collector.raw_dir = Path(self.temp_dir.name) / f"raw_{jobs}"
+        collector.raw_dir.mkdir()
+        collector.date_from, collector.date_to = self.date_range
+        if jobs > 1:
+            collector._collect_parallel()
+        else:
+            collector._collect_serial()
+        for evidence in collector.evidence_map.values():
+            evidence.pop("collected_at")
+            evidence["raw_file"] = Path(evidence["raw_file"]).name
+        raw = {f.name: f.read_bytes() for f in sorted(collector.raw_dir.iterdir())}
+        return collector.evidence_map, raw
+
+    def test_parallel_matches_serial(self):
+        """Evidence map order/content and raw files are identical."""
+        self.date_range = MetricsCollector(str(self.config_file), "last_30_days")._compute_date_range()
+
+        serial_evidence, serial_raw = self._collect(1)
+        parallel_evidence, parallel_raw = self._collect(2)
+
+        self.assertIn("RepoA/commits.count", serial_evidence)
+        self.assertIn("RepoB/docs.coverage", serial_evidence)
+        self.assertEqual(list(serial_evidence), list(parallel_evidence))
+        self.assertEqual(
+            json.dumps(serial_evidence, default=str),
+            json.dumps(parallel_evidence, default=str)
+        )
+        self.assertEqual(serial_raw, parallel_raw)
+
+
+class TestDoraMetrics(unittest.TestCase):
+    """Test that PR-derived DORA metrics share one client and one PR download."""
+
+    def setUp(self):
+        """Create two git repos mapped to GitHub repos."""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.temp_dir.name)
+        repos_yaml = "repos:\n"
+        for name in ("RepoA", "RepoB"):
+            repo = base / name
+            repo.mkdir()
+            subprocess.run(["git", "init", "-q"], cwd=repo, check=True)
+            repos_yaml += (
+                f"  - name: {name}\n    path: {repo}\n    language: python\n"
+                f"    github_owner: acme\n    github_repo: {name.lower()}\n"
+            )
+        self.config_file = base / "config.yaml"
+        self.config_file.write_text(repos_yaml)
+
+    def tearDown(self):
+        """Clean up."""
+        self.temp_dir.cleanup()
+
+    def test_one_client_and_one_pr_download_per_repo(self):
+        """Lead time and PR cycle time come from the same PR dataset."""
+        collector = MetricsCollector(str(self.config_file), "last_30_days")
+        collector.raw_dir = Path(self.temp_dir.name) / "raw"
+        collector.raw_dir.mkdir()
+        pr = {"created_at": "2026-01-01T00:00:00Z", "merged_at": "2026-01-01T12:00:00Z"}
+
+        with patch("metrics.github_client.GitHubClient") as client_cls:
+            client = client_cls.return_value
+            client.get_pull_requests.return_value = [pr]
+            client.get_releases.return_value = []
+            collector._collect_dora_metrics()
+
+        client_cls.assert_called_once_with()
+        self.assertEqual(
+            [c.args[:2] for c in client.get_pull_requests.call_args_list],
+            [("acme", "repoa"), ("acme", "repob")],
+        )
+        self.assertEqual(client.get_releases.call_count, 2)
+        lead_time = json.loads((collector.raw_dir / "RepoA_lead_time.metrics.json").read_text())
+        cycle_time = json.loads((collector.raw_dir / "RepoA_pr_cycle_time.metrics.json").read_text())
+        self.assertEqual(lead_time["average_hours"], 12)
+        self.assertEqual(cycle_time, lead_time)
+
+
+    def test_graphql_mode_prefetches_all_repos_in_one_batch(self):
+        """--github-graphql fills both datasets for every repo from one batched call."""
+        collector = MetricsCollector(str(self.config_file), "last_30_days", github_graphql=True)
+        collector.raw_dir = Path(self.temp_dir.name) / "raw"
+        collector.raw_dir.mkdir()
+        pr = {"created_at": "2026-01-01T00:00:00Z", "merged_at": "2026-01-01T06:00:00Z"}
+
+        with patch("metrics.github_client.GitHubClient") as client_cls:
+            client = client_cls.return_value
+            client.get_delivery_data.side_effect = lambda repos, since: {
+                repo: {"pull_requests": [pr], "releases": [], "deployments": []} for repo in repos
+            }
+            collector._collect_dora_metrics()
+
+        client.get_delivery_data.assert_called_once()
+        self.assertEqual(client.get_delivery_data.call_args.args[0], [("acme", "repoa"), ("acme", "repob")])
+        client.get_pull_requests.assert_not_called()
+        client.get_releases.assert_not_called()
+        self.assertEqual(
+            json.loads((collector.raw_dir / "RepoB_lead_time.metrics.json").read_text())["average_hours"], 6
+        )
+        self.assertIn("POST /graphql", collector.evidence_map["RepoB/lead_time.metrics"]["commands"][0])
+
+
 class TestEvidenceTracking(unittest.TestCase):
     """Test evidence tracking and metadata."""
 
@@ -202,6 +440,30 @@ repos:
         except RuntimeError:
             self.fail("Evidence completeness check raised unexpectedly")
 
+    def test_provenance_resolved_once_per_run(self):
+        """collector_version is resolved with a single git spawn, not one per metric."""
+        with patch('subprocess.run') as mock_run:
+            mock_run.return_value = MagicMock(returncode=0, stdout="abcdef1234567890\n")
+            collector = MetricsCollector(str(self.config_file), "last_30_days")
+            collector.raw_dir = Path(self.temp_dir.name)
+
+            for i in range(5):
+                collector._collect_metric(
+                    metric_id=f"TestRepo/metric{i}",
+                    repo_name="TestRepo",
+                    repo_path=Path("."),
+                    collector_fn=lambda p: ({"value": 1}, ["noop"])
+                )
+
+            rev_parses = [c for c in mock_run.call_args_list if c.args[0] == ["git", "rev-parse", "HEAD"]]
+            self.assertEqual(len(rev_parses), 1)
+
+        self.assertEqual(len(collector.evidence_map), 5)
+        for evidence in collector.evidence_map.values():
+            self.assertEqual(evidence["collector_version"], "abcdef12")
+            self.assertEqual(evidence["python_version"], collector.provenance["python_version"])
+            self.assertEqual(len(evidence["config_hash"]), 64)
+
     def test_evidence_missing_fields(self):
         """Test that missing evidence fields are caught."""
         collector = MetricsCollector(str(self.config_file), "last_30_days")
@@ -0,0 +1,177 @@
+import datetime as dt
+import os
+import subprocess
+
+import pytest
+import requests
+
+from metrics import collector as collector_module
+from metrics.collector import Collector
+
+
+def test_local_commit_source_reads_clone_without_http(tmp_path, monkeypatch, git, commit):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    today = dt.date.today()
+    old = (today - dt.timedelta(days=400)).isoformat()
+    recent = (today - dt.timedelta(days=3)).isoformat()
+    commit(repo, "old.py", "Add login page", date=f"{old}T12:00:00")
+    commit(repo, "auth.py", "Add OAuth login\n\nPROJ-7 dashboard follow-up", date=f"{recent}T10:00:00")
+    commit(repo, "ui.py", "Tweak chart colours", date=f"{recent}T11:00:00")
+    commit(repo, "misc.py", "Bump version", date=f"{today.isoformat()}T09:00:00")
+
+    def no_http(*args, **kwargs):
+        raise AssertionError("commit_source: local must not make HTTP requests")
+
+    monkeypatch.setattr(requests.Session, "request", no_http)
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    data = Collector({
+        "project": {"name": "demo", "default_branch": "main"},
+        "collection": {"commit_source": "local", "repo_path": str(repo), "since_days": 365},
+        "epics": {"rules": [
+            {"key": "Epic-Auth", "pattern": "auth|login"},
+            {"key": "Epic-UI", "pattern": "ui|dashboard|chart"},
+        ]},
+    }).collect()
+
+    assert data["daily_commits"] == {recent: 2, today.isoformat(): 1}
+    assert data["epic_commits"] == {"Epic-Auth": 1, "Epic-UI": 2}
+    assert data["epic_loc"] == {"Epic-Auth": 3, "Epic-UI": 4}  # lines the matching commits added
+    assert data["project"] == {"name": "demo", "web_url": None, "default_branch": "main"}
+    assert data["repo_metrics"]["file_types"] == {"py": 4}
+
+
+def test_epic_loc_skips_epics_with_commits_on_the_shallow_boundary(tmp_path, monkeypatch, git, commit):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    git(remote, "init", "-q")
+    today = dt.date.today()
+    commit(remote, "base.py", "Initial import", date=f"{(today - dt.timedelta(days=90)).isoformat()}T09:00:00")
+    (remote / "big.py").write_text("x = 1\n" * 50)
+    commit(remote, "auth.py", "Add login", date=f"{(today - dt.timedelta(days=5)).isoformat()}T09:00:00")
+    commit(remote, "ui.py", "Add dashboard", date=f"{(today - dt.timedelta(days=2)).isoformat()}T09:00:00")
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    data = Collector({
+        "project": {"repo_url": remote.as_uri()},
+        "collection": {"commit_source": "local", "repo_path": str(tmp_path / "clone"), "since_days": 30},
+        "epics": {"rules": [
+            {"key": "Epic-Auth", "pattern": "login"},
+            {"key": "Epic-UI", "pattern": "dashboard"},
+            {"key": "Epic-Docs", "pattern": "docs"},
+        ]},
+    }).collect()
+
+    # "Add login" is the shallow boundary: diffed against nothing it would count every file
+    assert data["epic_commits"] == {"Epic-Auth": 1, "Epic-UI": 1}
+    assert data["epic_loc"] == {"Epic-UI": 1}
+
+
+def test_shallow_clone_of_repo_quiet_for_the_whole_window(tmp_path, monkeypatch, git, commit):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    git(remote, "init", "-q")
+    commit(remote, "app.py", "Add app", date=f"{(dt.date.today() - dt.timedelta(days=400)).isoformat()}T09:00:00")
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    clone = tmp_path / "clone"
+    config = {
+        "project": {"repo_url": remote.as_uri()},
+        "collection": {"commit_source": "local", "repo_path": str(clone), "since_days": 30, "shallow_clone": True},
+    }
+    # Clone, then update: both fall back to the latest commit
+    for _ in range(2):
+        data = Collector(config).collect()
+        assert data["daily_commits"] == {}
+        assert data["repo_metrics"]["file_types"] == {"py": 1}
+        assert git(clone, "rev-list", "--count", "HEAD") == "1"
+
+
+def test_local_commits_match_api_dating(tmp_path, monkeypatch, git, commit):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    since = dt.date.today() - dt.timedelta(days=30)
+    commit(repo, "edge.py", "At the window start", date=f"{since.isoformat()}T00:00:00+00:00")
+    authored = (dt.date.today() - dt.timedelta(days=10)).isoformat()
+    committed = (dt.date.today() - dt.timedelta(days=5)).isoformat()
+    (repo / "late.py").write_text("x = 1\n")
+    git(repo, "add", ".")
+    git(repo, "commit", "-q", "-m", "Rebased later", env=dict(
+        os.environ, GIT_AUTHOR_DATE=f"{authored}T12:00:00", GIT_COMMITTER_DATE=f"{committed}T12:00:00",
+    ))
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    data = Collector({"collection": {"commit_source": "local", "repo_path": str(repo), "since_days": 30}}).collect()
+
+    # GitLab's created_at is the committer date, and since starts at midnight
+    assert data["daily_commits"] == {since.isoformat(): 1, committed: 1}
+
+
+def test_git_timeouts_do_not_end_the_run(tmp_path, monkeypatch, git, commit):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    git(remote, "init", "-q")
+    recent = (dt.date.today() - dt.timedelta(days=2)).isoformat()
+    commit(remote, "app.py", "Add app", date=f"{recent}T09:00:00")
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+    clone = tmp_path / "clone"
+    config = {
+        "project": {"repo_url": remote.as_uri()},
+        "collection": {"commit_source": "local", "repo_path": str(clone), "since_days": 30},
+    }
+    Collector(config).collect()
+
+    def hang(cmd, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+    monkeypatch.setattr(collector_module.subprocess, "run", hang)
+    data = Collector(config).collect()
+    assert data["daily_commits"] == {recent: 1}  # read from the existing clone
+    assert data["repo_metrics"] is None
+
+    fresh = tmp_path / "fresh"
+    with pytest.raises(RuntimeError, match="timed out"):
+        Collector({**config, "collection": {**config["collection"], "repo_path": str(fresh)}}).collect()
+    assert not fresh.exists()
+
+
+def test_unknown_commit_source_is_rejected():
+    with pytest.raises(RuntimeError, match="commit_source"):
+        Collector({"collection": {"commit_source": "ftp"}}).collect()
+
+
+def test_local_clone_is_updated_and_partial_blobs_stay_remote(tmp_path, monkeypatch, git, commit):
+    remote = tmp_path / "remote"
+    remote.mkdir()
+    git(remote, "init", "-q")
+    git(remote, "config", "uploadpack.allowFilter", "true")
+    recent = (dt.date.today() - dt.timedelta(days=2)).isoformat()
+    commit(remote, "gone.txt", "Scratch notes", date=f"{recent}T08:00:00")
+    gone_blob = git(remote, "rev-parse", "HEAD:gone.txt")
+    git(remote, "rm", "-q", "gone.txt")
+    commit(remote, "app.py", "Add app", date=f"{recent}T09:00:00")
+    monkeypatch.delenv("GITLAB_TOKEN", raising=False)
+
+    clone = tmp_path / "clone"
+    config = {
+        "project": {"repo_url": remote.as_uri()},
+        "collection": {
+            "commit_source": "local", "repo_path": str(clone), "since_days": 30,
+            "shallow_clone": True, "partial_clone": True,
+        },
+    }
+    first = Collector(config).collect()
+    assert first["daily_commits"] == {recent: 2}
+    assert first["repo_metrics"]["file_types"] == {"py": 1}
+    assert git(clone, "config", "remote.origin.partialclonefilter") == "blob:none"
+    # Only HEAD's blobs were fetched, for the LOC scan
+    missing = git(clone, "rev-list", "--objects", "--all", "--missing=print")
+    assert f"?{gone_blob}" in missing.split()
+
+    commit(remote, "lib.py", "Add lib", date=f"{dt.date.today().isoformat()}T09:00:00")
+    second = Collector(config).collect()
+    assert second["daily_commits"] == {recent: 2, dt.date.today().isoformat(): 1}
+    assert second["repo_metrics"]["file_types"] == {"py": 2}
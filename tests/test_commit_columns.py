@@ -0,0 +1,38 @@
+import json
+
+from metrics.commit_columns import read_columns, write_columns
+from metrics.utils import file_sha256
+
+
+def make_rows(count):
+    return [
+        {
+            "hash": f"{i:040x}",
+            "date": f"2026-01-{i % 28 + 1:02d} 1{i % 10}:30:00 {'+0200' if i % 2 else '-0500'}",
+            "author": f"author{i % 7}",
+            "week": f"2026-W0{i % 4 + 1}",
+        }
+        for i in range(count)
+    ]
+
+
+def test_round_trip(tmp_path):
+    rows = make_rows(100)
+    path = tmp_path / "commits.columns"
+    digest = write_columns(path, rows)
+    assert digest == file_sha256(path)
+    assert read_columns(path) == rows
+
+
+def test_empty(tmp_path):
+    path = tmp_path / "commits.columns"
+    write_columns(path, [])
+    assert read_columns(path) == []
+
+
+def test_smaller_than_indented_json(tmp_path):
+    rows = make_rows(5000)
+    path = tmp_path / "commits.columns"
+    write_columns(path, rows)
+    json_size = len(json.dumps(rows, indent=2))
+    assert path.stat().st_size * 4 < json_size
@@ -0,0 +1,125 @@
+import random
+import re
+import time
+
+import pytest
+
+from metrics.config import load_config
+from metrics.epics import EpicMatcher
+
+
+def legacy_match(rules, text):
+    """Per-commit, per-rule re.search, as the collector used to do it."""
+    keys = []
+    for rule in rules:
+        try:
+            if re.search(rule["pattern"], text, re.IGNORECASE):
+                keys.append(rule["key"])
+        except re.error:
+            pass
+    return keys
+
+
+RULES = [
+    {"key": "Epic-Auth", "pattern": "auth|login|oauth|sso"},
+    {"key": "Epic-Authz", "pattern": "authz"},
+    {"key": "Epic-UI", "pattern": "ui|frontend|dashboard|chart"},
+    {"key": "Epic-AB", "pattern": "ab"},
+    {"key": "Epic-BC", "pattern": "BC"},
+    {"key": "Epic-Ticket", "pattern": r"PROJ-\d+"},
+    {"key": "Epic-Perf", "pattern": "perf(ormance)?|speed"},
+    {"key": "Epic-UI", "pattern": "css"},
+    {"key": "Skipped", "pattern": ""},
+]
+
+
+@pytest.mark.parametrize("text", [
+    "Add OAuth login", "authz checks", "fix ABC parser", "PROJ-42: speed up charts",
+    "nothing relevant", "", "Sso/UI/css", "performance", "ab bc", "AUTHZAUTH",
+])
+def test_matches_like_per_rule_search(text):
+    assert EpicMatcher(RULES).match(text) == legacy_match(RULES[:-1], text)
+
+
+def test_matches_like_per_rule_search_on_random_text():
+    rng = random.Random(7)
+    alphabet = "abcdefghijklmnopqrstuvwxyz-0123456789 JPROSZU"
+    matcher = EpicMatcher(RULES)
+    for _ in range(2000):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        assert matcher.match(text) == legacy_match(RULES[:-1], text), text
+
+
+@pytest.mark.parametrize("rules, text", [
+    ([{"key": "Epic-Auth", "pattern": "(?i)auth"}, {"key": "Epic-UI", "pattern": "ui.x"}], "AUTH uiax"),
+    ([{"key": "Epic-A", "pattern": "(?P<t>x)y"}, {"key": "Epic-B", "pattern": "(?P<t>a)b"}], "ab xy"),
+    ([{"key": "Epic-Q", "pattern": "(q)+z"}, {"key": "Epic-R", "pattern": r"(ab)\1"}], "abab"),
+])
+def test_patterns_that_cannot_be_joined_match_on_their_own(rules, text):
+    assert EpicMatcher(rules).match(text) == legacy_match(rules, text) != []
+
+
+def test_global_flag_pattern_passes_config_load(tmp_path):
+    config = tmp_path / "config.yml"
+    config.write_text("epics:\n  rules:\n    - {key: Epic-Auth, pattern: '(?i)auth'}\n")
+    load_config(str(config))
+
+
+def test_literal_keywords_follow_ignorecase_folding():
+    rules = [{"key": "Epic-SSO", "pattern": "sso|login"}, {"key": "Epic-S", "pattern": "s"}]
+    for text in ("ſſo", "\u212aelvin sso", "ſ"):
+        assert EpicMatcher(rules).match(text) == legacy_match(rules, text)
+    assert EpicMatcher(rules).match("ſſo") == ["Epic-SSO", "Epic-S"]
+
+
+def test_invalid_patterns_fail_config_load(tmp_path):
+    config = tmp_path / "config.yml"
+    config.write_text(
+        "epics:\n  rules:\n"
+        "    - {key: Epic-Ok, pattern: ok}\n"
+        "    - {key: Epic-Bad, pattern: 'auth('}\n"
+        "    - {key: Epic-Worse, pattern: '[ui'}\n"
+    )
+    with pytest.raises(ValueError) as error:
+        load_config(str(config))
+    assert "Epic-Bad" in str(error.value) and "Epic-Worse" in str(error.value)
+    assert "Epic-Ok" not in str(error.value)
+
+
+def test_many_rules_match_like_per_rule_search():
+    rng = random.Random(3)
+    rules = [{"key": f"Epic-{i}", "pattern": f"PROJ-{i}|feature{i}"} for i in range(499)]
+    rules.append({"key": "Epic-Regex", "pattern": r"log(in|out)\b"})
+    matcher = EpicMatcher(rules)
+    for _ in range(200):
+        text = f"fix login feature{rng.randint(1, 600)} PROJ-{rng.randint(1, 600)}"
+        assert matcher.match(text) == legacy_match(rules, text), text
+
+
+@pytest.mark.benchmark
+def test_epic_rule_count_scaling_benchmark():
+    rng = random.Random(1)
+    words = ["fix", "add", "update", "refactor", "remove", "parser", "cache", "login", "api", "docs"]
+    commits = [
+        " ".join(rng.choice(words) for _ in range(8)) + f" PROJ-{rng.randint(1, 2000)}"
+        for _ in range(2000)
+    ]
+    print()
+    for rule_count in (10, 100, 500):
+        rules = [{"key": f"Epic-{i}", "pattern": f"PROJ-{i}|feature{i}"} for i in range(rule_count - 1)]
+        rules.append({"key": "Epic-Regex", "pattern": r"log(in|out)\b"})
+
+        started = time.perf_counter()
+        legacy = [legacy_match(rules, text) for text in commits]
+        legacy_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        matcher = EpicMatcher(rules)
+        combined = [matcher.match(text) for text in commits]
+        combined_seconds = time.perf_counter() - started
+
+        print(f"{rule_count} rules x {len(commits)} commits: per-rule {legacy_seconds:.3f}s, "
+              f"combined {combined_seconds:.3f}s")
+        assert combined == legacy
+        if rule_count >= 100:
+            assert combined_seconds < legacy_seconds / 2
@@ -0,0 +1,83 @@
+import json
+import sqlite3
+from pathlib import Path
+
+from metrics.exporter import build_history, export_json, iter_history, write_history
+from metrics.storage import init_db, store_snapshot
+
+SCHEMA = str(Path(__file__).parent.parent / "sql" / "schema.sql")
+
+
+def make_db(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    snapshots = [
+        ("2026-01-01", {"2025-12-31": 2, "2026-01-01": 1}, 100),
+        ("2026-01-02", {"2026-01-01": 3, "2026-01-02": 4}, 120),
+        ("2026-01-03", {}, None),
+    ]
+    for snapshot_date, daily, loc in snapshots:
+        data = {"snapshot_date": snapshot_date, "daily_commits": daily}
+        if loc is not None:
+            data["repo_metrics"] = {"total_loc": loc, "test_count": 5, "file_types": {}, "source_files": []}
+        store_snapshot(db_path, data)
+    return db_path
+
+
+def test_build_history(tmp_path):
+    history = build_history(make_db(tmp_path))
+    assert history["snapshots"] == [
+        {"snapshot_date": "2026-01-01", "daily_commits": {"2025-12-31": 2, "2026-01-01": 1},
+         "repo_metrics": {"lines_of_code": 100, "test_files": 5}},
+        {"snapshot_date": "2026-01-02", "daily_commits": {"2026-01-01": 3, "2026-01-02": 4},
+         "repo_metrics": {"lines_of_code": 120, "test_files": 5}},
+        {"snapshot_date": "2026-01-03", "daily_commits": {},
+         "repo_metrics": {"lines_of_code": 0, "test_files": 0}},
+    ]
+
+
+def test_history_uses_two_queries(tmp_path):
+    db_path = make_db(tmp_path)
+    statements = []
+    with sqlite3.connect(db_path) as conn:
+        conn.set_trace_callback(statements.append)
+        assert len(list(iter_history(conn))) == 3
+    assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 2
+
+
+def test_delta_history_reconstructs_full_maps(tmp_path):
+    db_path = make_db(tmp_path)
+    full = build_history(db_path)["snapshots"]
+
+    out = tmp_path / "history.json"
+    write_history(db_path, str(out), deltas=True)
+    history = json.loads(out.read_text())
+    assert history["encoding"] == "delta"
+    assert history["snapshots"][1]["daily_commits_delta"] == {"2026-01-01": 3, "2026-01-02": 4}
+    assert history["snapshots"][1]["daily_commits_removed"] == ["2025-12-31"]
+
+    current = {}
+    for snapshot, expected in zip(history["snapshots"], full):
+        current = {**current, **snapshot["daily_commits_delta"]}
+        for date in snapshot["daily_commits_removed"]:
+            del current[date]
+        assert current == expected["daily_commits"]
+
+
+def test_export_keeps_full_history_json_with_deltas(tmp_path):
+    db_path = make_db(tmp_path)
+    out_dir = tmp_path / "output"
+
+    export_json(db_path, str(out_dir), history_deltas=True)
+    assert json.loads((out_dir / "history.json").read_text()) == build_history(db_path)
+    assert json.loads((out_dir / "history.delta.json").read_text()) == build_history(db_path, deltas=True)
+
+    export_json(db_path, str(out_dir))
+    assert not (out_dir / "history.delta.json").exists()
+
+
+def test_streamed_history_matches_built(tmp_path):
+    db_path = make_db(tmp_path)
+    out = tmp_path / "history.json"
+    write_history(db_path, str(out))
+    assert json.loads(out.read_text()) == build_history(db_path)
@@ -0,0 +1,134 @@
+import pytest
+
+from metrics.git_history import read_history, read_history_incremental
+
+SINCE = "2020-01-01T00:00:00+00:00"
+UNTIL = "2099-01-01T00:00:00+00:00"
+
+
+def numbered(lines):
+    return "".join(f"{i}\n" for i in range(lines))
+
+
+@pytest.fixture
+def repo(tmp_path, git, commit):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    commit(repo, "a.py", "first", numbered(3))
+    commit(repo, "b.py", "second", numbered(5))
+    return repo
+
+
+def summary(history):
+    return (
+        sorted(c.sha for c in history.commits),
+        history.total("loc_added"),
+        history.total("files_changed"),
+        dict(history.churn()),
+    )
+
+
+def test_incremental_parses_only_new_commits(tmp_path, repo, commit):
+    state_file = tmp_path / "state" / "repo_git_history.json"
+
+    first = read_history_incremental(repo, SINCE, UNTIL, state_file)
+    assert len(first.commits) == 2
+    assert state_file.exists()
+
+    commit(repo, "a.py", "third", numbered(7))
+    second = read_history_incremental(repo, SINCE, UNTIL, state_file)
+    assert ".." in second.command
+    assert summary(second) == summary(read_history(repo, SINCE, UNTIL))
+    assert second.churn()["a.py"] == 2
+
+    # Nothing new: served from the watermark without a git log walk
+    third = read_history_incremental(repo, SINCE, UNTIL, state_file)
+    assert "unchanged" in third.command
+    assert summary(third) == summary(second)
+
+
+def test_rewritten_history_falls_back_to_full_pass(tmp_path, repo, git):
+    state_file = tmp_path / "repo_git_history.json"
+    read_history_incremental(repo, SINCE, UNTIL, state_file)
+
+    git(repo, "commit", "-q", "--amend", "-m", "second (amended)")
+    history = read_history_incremental(repo, SINCE, UNTIL, state_file)
+
+    assert ".." not in history.command
+    assert len(history.commits) == 2
+    assert summary(history) == summary(read_history(repo, SINCE, UNTIL))
+
+
+def test_changed_range_start_ignores_watermark(tmp_path, repo, commit):
+    state_file = tmp_path / "repo_git_history.json"
+    read_history_incremental(repo, SINCE, UNTIL, state_file)
+
+    commit(repo, "c.py", "third", numbered(1))
+    history = read_history_incremental(repo, "2021-01-01T00:00:00+00:00", UNTIL, state_file)
+
+    assert ".." not in history.command
+    assert len(history.commits) == 3
+
+
+def test_later_range_end_includes_commits_behind_the_watermark(tmp_path, git, commit):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    git(repo, "init", "-q")
+    for date in ("2026-01-10T12:00:00+00:00", "2026-02-10T12:00:00+00:00"):
+        commit(repo, "a.py", date, date=date)
+    state_file = tmp_path / "repo_git_history.json"
+
+    january = read_history_incremental(repo, SINCE, "2026-01-31T00:00:00+00:00", state_file)
+    assert len(january.commits) == 1
+    # HEAD is unchanged, but the February commit was outside the saved range
+    february = read_history_incremental(repo, SINCE, "2026-02-28T00:00:00+00:00", state_file)
+    assert "unchanged" not in february.command
+    assert len(february.commits) == 2
+
+
+def test_state_is_not_written_when_disabled(tmp_path, repo):
+    state_file = tmp_path / "repo_git_history.json"
+
+    history = read_history_incremental(repo, SINCE, UNTIL, state_file, save_state=False)
+
+    assert len(history.commits) == 2
+    assert not state_file.exists()
+
+
+def synthetic_log(commits, files_per_commit=10):
+    """Lazily yield git log lines for a synthetic history."""
+    for i in range(commits):
+        yield f"\x1e{i:040x}\x1f2026-01-{i % 28 + 1:02d} 10:00:00 +0000\x1fauthor{i % 50}\x1fcommit {i}\n"
+        yield "\x1f\n"
+        yield "\n"
+        for j in range(files_per_commit):
+            yield f":100644 100644 1111111 2222222 M\tsrc/module{j}/file{(i + j) % 20}.py\n"
+        for j in range(files_per_commit):
+            yield f"{j + 1}\t{j}\tsrc/module{j}/file{(i + j) % 20}.py\n"
+
+
+@pytest.mark.benchmark
+def test_parse_log_peak_memory_scales_with_commit_table():
+    """Benchmark: peak heap while parsing is bounded per commit, not by log size."""
+    import tracemalloc
+    from metrics.git_history import parse_log
+
+    results = []
+    for commits in (500, 5_000):
+        raw_bytes = sum(len(line) for line in synthetic_log(commits))
+        tracemalloc.start()
+        history = parse_log(synthetic_log(commits))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        assert len(history.commits) == commits
+        results.append((commits, raw_bytes, peak))
+        print(f"commits={commits:>6} raw_log={raw_bytes / 1e6:6.1f}MB peak={peak / 1e6:6.1f}MB "
+              f"({peak / commits:.0f} B/commit)")
+
+    (small, _, small_peak), (large, large_raw, large_peak) = results
+    # Only the lean commit table grows: well under the raw log size...
+    assert large_peak < large_raw / 2
+    # ...and roughly linearly in commit count
+    assert large_peak / small_peak < (large / small) * 1.5
+    assert large_peak / large < 1024
@@ -0,0 +1,351 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime, timedelta, timezone
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from metrics.github_client import GitHubClient
+from metrics.rate_limit import RateLimiter
+
+
+class StubGitHub:
+    """Minimal local GitHub REST API: paginated list endpoints with Link headers."""
+
+    def __init__(self, delay: float = 0.0):
+        self.routes = {}
+        self.delay = delay
+        self.rate_limit_remaining = 5000
+        self.graphql_remaining = None  # X-RateLimit-Remaining sent on GraphQL answers
+        self.reject = 0  # answer this many requests with 429 + Retry-After
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub.handle(self)
+
+            def do_POST(self):
+                stub.handle_graphql(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def handle(self, request):
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            self.requests.append((url.path, query, dict(request.headers)))
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            time.sleep(self.delay)
+            with self.lock:
+                rejected = self.reject > 0
+                self.reject -= rejected
+                self.rate_limit_remaining -= 1
+                remaining = self.rate_limit_remaining
+            if rejected:
+                request.send_response(429)
+                request.send_header("Retry-After", "0")
+                request.end_headers()
+                return
+            items = self.routes.get(url.path)
+            if items is None:
+                request.send_response(404)
+                request.end_headers()
+                return
+            per_page = int(query.get("per_page", 30))
+            page = int(query.get("page", 1))
+            last = max(1, -(-len(items) // per_page))
+            body = json.dumps(items[(page - 1) * per_page:page * per_page]).encode()
+            etag = f'"{hashlib.sha1(body).hexdigest()}"'
+            if request.headers.get("If-None-Match") == etag:
+                request.send_response(304)
+                request.send_header("ETag", etag)
+                request.end_headers()
+                return
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("ETag", etag)
+            request.send_header("Content-Length", str(len(body)))
+            request.send_header("X-RateLimit-Limit", "5000")
+            request.send_header("X-RateLimit-Remaining", str(remaining))
+            request.send_header("X-RateLimit-Reset", str(int(time.time()) + 3600))
+            if page < last:
+                request.send_header(
+                    "Link",
+                    f'<{self.url}{url.path}?per_page={per_page}&page={page + 1}>; rel="next", '
+                    f'<{self.url}{url.path}?per_page={per_page}&page={last}>; rel="last"',
+                )
+            request.end_headers()
+            request.wfile.write(body)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+    def handle_graphql(self, request):
+        query = json.loads(request.rfile.read(int(request.headers["Content-Length"])))["query"]
+        with self.lock:
+            self.requests.append(("/graphql", {"query": query}, dict(request.headers)))
+        body = json.dumps({"data": self.graphql(query)}).encode()
+        request.send_response(200)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(body)))
+        if self.graphql_remaining is not None:
+            request.send_header("X-RateLimit-Limit", "5000")
+            request.send_header("X-RateLimit-Remaining", str(self.graphql_remaining))
+        request.end_headers()
+        request.wfile.write(body)
+
+    def graphql(self, query):
+        """Answer aliased repository queries from self.graphql_repos, with offset cursors."""
+        data = {}
+        for alias, owner, name, body in re.findall(
+            r'(r\d+): repository\(owner: "(.*?)", name: "(.*?)"\) \{\n(.*?)\n  \}', query, re.S
+        ):
+            repo = self.graphql_repos[(owner, name)]
+            data[alias] = {}
+            for field, first, after in re.findall(r'(\w+)\(first: (\d+)(?:, after: "(\d+)")?', body):
+                start, first = int(after or 0), int(first)
+                nodes = repo.get(field, [])
+                data[alias][field] = {
+                    "pageInfo": {"hasNextPage": start + first < len(nodes), "endCursor": str(start + first)},
+                    "nodes": nodes[start:start + first],
+                }
+        return data
+
+    def pages_requested(self, path):
+        return sorted(int(query.get("page", 1)) for p, query, _ in self.requests if p == path)
+
+
+@pytest.fixture
+def stub():
+    server = StubGitHub()
+    server.thread.start()
+    yield server
+    server.server.shutdown()
+    server.server.server_close()
+
+
+@pytest.fixture
+def client_factory(stub, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GITHUB_ENABLE_CACHING", "false")
+    monkeypatch.setenv("GITHUB_MAX_REQUESTS_PER_HOUR", "4500")
+
+    def make(**kwargs):
+        return GitHubClient(token="test-token", base_url=stub.url, **kwargs)
+
+    return make
+
+
+def test_paginate_fetches_remaining_pages_concurrently(stub, client_factory):
+    path = "/repos/o/r/releases"
+    stub.routes[path] = [{"id": i} for i in range(950)]
+    stub.delay = 0.05
+
+    items = client_factory(max_concurrency=4)._paginate(path)
+
+    assert [item["id"] for item in items] == list(range(950))
+    assert stub.pages_requested(path) == list(range(1, 11))
+    assert 1 < stub.max_in_flight <= 4
+
+
+def test_paginate_sequential_without_concurrency(stub, client_factory):
+    path = "/repos/o/r/releases"
+    stub.routes[path] = [{"id": i} for i in range(250)]
+
+    items = client_factory(max_concurrency=1)._paginate(path)
+
+    assert len(items) == 250
+    assert stub.pages_requested(path) == [1, 2, 3]
+    assert stub.max_in_flight == 1
+
+
+def test_expired_cache_revalidates_with_etag(stub, client_factory, monkeypatch):
+    monkeypatch.setenv("GITHUB_ENABLE_CACHING", "true")
+    path = "/repos/o/r/releases"
+    stub.routes[path] = [{"id": i} for i in range(3)]
+    client = client_factory()
+
+    assert client._get(path) == stub.routes[path]
+    # Fresh entry: served without a request
+    assert client._get(path) == stub.routes[path]
+    assert len(stub.requests) == 1
+
+    client.cache_ttls["releases"] = 0
+    assert client._get(path) == stub.routes[path]
+    assert len(stub.requests) == 2
+    assert stub.requests[-1][2].get("If-None-Match", "").startswith('"')
+    # The 304 was not charged against the local budget either
+    assert client.rate_limiter.stats()["tokens"] == client.rate_limiter.capacity - 1
+
+    stub.routes[path] = [{"id": 99}]
+    assert client._get(path) == [{"id": 99}]
+
+
+def timeline(count, field):
+    """Newest-first items, one hour apart, ending at 2026-02-01T00:00:00Z."""
+    end = datetime(2026, 2, 1, tzinfo=timezone.utc)
+    return [
+        {"id": i, field: (end - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ"),
+         "merged_at": (end - timedelta(hours=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+        for i in range(count)
+    ]
+
+
+@pytest.mark.parametrize("concurrency, max_pages", [(1, 2), (4, 5)])
+def test_pull_requests_stop_at_since_cutoff(stub, client_factory, concurrency, max_pages):
+    path = "/repos/o/r/pulls"
+    stub.routes[path] = timeline(3000, "updated_at")
+    since = datetime(2026, 2, 1, tzinfo=timezone.utc) - timedelta(hours=149, minutes=30)
+
+    prs = client_factory(max_concurrency=concurrency).get_pull_requests("o", "r", since=since)
+
+    assert [pr["id"] for pr in prs] == list(range(150))
+    pages = stub.pages_requested(path)
+    assert pages[:2] == [1, 2] and len(pages) <= max_pages
+
+
+def test_releases_stop_at_since_cutoff(stub, client_factory):
+    path = "/repos/o/r/releases"
+    stub.routes[path] = timeline(1000, "published_at")
+    since = datetime(2026, 2, 1, tzinfo=timezone.utc) - timedelta(hours=50)
+
+    releases = client_factory(max_concurrency=1).get_releases("o", "r", since=since)
+
+    assert len(releases) == 51
+    assert stub.pages_requested(path) == [1]
+
+
+def test_rate_limit_rejection_is_retried_and_headers_synced(stub, client_factory):
+    path = "/repos/o/r/releases"
+    stub.routes[path] = [{"id": 1}]
+    stub.reject = 2
+    client = client_factory()
+
+    assert client._get(path) == [{"id": 1}]
+
+    stats = client.rate_limiter.stats()
+    assert len(stub.requests) == 3
+    assert stats["requests"] == 3
+    assert stats["server_limit"] == 5000
+    assert stats["server_remaining"] == 4997
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = []
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limiter_bucket_and_server_headers():
+    clock = FakeClock()
+    limiter = RateLimiter(3600, clock=clock.time, sleep=clock.sleep)
+
+    # Server budget caps the local bucket; exhaustion blocks until reset
+    limiter.update({"X-RateLimit-Remaining": "1", "X-RateLimit-Reset": str(int(clock.now) + 30)})
+    limiter.acquire()
+    assert clock.slept == []
+    limiter.update({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": str(int(clock.now) + 30)})
+    limiter.acquire()
+    assert clock.slept == [30]
+
+    # Retry-After from a secondary limit
+    limiter.update({"Retry-After": "5"}, status=403)
+    limiter.acquire()
+    assert clock.slept[-1] == 5
+    assert limiter.is_limited({"Retry-After": "5"}, 403)
+    assert not limiter.is_limited({}, 403)
+
+    stats = limiter.stats()
+    assert stats["throttled"] == 2
+    assert stats["waited_seconds"] == 35
+    assert stats["server_remaining"] == 0
+
+
+def test_rate_limiter_shared_across_threads():
+    clock = FakeClock()
+    limiter = RateLimiter(100, clock=clock.time, sleep=clock.sleep)
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(25)]) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert limiter.stats()["requests"] == 100
+    assert limiter.stats()["tokens"] == 0
+
+
+def test_graphql_skips_deployments_and_keeps_its_own_rate_limit(stub, client_factory):
+    stub.graphql_repos = {("acme", "api"): {"deployments": [{"createdAt": "2026-01-01T00:00:00Z"}]}}
+    stub.graphql_remaining = 3
+    client = client_factory()
+
+    data = client.get_delivery_data([("acme", "api")])
+
+    assert data == {("acme", "api"): {"pull_requests": [], "releases": []}}
+    queries = [query["query"] for path, query, _ in stub.requests if path == "/graphql"]
+    assert len(queries) == 1 and "deployments" not in queries[0]
+    assert client.graphql_rate_limiter.stats()["server_remaining"] == 3
+    # The points budget never clamps REST requests
+    assert client.rate_limiter.stats()["server_remaining"] is None
+    assert client.rate_limiter.stats()["tokens"] == 4500
+
+
+def test_graphql_batches_repos_and_trims_fields(stub, client_factory):
+    end = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+    def stamp(hours):
+        return (end - timedelta(hours=hours)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    stub.graphql_repos = {
+        ("acme", "api"): {
+            "pullRequests": [
+                {"number": i, "createdAt": stamp(i + 5), "mergedAt": stamp(i), "updatedAt": stamp(i)}
+                for i in range(1000)
+            ],
+            "releases": [{"tagName": f"v{i}", "createdAt": stamp(i * 24), "publishedAt": stamp(i * 24)} for i in range(5)],
+        },
+        ("acme", "web"): {
+            "deployments": [{"createdAt": stamp(1), "environment": "prod", "state": "ACTIVE"}],
+        },
+    }
+    since = end - timedelta(hours=149, minutes=30)
+
+    data = client_factory().get_delivery_data(
+        [("acme", "api"), ("acme", "web")], since=since, connections=("pull_requests", "releases", "deployments"),
+    )
+
+    api = data[("acme", "api")]
+    assert [pr["number"] for pr in api["pull_requests"]] == list(range(150))
+    assert api["pull_requests"][0] == {
+        "number": 0, "created_at": stamp(5), "merged_at": stamp(0), "updated_at": stamp(0)
+    }
+    assert [r["tag_name"] for r in api["releases"]] == ["v0", "v1", "v2", "v3", "v4"]
+    assert data[("acme", "web")]["deployments"][0]["environment"] == "prod"
+
+    queries = [query["query"] for path, query, _ in stub.requests if path == "/graphql"]
+    # Both repos share the first query; only the PR connection needs a second page
+    assert len(queries) == 2
+    assert 'r1: repository(owner: "acme", name: "web")' in queries[0]
+    assert "releases" not in queries[1] and 'after: "100"' in queries[1]
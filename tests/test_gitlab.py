@@ -0,0 +1,157 @@
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from metrics.gitlab import COMMIT_FIELDS, GitLabClient
+
+COMMITS_PATH = "/api/v4/projects/7/repository/commits"
+
+
+class FakeGitLab:
+    """Local GitLab /repository/commits: offset pages or keyset cursors, no X-Total."""
+
+    def __init__(self, total: int, keyset: bool = False):
+        self.total = total
+        self.keyset = keyset
+        self.failures = []  # statuses to answer the next requests with
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                fake.handle(self)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+
+    def commit(self, i, query):
+        created = (dt.datetime(2026, 1, 1) - dt.timedelta(minutes=i)).isoformat() + "Z"
+        commit = {
+            "id": f"{i:040x}", "short_id": f"{i:08x}", "created_at": created,
+            "title": f"Commit {i}", "message": f"Commit {i}\n\nDetails", "author_name": "dev",
+            "author_email": "dev@example.com", "committed_date": created, "parent_ids": [f"{i + 1:040x}"],
+            "web_url": f"https://gitlab.example/c/{i}",
+        }
+        if query.get("with_stats") != "false":
+            commit["stats"] = {"additions": 1, "deletions": 1, "total": 2}
+        if query.get("trailers") != "false":
+            commit["trailers"] = {}
+        return commit
+
+    def handle(self, request):
+        url = urlparse(request.path)
+        query = {k: v[0] for k, v in parse_qs(url.query).items()}
+        with self.lock:
+            self.requests.append(query)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            status = self.failures.pop(0) if self.failures else 200
+        try:
+            if status != 200:
+                request.send_response(status)
+                request.send_header("Retry-After", "0")
+                request.send_header("Content-Length", "0")
+                request.end_headers()
+                return
+            per_page = int(query.get("per_page", 20))
+            headers = {}
+            if self.keyset and query.get("pagination") == "keyset":
+                start = int(query.get("id_after", -1)) + 1
+                end = min(start + per_page, self.total)
+                if end < self.total:
+                    headers["Link"] = (
+                        f'<{self.url}{COMMITS_PATH}?pagination=keyset&per_page={per_page}'
+                        f'&with_stats=false&trailers=false&id_after={end - 1}>; rel="next"'
+                    )
+            else:
+                page = int(query.get("page", 1))
+                start, end = (page - 1) * per_page, min(page * per_page, self.total)
+                if end < self.total:
+                    headers["X-Next-Page"] = str(page + 1)
+            body = json.dumps([self.commit(i, query) for i in range(start, end)]).encode()
+            request.send_response(200)
+            request.send_header("Content-Type", "application/json")
+            request.send_header("Content-Length", str(len(body)))
+            for name, value in headers.items():
+                request.send_header(name, value)
+            request.end_headers()
+            request.wfile.write(body)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+
+
+@pytest.fixture
+def fake_gitlab():
+    servers = []
+
+    def start(total, keyset=False):
+        server = FakeGitLab(total, keyset)
+        server.thread.start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.server.shutdown()
+        server.server.server_close()
+
+
+@pytest.mark.parametrize("total", [5_000, pytest.param(100_000, marks=pytest.mark.benchmark)])
+def test_list_commits_prefetches_offset_pages(fake_gitlab, total):
+    server = fake_gitlab(total)
+    client = GitLabClient(server.url, "token", max_concurrency=4, backoff_factor=0)
+
+    started = time.perf_counter()
+    commits = client.list_commits("7", dt.date(2025, 1, 1))
+    elapsed = time.perf_counter() - started
+    print(f"\n{total} commits over {len(server.requests)} requests in {elapsed:.2f}s "
+          f"(max {server.max_in_flight} in flight)")
+
+    assert len(commits) == total
+    assert len({c["id"] for c in commits}) == total
+    assert commits[0]["title"] == "Commit 0" and commits[-1]["title"] == f"Commit {total - 1}"
+    assert set(commits[0]) == set(COMMIT_FIELDS)
+    assert 1 < server.max_in_flight <= 4
+    # Every page plus at most one overshooting window
+    assert len(server.requests) <= total // 100 + 4
+    first = server.requests[0]
+    assert first["with_stats"] == "false" and first["trailers"] == "false"
+    assert first["since"] == "2025-01-01" and first["per_page"] == "100"
+
+
+@pytest.mark.parametrize("total", [5_000, pytest.param(100_000, marks=pytest.mark.benchmark)])
+def test_list_commits_follows_keyset_cursor(fake_gitlab, total):
+    server = fake_gitlab(total, keyset=True)
+    client = GitLabClient(server.url, "token", backoff_factor=0)
+
+    commits = client.list_commits("7", dt.date(2025, 1, 1))
+
+    assert len(commits) == total
+    assert commits[-1]["id"] == f"{total - 1:040x}"
+    assert len(server.requests) == total // 100
+    assert all("page" not in query for query in server.requests)
+
+
+def test_list_commits_retries_rate_limits_and_server_errors(fake_gitlab):
+    server = fake_gitlab(250)
+    server.failures = [429, 502, 503]
+    client = GitLabClient(server.url, "token", max_concurrency=1, backoff_factor=0)
+
+    commits = client.list_commits("7", dt.date(2025, 1, 1), fields=None)
+
+    assert len(commits) == 250
+    assert "stats" not in commits[0] and "author_email" in commits[0]
+    assert len(server.requests) == 3 + 3
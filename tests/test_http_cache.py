@@ -0,0 +1,118 @@
+import json
+import os
+import time
+
+from metrics import cli
+from metrics.github_client import GitHubClient
+from metrics.http_cache import ResponseCache
+
+
+def payload(n):
+    return [{"id": i, "title": f"PR {i}", "state": "merged", "body": "x" * 200} for i in range(n)]
+
+
+def test_entries_round_trip_compressed(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    data = payload(100)
+    cache.put("k", "/repos/o/r/pulls", data, {"etag": '"abc"', "last_modified": None})
+
+    entry = cache.get("k", 3600)
+    assert entry.data == data
+    assert entry.validators == {"etag": '"abc"', "last_modified": None}
+    assert entry.age_seconds < 60
+    assert cache.stats()["bytes"] < len(json.dumps(data)) / 10
+    cache.close()
+
+
+def test_counters_track_hits_misses_and_stale(tmp_path):
+    path = str(tmp_path / "responses.db")
+    cache = ResponseCache(path)
+    assert cache.get("k", 3600) is None
+    cache.put("k", "/e", {"a": 1})
+    assert cache.get("k", 3600).data == {"a": 1}
+    # Stale entries are still returned so they can be revalidated
+    assert cache.get("k", -1).data == {"a": 1}
+    cache.touch("k")
+    assert cache.counters == {
+        "hits": 1, "misses": 1, "stale": 1, "revalidated": 1, "stores": 1, "evictions": 0,
+    }
+    cache.close()
+
+    # Lifetime totals survive the process; session counters start over
+    reopened = ResponseCache(path)
+    stats = reopened.stats()
+    assert stats["lifetime"]["hits"] == 1
+    assert stats["session"]["hits"] == 0
+    assert stats["hit_rate"] == round(1 / 3, 3)
+    reopened.close()
+
+
+def test_size_budget_evicts_least_recently_used(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    for i in range(20):
+        cache.put(f"k{i}", "/e", os.urandom(300).hex())
+        time.sleep(0.001)
+    cache.get("k0", 3600)  # recently used, so it survives
+    per_entry = cache.stats()["bytes"] // 20
+    cache.max_bytes = per_entry * 10
+
+    cache.put("new", "/e", os.urandom(300).hex())
+
+    stats = cache.stats()
+    assert stats["bytes"] <= cache.max_bytes
+    assert cache.counters["evictions"] > 0
+    assert cache.get("k0", 3600) is not None
+    assert cache.get("new", 3600) is not None
+    assert cache.get("k1", 3600) is None
+    cache.close()
+
+
+def test_prune_drops_entries_unused_for_a_while(tmp_path):
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    cache.put("old", "/e", 1)
+    cache.put("new", "/e", 2)
+    cache._conn.execute("UPDATE entries SET accessed_at = accessed_at - 86400 * 10 WHERE key = 'old'")
+
+    assert cache.prune(older_than_seconds=86400 * 7) == 1
+    assert cache.get("old", 3600) is None
+    assert cache.get("new", 3600).data == 2
+    cache.close()
+
+
+def test_client_uses_per_endpoint_ttls(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("GITHUB_ENABLE_CACHING", "true")
+    monkeypatch.setenv("GITHUB_CACHE_TTLS", "pulls=2,releases=bad")
+    client = GitHubClient(token="test-token", base_url="http://127.0.0.1:9")
+
+    assert client._ttl_seconds("/repos/o/r/pulls") == 2 * 3600
+    assert client._ttl_seconds("/repos/o/r/releases") == 6 * 3600
+    assert client._ttl_seconds("/repos/o/r/commits/" + "a" * 40) == 720 * 3600
+    assert client._ttl_seconds("/search/commits") == 0.25 * 3600
+    assert client._ttl_seconds("/repos/o/r/deployments/7/statuses") == 3600
+    assert client._ttl_seconds("/repos/o/r") == client.cache_ttl_hours * 3600
+    assert (tmp_path / ".cache" / "github" / "responses.db").exists()
+
+
+def test_cache_command_prunes_legacy_files(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    ResponseCache(cli.DEFAULT_CACHE_PATH).close()
+    legacy = tmp_path / ".cache" / "github" / ("0" * 64 + ".json")
+    legacy.write_text("[]")
+    kept = [tmp_path / ".cache" / "github" / "notes.json", tmp_path / "projects.json"]
+    for path in kept:
+        path.write_text("{}")
+    (tmp_path / "output").mkdir()
+    kept.append(tmp_path / "output" / "latest.json")
+    kept[-1].write_text("{}")
+
+    cli.cmd_cache("prune", older_than_days=30)
+    out = capsys.readouterr().out
+    assert "1 legacy cache files" in out
+    assert json.loads(out[out.index("{"):])["entries"] == 0
+    assert not legacy.exists()
+
+    # Other JSON next to a custom cache path is never touched
+    cli.cmd_cache("prune", "cache.db")
+    cli.cmd_cache("prune", "output/cache.db")
+    assert all(path.exists() for path in kept)
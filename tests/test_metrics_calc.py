@@ -1,4 +1,10 @@
-from metrics.metrics_calc import is_test_file, parse_lcov
+import os
+import subprocess
+
+import pytest
+
+from metrics import metrics_calc
+from metrics.metrics_calc import calculate_repo_metrics, is_test_file, parse_lcov
 
 
 def test_is_test_file():
@@ -14,3 +20,183 @@ def test_parse_lcov(tmp_path):
     data = parse_lcov(str(lcov))
     assert round(data["line_rate"], 2) == 0.7
     assert round(data["branch_rate"], 2) == 0.75
+
+
+def test_loc_cache_only_counts_changed_blobs(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "a.py").write_text("1\n2\n3\n")
+    (repo / "b.py").write_text("1\n")
+    git = ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com"]
+    subprocess.run(git + ["init", "-q"], cwd=repo, check=True)
+    subprocess.run(git + ["add", "."], cwd=repo, check=True)
+    subprocess.run(git + ["commit", "-q", "-m", "init"], cwd=repo, check=True)
+    cache_path = str(tmp_path / "loc_cache.json")
+
+    counted = []
+    classify_file = metrics_calc.classify_file
+    monkeypatch.setattr(metrics_calc, "classify_file", lambda path: counted.append(path) or classify_file(path))
+
+    first = calculate_repo_metrics(str(repo), ["."], [".git"], loc_cache_path=cache_path)
+    assert first["total_loc"] == 4
+    assert first["code_loc"] == 4
+    assert len(counted) == 2
+
+    # Uncommitted edits and untracked files are always counted from disk
+    counted.clear()
+    (repo / "b.py").write_text("1\n2\n")
+    (repo / "c.py").write_text("1\n")
+    second = calculate_repo_metrics(str(repo), ["."], [".git"], loc_cache_path=cache_path)
+    assert second["total_loc"] == 6
+    assert sorted(p.rsplit("/", 1)[-1] for p in counted) == ["b.py", "c.py"]
+
+
+def text_mode_lines(path):
+    with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        return sum(1 for _ in f)
+
+
+def test_count_lines_matches_text_mode(tmp_path, monkeypatch):
+    # Small chunks so \r\n pairs straddle chunk boundaries
+    monkeypatch.setattr(metrics_calc, "READ_CHUNK", 3)
+    samples = [b"", b"a", b"a\n", b"a\nb", b"a\r\nb\r\n", b"a\rb\rc", b"\r\n\r\n\n", b"ab\r\ncd\r", b"\xff\xfe\n\x00"]
+    for i, data in enumerate(samples):
+        path = tmp_path / f"f{i}"
+        path.write_bytes(data)
+        assert metrics_calc.count_lines(str(path)) == text_mode_lines(path), data
+
+
+def test_parallel_line_count_matches_serial(tmp_path):
+    paths = []
+    for f in range(200):
+        path = tmp_path / f"mod{f}.py"
+        path.write_text("x = 1\n" * (f % 40))
+        paths.append(str(path))
+    assert [counts.total for counts in metrics_calc.classify_files(paths, 4)] == [text_mode_lines(p) for p in paths]
+
+
+@pytest.mark.benchmark
+@pytest.mark.skipif((os.cpu_count() or 1) < 2, reason="needs more than one CPU to beat the serial count")
+def test_parallel_line_count_benchmark(tmp_path):
+    """Benchmark: cold-cache classification of a generated 50k-file tree vs the old serial count."""
+    import time
+
+    paths = []
+    for d in range(100):
+        directory = tmp_path / f"pkg{d}"
+        directory.mkdir()
+        for f in range(500):
+            path = directory / f"mod{f}.py"
+            path.write_text("x = 1\n" * ((d + f) % 40))
+            paths.append(str(path))
+
+    start = time.perf_counter()
+    serial = [text_mode_lines(p) for p in paths]
+    serial_time = time.perf_counter() - start
+
+    workers = os.cpu_count() or 1
+    start = time.perf_counter()
+    pooled = [counts.total for counts in metrics_calc.classify_files(paths, workers)]
+    pooled_time = time.perf_counter() - start
+
+    print(f"files={len(paths)} serial={serial_time:.2f}s pooled({workers} workers)={pooled_time:.2f}s")
+    assert pooled == serial
+    assert pooled_time < serial_time
+
+
+def legacy_scan_repo(root, include_paths, exclude_paths):
+    # The os.walk + relpath scanner scan_repo replaced, kept as a reference
+    files = []
+    for inc in include_paths:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, inc)):
+            rel = os.path.relpath(dirpath, root)
+            if any(part in exclude_paths for part in rel.split(os.sep)):
+                dirnames[:] = []
+                continue
+            for name in filenames:
+                rel_file = os.path.relpath(os.path.join(dirpath, name), root)
+                if any(part in exclude_paths for part in rel_file.split(os.sep)):
+                    continue
+                files.append(rel_file)
+    return files
+
+
+def make_tree(root, dirs, files_per_dir, depth=3):
+    for d in range(dirs):
+        directory = root.joinpath(*[f"d{d}_{level}" for level in range(depth)])
+        directory.mkdir(parents=True)
+        for f in range(files_per_dir):
+            (directory / f"f{f}.py").write_text("")
+        (directory / "app.min.js").write_text("")
+    (root / "node_modules" / "pkg").mkdir(parents=True)
+    (root / "node_modules" / "pkg" / "index.js").write_text("")
+    (root / "README").write_text("")
+
+
+def test_scan_repo_matches_legacy_walk(tmp_path):
+    make_tree(tmp_path, 5, 3)
+    exclude = ["node_modules", ".git"]
+    assert metrics_calc.scan_repo(str(tmp_path), ["."], exclude) == legacy_scan_repo(str(tmp_path), ["."], exclude)
+    assert metrics_calc.scan_repo(str(tmp_path), ["d1_0"], exclude) == legacy_scan_repo(str(tmp_path), ["d1_0"], exclude)
+    assert metrics_calc.scan_repo(str(tmp_path), ["node_modules"], exclude) == []
+
+
+def test_scan_repo_glob_excludes_and_git_source(tmp_path):
+    make_tree(tmp_path, 2, 1, depth=1)
+    files = metrics_calc.scan_repo(str(tmp_path), ["."], ["node_modules", "*.min.js", "d1_0/*"])
+    assert sorted(files) == ["README", os.path.join("d0_0", "f0.py")]
+
+    git = ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com"]
+    subprocess.run(git + ["init", "-q"], cwd=tmp_path, check=True)
+    subprocess.run(git + ["add", "README", "d0_0"], cwd=tmp_path, check=True)
+    (tmp_path / "d0_0" / "untracked.py").write_text("")
+    tracked = metrics_calc.scan_repo(str(tmp_path), ["."], ["*.min.js"], file_source="git")
+    assert sorted(tracked) == ["README", os.path.join("d0_0", "f0.py")]
+    assert metrics_calc.scan_repo(str(tmp_path), ["d0_0"], ["*.min.js"], file_source="git") == [
+        os.path.join("d0_0", "f0.py")
+    ]
+
+
+@pytest.mark.benchmark
+def test_scan_repo_walk_overhead_benchmark(tmp_path):
+    """Microbenchmark: per-file cost of the directory walk alone."""
+    import time
+
+    make_tree(tmp_path, 400, 50, depth=4)
+    exclude = ["node_modules", "dist", "build", ".git", "vendor", "target"]
+
+    timings = {}
+    for name, scan in (("legacy", legacy_scan_repo), ("scandir", metrics_calc.scan_repo)):
+        best = float("inf")
+        for _ in range(3):
+            start = time.perf_counter()
+            files = scan(str(tmp_path), ["."], exclude)
+            best = min(best, time.perf_counter() - start)
+        timings[name] = best
+        print(f"{name:>8}: {len(files)} files, {best * 1e6 / len(files):.2f} us/file")
+
+    assert timings["scandir"] < timings["legacy"]
+
+
+def test_classify_lines_by_comment_syntax():
+    py = b"import os\n\n# comment\nx = 1  # trailing\n   \n"
+    assert metrics_calc.classify_lines(py, "py") == (5, 2, 1, 2)
+    c = b"/* a\n b\n*/ int x;\n// c\n\nint y; /* z */\n/* q */ /* r */\n"
+    assert metrics_calc.classify_lines(c, "c") == (7, 2, 4, 1)
+    html = b"<!-- a\r\n\r\nb -->\r\n<p>x</p>"
+    assert metrics_calc.classify_lines(html, "html") == (4, 1, 3, 0)
+    # Unknown extension: only blanks are told apart
+    assert metrics_calc.classify_lines(b"# x\n\n", "txt") == (2, 1, 0, 1)
+    assert metrics_calc.classify_lines(b"", "py") == (0, 0, 0, 0)
+
+
+def test_repo_metrics_loc_breakdown(tmp_path):
+    (tmp_path / "src" / "auth").mkdir(parents=True)
+    (tmp_path / "src" / "auth" / "login.py").write_text("# login\n\ndef login():\n    pass\n")
+    (tmp_path / "src" / "app.js").write_text("// app\nrun();\n")
+
+    metrics = calculate_repo_metrics(str(tmp_path), ["."], [])
+
+    assert metrics["total_loc"] == 6
+    assert (metrics["code_loc"], metrics["comment_loc"], metrics["blank_loc"]) == (3, 2, 1)
+    assert metrics["file_type_loc"] == {"py": 4, "js": 2}
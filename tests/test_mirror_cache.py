@@ -0,0 +1,106 @@
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+# Add scripts directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+from collect_metrics import MetricsCollector
+from metrics import mirror_cache
+from metrics.mirror_cache import MirrorCache, checkout_worktree, is_mirror, mirror_name
+
+
+@pytest.fixture
+def make_remote(tmp_path, git, commit):
+    def make_remote(name, commits=2):
+        repo = tmp_path / "remotes" / name
+        repo.mkdir(parents=True)
+        git(repo, "init", "-q")
+        for i in range(commits):
+            commit(repo, f"mod{i}.py", f"commit {i}", f'def f{i}():\n    """Doc."""\n')
+        return repo
+
+    return make_remote
+
+
+def test_mirror_name():
+    assert mirror_name("https://github.com/vionascu/trail-equip") == "vionascu_trail-equip.git"
+    assert mirror_name("git@github.com:owner/repo.git") == "owner_repo.git"
+
+
+def test_sync_creates_and_refreshes_mirrors_in_parallel(tmp_path, make_remote, git, commit):
+    remotes = [make_remote(f"repo{i}") for i in range(3)]
+    cache = MirrorCache(tmp_path / "cache", max_workers=3)
+    urls = [remote.as_uri() for remote in remotes]
+    missing = (tmp_path / "remotes" / "nope").as_uri()
+
+    errors = cache.sync(urls + [missing])
+
+    assert [errors[url] for url in urls] == [None, None, None]
+    assert "clone --mirror" in errors[missing]
+    assert not any(path.name.endswith(".tmp") for path in (tmp_path / "cache").iterdir())
+    for url, remote in zip(urls, remotes):
+        mirror = cache.path(url)
+        assert is_mirror(mirror) and not (mirror / ".git").exists()
+        assert git(mirror, "rev-parse", "HEAD") == git(remote, "rev-parse", "HEAD")
+
+    commit(remotes[0], "new.py", "new")
+    assert cache.sync(urls) == dict.fromkeys(urls)
+    assert git(cache.path(urls[0]), "rev-parse", "HEAD") == git(remotes[0], "rev-parse", "HEAD")
+
+
+def test_git_timeouts_are_reported_as_errors(tmp_path, monkeypatch, make_remote):
+    remote = make_remote("repo")
+    cache = MirrorCache(tmp_path / "cache")
+    mirror = cache.sync_one(remote.as_uri())
+
+    def hang(cmd, **kwargs):
+        raise subprocess.TimeoutExpired(cmd, kwargs["timeout"])
+
+    monkeypatch.setattr(mirror_cache.subprocess, "run", hang)
+    with pytest.raises(RuntimeError, match="timed out after 900s"):
+        checkout_worktree(mirror, tmp_path / "worktree")
+    shutil.rmtree(mirror)
+    assert "timed out" in cache.sync([remote.as_uri()])[remote.as_uri()]
+    assert list((tmp_path / "cache").iterdir()) == []
+
+
+def test_worktree_follows_mirror_head(tmp_path, make_remote, commit):
+    remote = make_remote("repo")
+    cache = MirrorCache(tmp_path / "cache")
+    mirror = cache.sync_one(remote.as_uri())
+    dest = tmp_path / "cache" / "worktrees" / "repo"
+
+    checkout_worktree(mirror, dest)
+    assert sorted(p.name for p in dest.glob("*.py")) == ["mod0.py", "mod1.py"]
+    assert (dest / ".git").is_file()
+
+    commit(remote, "mod2.py", "more")
+    cache.sync_one(remote.as_uri())
+    checkout_worktree(mirror, dest)
+    assert (dest / "mod2.py").exists()
+
+
+def test_collector_reads_git_metrics_from_mirror(tmp_path, make_remote):
+    remote = make_remote("repo", commits=3)
+    cache = MirrorCache(tmp_path / "cache")
+    mirror = cache.sync_one(remote.as_uri())
+    worktree = tmp_path / "cache" / "worktrees" / "repo"
+    config_file = tmp_path / "repos.yaml"
+    config_file.write_text(yaml.safe_dump({"repos": [{
+        "name": "Repo", "mirror": str(mirror), "path": str(worktree), "language": "python",
+    }]}))
+
+    collector = MetricsCollector(str(config_file), "last_30_days")
+    collector.raw_dir = tmp_path / "raw"
+    collector.raw_dir.mkdir()
+    collector._collect_git_metrics()
+    assert not worktree.exists()  # git metrics need no checkout
+    assert collector.evidence_map["Repo/commits.count"]["source"]["details"] == str(mirror)
+
+    collector._collect_docs_metrics()
+    assert (worktree / "mod2.py").exists()
+    assert "Repo/docs.coverage" in collector.evidence_map
@@ -0,0 +1,162 @@
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from metrics.storage import SCHEMA_VERSION, connect, init_db, purge_old, store_snapshot, vacuum
+
+SCHEMA = str(Path(__file__).parent.parent / "sql" / "schema.sql")
+
+# Tables as created before schema versioning (no foreign keys or indexes)
+LEGACY_SCHEMA = """
+CREATE TABLE snapshots (id INTEGER PRIMARY KEY AUTOINCREMENT, snapshot_date TEXT UNIQUE NOT NULL, created_at TEXT NOT NULL);
+CREATE TABLE commit_counts (snapshot_id INTEGER NOT NULL, date TEXT NOT NULL, count INTEGER NOT NULL, PRIMARY KEY (snapshot_id, date));
+CREATE TABLE loc_totals (snapshot_id INTEGER PRIMARY KEY, total INTEGER, code INTEGER, comment INTEGER, blank INTEGER);
+CREATE TABLE test_totals (snapshot_id INTEGER PRIMARY KEY, count INTEGER);
+CREATE TABLE file_types (snapshot_id INTEGER NOT NULL, extension TEXT NOT NULL, files INTEGER, loc INTEGER, PRIMARY KEY (snapshot_id, extension));
+CREATE TABLE epic_stats (snapshot_id INTEGER NOT NULL, epic_key TEXT NOT NULL, commits INTEGER, loc INTEGER, PRIMARY KEY (snapshot_id, epic_key));
+CREATE TABLE source_files (snapshot_id INTEGER NOT NULL, path TEXT NOT NULL, loc INTEGER, extension TEXT, PRIMARY KEY (snapshot_id, path));
+CREATE TABLE coverage_totals (snapshot_id INTEGER PRIMARY KEY, line_rate REAL, branch_rate REAL);
+"""
+
+
+def make_snapshot(snapshot_date, files):
+    return {
+        "snapshot_date": snapshot_date,
+        "daily_commits": {f"2026-01-{d:02d}": d for d in range(1, 29)},
+        "epic_commits": {"Epic-Auth": 3, "Epic-UI": 5},
+        "repo_metrics": {
+            "total_loc": files * 10,
+            "test_count": files // 10,
+            "file_types": {"py": files // 2, "js": files - files // 2},
+            "source_files": [(f"src/dir{i % 100}/file{i}.py", 10, "py") for i in range(files)],
+        },
+        "coverage": {"line_rate": 0.8, "branch_rate": 0.5},
+    }
+
+
+def test_store_snapshot_roundtrip(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    store_snapshot(db_path, make_snapshot("2026-01-31", 50))
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert conn.execute("SELECT COUNT(*) FROM source_files").fetchone()[0] == 50
+        assert conn.execute("SELECT SUM(count) FROM commit_counts").fetchone()[0] == sum(range(1, 29))
+        assert conn.execute("SELECT commits FROM epic_stats WHERE epic_key = 'Epic-UI'").fetchone()[0] == 5
+
+
+def test_store_snapshot_loc_breakdown(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    snapshot = make_snapshot("2026-01-31", 10)
+    snapshot["repo_metrics"].update(
+        code_loc=70, comment_loc=20, blank_loc=10,
+        file_type_loc={"py": 60, "js": 40},
+    )
+    snapshot["epic_loc"] = {"Epic-Auth": 30, "Epic-Docs": 5}
+    store_snapshot(db_path, snapshot)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT total, code, comment, blank FROM loc_totals").fetchone() == (100, 70, 20, 10)
+        assert dict(conn.execute("SELECT extension, loc FROM file_types")) == {"py": 60, "js": 40}
+        assert sorted(conn.execute("SELECT epic_key, commits, loc FROM epic_stats")) == [
+            ("Epic-Auth", 3, 30), ("Epic-UI", 5, None),
+        ]
+
+
+def test_store_snapshot_rolls_back_on_error(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    bad = make_snapshot("2026-01-31", 10)
+    bad["repo_metrics"]["source_files"].append(("broken",))
+
+    with pytest.raises(ValueError):
+        store_snapshot(db_path, bad)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM source_files").fetchone()[0] == 0
+
+
+@pytest.mark.benchmark
+def test_store_snapshot_throughput(tmp_path):
+    """Benchmark: a synthetic 500k-file snapshot stores at >= 50k rows/s."""
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    files = 500_000
+    snapshot = make_snapshot("2026-01-31", files)
+
+    conn = connect(db_path)
+    try:
+        start = time.perf_counter()
+        store_snapshot(db_path, snapshot, conn)
+        elapsed = time.perf_counter() - start
+        # Statements compiled for the first snapshot are reused for the next
+        store_snapshot(db_path, make_snapshot("2026-02-01", 10), conn)
+    finally:
+        conn.close()
+
+    rate = files / elapsed
+    print(f"stored {files} source_files rows in {elapsed:.2f}s ({rate:,.0f} rows/s)")
+    assert rate >= 50_000
+
+
+def test_purge_cascades_to_child_tables(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    store_snapshot(db_path, make_snapshot("2000-01-01", 20))
+    store_snapshot(db_path, make_snapshot("2999-01-01", 5))
+
+    purge_old(db_path, 365)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 1
+        assert conn.execute("SELECT COUNT(*) FROM source_files").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(DISTINCT snapshot_id) FROM commit_counts").fetchone()[0] == 1
+
+
+def test_legacy_database_is_migrated(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(LEGACY_SCHEMA)
+        conn.execute("INSERT INTO snapshots(id, snapshot_date, created_at) VALUES (1, '2026-01-01', 'x')")
+        conn.execute("INSERT INTO source_files VALUES (1, 'kept.py', 10, 'py')")
+        # Left behind by a purge before cascades existed
+        conn.execute("INSERT INTO source_files VALUES (99, 'orphan.py', 10, 'py')")
+
+    init_db(db_path, SCHEMA)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+        assert [r[0] for r in conn.execute("SELECT path FROM source_files")] == ["kept.py"]
+        fks = conn.execute("PRAGMA foreign_key_list(source_files)").fetchall()
+        assert fks and fks[0][2] == "snapshots" and fks[0][6] == "CASCADE"
+        indexes = {r[1] for r in conn.execute("SELECT * FROM sqlite_master WHERE type = 'index'")}
+        assert {"idx_commit_counts_date", "idx_source_files_snapshot_loc"} <= indexes
+
+        plan = " ".join(str(r) for r in conn.execute(
+            "EXPLAIN QUERY PLAN SELECT path, loc, extension FROM source_files "
+            "WHERE snapshot_id = ? ORDER BY loc DESC LIMIT 20", (1,)
+        ))
+        assert "idx_source_files_snapshot_loc" in plan
+        assert "TEMP B-TREE" not in plan
+
+    # Re-running init on a current database is a no-op
+    init_db(db_path, SCHEMA)
+
+
+def test_vacuum(tmp_path):
+    db_path = str(tmp_path / "metrics.db")
+    init_db(db_path, SCHEMA)
+    store_snapshot(db_path, make_snapshot("2000-01-01", 5000))
+    purge_old(db_path, 365)
+
+    vacuum(db_path)
+    vacuum(db_path, full=True)
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+        assert conn.execute("PRAGMA freelist_count").fetchone()[0] == 0
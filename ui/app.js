@@ -19,12 +19,16 @@ const AI_KEYWORDS = [
 
 async function loadData() {
   const latestRes = await fetch("./data/latest.json", { cache: "no-store" });
-  const historyRes = await fetch("./data/history.json", { cache: "no-store" });
+  // Prefer the smaller delta-encoded history (export.history_deltas) when exported
+  let historyRes = await fetch("./data/history.delta.json", { cache: "no-store" });
+  if (!historyRes.ok) {
+    historyRes = await fetch("./data/history.json", { cache: "no-store" });
+  }
   const latest = await latestRes.json();
   const history = await historyRes.json();
 
   allLatest = latest;
-  allHistory = history.snapshots || [];
+  allHistory = expandHistory(history);
 
   // Initialize date picker with available dates
   initializeDatePicker();
@@ -35,6 +39,24 @@ async function loadData() {
   renderDashboard(latest, allHistory);
 }
 
+// history.delta.json is delta-encoded (export.history_deltas): rebuild the
+// full daily_commits map for each snapshot.
+function expandHistory(history) {
+  const snapshots = history.snapshots || [];
+  if (history.encoding !== "delta") return snapshots;
+
+  let current = {};
+  return snapshots.map((s) => {
+    current = { ...current, ...(s.daily_commits_delta || {}) };
+    (s.daily_commits_removed || []).forEach((date) => delete current[date]);
+    return {
+      snapshot_date: s.snapshot_date,
+      daily_commits: current,
+      repo_metrics: s.repo_metrics,
+    };
+  });
+}
+
 function initializeDatePicker() {
   if (!allHistory || allHistory.length === 0) return;
 